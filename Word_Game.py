@@ -1,6 +1,3 @@
-import json
-import random
-import os
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition
 from kivy.uix.button import Button
@@ -10,14 +7,51 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.progressbar import ProgressBar
-from kivy.uix.checkbox import CheckBox
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import StringProperty, BooleanProperty, ListProperty, ObjectProperty, NumericProperty
+from kivy.factory import Factory
+from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.core.text import LabelBase
-from kivy.clock import Clock
+import kivy
 import logging
+import os
+import random
+import threading
+import time
+from log_config import configure_logging, resolve_level, stop_logging
+import tracing
+from tracing import traced
+from word_store import WordStore, word_key
+from pack_watcher import PackWatcher
+from theme_index import ThemeIndex
+from distractor_index import DistractorIndex, choice_options, CHOICES
+from theme import THEME
+from persistence import PersistenceService
+from progress_store import ProgressStore
+from game_session import GameSession, SESSION_SIZE, CORRECT, CLOSE, TIMEOUT
+from deck_sampler import DeckSampler
+from answer_timer import AnswerTimer
+import sound_cues
+from sound_cues import SoundCues
+from session_journal import SessionJournal, block_hashes, blocks_changed, read_journal, resume_position, word_positions
+from telemetry import TelemetryRecorder, new_device_id, new_session_id
+from search_index import SearchIndex
+from review_scheduler import ReviewScheduler, QUALITY_CORRECT, QUALITY_WITH_HINT, QUALITY_WRONG
 
-# Настройка логирования для отладки
-logging.basicConfig(level=logging.DEBUG)
+# Путь для сохранения прогресса, настроек и данных пользователя
+PROGRESS_FILE = "progress.json"
+DIFFICULT_WORDS_FILE = "difficult_words.json"
+SETTINGS_FILE = "settings.json"
+USER_FILE = "user.json"
+REVIEW_FILE = "review_state.json"
+TELEMETRY_DIR = "telemetry"
+SOUNDS_DIR = "sounds"
+JOURNAL_FILE = "session_journal.jsonl"
+
+# Уровень логирования берётся из WORDGAME_LOG_LEVEL или settings.json (по умолчанию INFO),
+# записи уходят в очередь и пишутся в файлы с ротацией фоновым потоком
+configure_logging(resolve_level(SETTINGS_FILE))
 logger = logging.getLogger(__name__)
 
 # Регистрация шрифта SF-Pro
@@ -38,36 +72,44 @@ try:
 except Exception as e:
     logger.error(f"Ошибка загрузки шрифта SF-Pro-Text-Medium: {e}")
 
-# Определение цветов
-ORANGE = (1, 87/255, 0, 1)  # #FF5700
-GRAY_BG = (249/255, 249/255, 249/255, 1)  # #F9F9F9
-WHITE_BG = (1, 1, 1, 1)  # #FFFFFF
-BLACK_TEXT = (0, 0, 0, 1)  # #000000
-WHITE_TEXT = (1, 1, 1, 1)  # #FFFFFF
+# Цвета обратной связи, не зависящие от темы
+GREEN_TEXT = (0, 1, 0, 1)
+RED_TEXT = (1, 0, 0, 1)
 
-# Установка начального фона (светлая тема по умолчанию)
-Window.clearcolor = WHITE_BG
+# Фон окна следует за текущей темой
+Window.clearcolor = THEME.background
+THEME.bind(background=lambda theme, color: setattr(Window, 'clearcolor', color))
 
 # Установка разрешения iPhone 14 Pro (402x874)
 Window.size = (402, 874)
 
-# Загрузка базы слов
-try:
-    with open("words.json", "r", encoding="utf-8") as f:
-        WORD_DATABASE = json.load(f)
-    logger.info("База слов успешно загружена")
-except FileNotFoundError:
-    logger.error("Файл words.json не найден. Создайте его с корректной структурой.")
-    exit(1)
-except json.JSONDecodeError:
-    logger.error("Ошибка в структуре words.json. Проверьте синтаксис.")
-    exit(1)
+# Загрузка базы слов: скомпилированное хранилище с индексом по подуровням,
+# сами слова раскодируются только при открытии подуровня. Если рядом с words.json
+# писать нельзя (пакет приложения только для чтения), хранилище компилируется
+# в каталог Kivy, доступный приложению на запись
+WORDS_FILE = "words.json"
+STORE_CACHE_DIR = os.path.join(kivy.kivy_home_dir, "wordgame")
+WORD_STORE = WordStore.open(WORDS_FILE, cache_dir=STORE_CACHE_DIR)
+logger.info(f"База слов открыта: {len(WORD_STORE.levels())} уровней")
 
-# Путь для сохранения прогресса, настроек и данных пользователя
-PROGRESS_FILE = "progress.json"
-DIFFICULT_WORDS_FILE = "difficult_words.json"
-SETTINGS_FILE = "settings.json"
-USER_FILE = "user.json"
+# Количество слов в разминке
+WARMUP_SIZE = 10
+
+# Количество слов в тематической подборке и вес сложных слов в выборке подуровня
+THEME_DECK_SIZE = 10
+DIFFICULT_WEIGHT = 3.0
+
+# Максимум результатов поиска в словаре
+SEARCH_LIMIT = 200
+
+# Сколько ближайших подуровней показывает вкладка "Задания"
+TASKS_COUNT = 5
+
+# Сколько самых больших тем показывает карусель на вкладке "Сегодня"
+CAROUSEL_THEMES = 12
+
+# Пункт фильтра словаря без ограничения по подуровню
+ALL_SUB_LEVELS = "Все подуровни"
 
 # Новый экран: Начальный экран для ввода имени
 class WelcomeScreen(Screen):
@@ -78,162 +120,211 @@ class WelcomeScreen(Screen):
             return
 
         # Сохраняем имя в user.json
-        try:
-            with open(USER_FILE, "w", encoding="utf-8") as f:
-                json.dump({"name": name}, f, ensure_ascii=False, indent=4)
-            logger.info(f"Имя пользователя сохранено: {name}")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения имени: {e}")
-            return
+        self.manager.persistence.save(USER_FILE, {"name": name})
+        self.manager.get_screen("main_menu").user_name = name
+        logger.info(f"Имя пользователя сохранено: {name}")
 
         # Переходим на главный экран
         self.manager.transition = SlideTransition(direction='left')
         self.manager.current = "main_menu"
 
 
+class LevelButton(Button):
+    # Кнопка подуровня: цвета берутся из темы в зависимости от блокировки (см. wordgame.kv)
+    locked = BooleanProperty(False)
+
+
+class MapLevelButton(RecycleDataViewBehavior, LevelButton):
+    # Ячейка сетки карты, переиспользуемая RecycleView; номер подуровня приходит из data
+    sub_level = StringProperty("")
+
+    def on_press(self):
+        map_screen = self.parent
+        while map_screen is not None and not isinstance(map_screen, MapScreen):
+            map_screen = map_screen.parent
+        if map_screen is not None and self.sub_level:
+            map_screen.start_game(int(self.sub_level))
+
+
 class MainMenuScreen(Screen):
+    active_tab = StringProperty("")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         logger.debug("Инициализация MainMenuScreen")
-        self.user_name = self.load_user_name()
+        self.user_name = None
+        # Содержимое вкладок строится один раз, переключение только меняет видимый набор
+        self.today_widgets = None
+        self.tasks_widgets = None
+        self.task_buttons = []
         logger.debug("MainMenuScreen полностью инициализирован")
 
+    @traced(category="ui")
     def on_pre_enter(self):
+        if self.user_name is None:
+            self.user_name = self.load_user_name()
         self.ids.greeting_label.text = f"Привет, {self.user_name}!"
-        self.apply_theme()  # Переносим сюда
+        if WORD_STORE.load_error is not None:
+            # Без базы слов играть нечем — показываем причину вместо приветствия
+            self.ids.greeting_label.text = "База слов не загружена"
         self.show_today()  # По умолчанию показываем "Сегодня"
+        self.update_resume()
 
     def load_user_name(self):
-        try:
-            with open(USER_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("name", "Пользователь")
-        except (FileNotFoundError, json.JSONDecodeError):
+        data = self.manager.persistence.load(USER_FILE)
+        if data is None:
             logger.warning("Файл user.json не найден, используется имя по умолчанию")
             return "Пользователь"
+        return data.get("name", "Пользователь")
 
-    def apply_theme(self):
-        settings = self.manager.app_settings
-        theme = settings.get("theme", "light")
-        if theme == "dark":
-            Window.clearcolor = (0.1, 0.1, 0.1, 1)  # Тёмный фон
-            self.ids.greeting_label.color = WHITE_TEXT
-            self.ids.today_button.color = WHITE_TEXT
-            self.ids.tasks_button.color = WHITE_TEXT
-            for child in self.ids.content_layout.children:
-                if isinstance(child, Button):
-                    child.color = WHITE_TEXT
-                elif isinstance(child, Carousel):
-                    for slide in child.slides:
-                        slide.color = WHITE_TEXT
-            for child in self.ids.menu_layout.children:
-                child.color = WHITE_TEXT
-        else:
-            Window.clearcolor = WHITE_BG
-            self.ids.greeting_label.color = BLACK_TEXT
-            self.ids.today_button.color = WHITE_TEXT if self.ids.today_button.background_color == ORANGE else BLACK_TEXT
-            self.ids.tasks_button.color = WHITE_TEXT if self.ids.tasks_button.background_color == ORANGE else BLACK_TEXT
-            for child in self.ids.content_layout.children:
-                if isinstance(child, Button):
-                    child.color = WHITE_TEXT if child.background_color == ORANGE else BLACK_TEXT
-                elif isinstance(child, Carousel):
-                    for slide in child.slides:
-                        slide.color = BLACK_TEXT
-            for child in self.ids.menu_layout.children:
-                child.color = BLACK_TEXT
+    def show_tab(self, tab, widgets):
+        if self.active_tab == tab:
+            return
+        self.active_tab = tab
+        self.ids.content_layout.clear_widgets()
+        for widget in widgets:
+            self.ids.content_layout.add_widget(widget)
 
     def show_today(self, *args):
         logger.debug("Показываем вкладку 'Сегодня'")
-        self.ids.today_button.background_color = ORANGE
-        self.ids.tasks_button.background_color = GRAY_BG
-        self.ids.today_button.color = WHITE_TEXT
-        self.ids.tasks_button.color = BLACK_TEXT
-        self.ids.content_layout.clear_widgets()
+        if self.today_widgets is None:
+            self.today_widgets = self.build_today()
+        self.show_tab("today", self.today_widgets)
+
+    def build_today(self):
+        # Кнопка продолжения прерванной сессии, показывается только при наличии журнала
+        self.resume_button = Factory.AccentButton(
+            size_hint=(0.9, 0.25),
+            pos_hint={'center_x': 0.5}
+        )
+        self.resume_button.bind(on_press=self.resume_session)
 
         # Кнопка "Разминка"
-        warmup_button = Button(
+        warmup_button = Factory.AccentButton(
             text="Разминка (10 вопросов)",
-            font_size=20,
-            font_name='SFPro',
             size_hint=(0.9, 0.25),
-            pos_hint={'center_x': 0.5},
-            background_color=ORANGE,
-            color=WHITE_TEXT,
-            background_normal='',
-            background_down=''
+            pos_hint={'center_x': 0.5}
         )
         warmup_button.bind(on_press=self.start_warmup)
-        self.ids.content_layout.add_widget(warmup_button)
 
-        # Блоки тем с горизонтальной прокруткой (Carousel)
-        carousel = Carousel(direction='right', size_hint=(1, 0.35), loop=True)
-        for i in range(3):
-            theme_button = Button(
-                text=f"Тема {i + 1}",
-                font_size=20,
-                font_name='SFPro',
-                background_color=GRAY_BG,
-                color=BLACK_TEXT,
+        # Блоки тем с горизонтальной прокруткой (Carousel) из индекса тем
+        self.carousel = Carousel(direction='right', size_hint=(1, 0.35), loop=True)
+        self.update_carousel()
+        return [warmup_button, self.carousel]
+
+    def update_resume(self):
+        state = self.manager.resume_state
+        if self.today_widgets is None:
+            return
+        shown = self.resume_button in self.today_widgets
+        if state is None:
+            if shown:
+                self.today_widgets.remove(self.resume_button)
+                if self.resume_button.parent is not None:
+                    self.resume_button.parent.remove_widget(self.resume_button)
+            return
+        start = state["start"]
+        if start.get("theme") is not None:
+            title = f"Тема «{start['theme']}»"
+        elif start.get("sub_level") is not None:
+            title = f"{start['level']} · Подуровень {start['sub_level']}"
+        else:
+            title = "Разминка"
+        total = len(start["words"])
+        position = min(resume_position(state) + 1, total)
+        self.resume_button.text = f"Продолжить: {title}\nСлово {position}/{total} · Очки: {state['score']}"
+        if not shown:
+            self.today_widgets.insert(0, self.resume_button)
+            if self.active_tab == "today":
+                self.ids.content_layout.add_widget(self.resume_button, index=len(self.ids.content_layout.children))
+
+    def resume_session(self, *args):
+        state = self.manager.resume_state
+        if state is None:
+            return
+        logger.debug("Продолжение прерванной сессии")
+        if not self.manager.get_screen("game").resume_session(state):
+            self.update_resume()
+            return
+        self.manager.transition = SlideTransition(direction='left')
+        self.manager.current = "game"
+
+    def update_carousel(self):
+        themes = self.manager.themes
+        self.carousel.clear_widgets()
+        for theme in themes.themes(CAROUSEL_THEMES):
+            theme_button = Factory.SurfaceButton(
+                text=f"{theme.capitalize()}\n{themes.word_count(theme)} слов",
+                halign="center",
                 size_hint=(0.8, 1),
-                pos_hint={'center_x': 0.5},
-                background_normal='',
-                background_down=''
+                pos_hint={'center_x': 0.5}
             )
+            theme_button.theme = theme
             theme_button.bind(on_press=self.start_game_with_theme)
-            carousel.add_widget(theme_button)
-        self.ids.content_layout.add_widget(carousel)
-
-        self.apply_theme()
+            self.carousel.add_widget(theme_button)
 
     def show_tasks(self, *args):
         logger.debug("Показываем вкладку 'Задания'")
-        self.ids.today_button.background_color = GRAY_BG
-        self.ids.tasks_button.background_color = ORANGE
-        self.ids.today_button.color = BLACK_TEXT
-        self.ids.tasks_button.color = WHITE_TEXT
-        self.ids.content_layout.clear_widgets()
+        if self.tasks_widgets is None:
+            self.tasks_widgets = self.build_tasks()
+        self.show_tab("tasks", self.tasks_widgets)
 
+    def build_tasks(self):
         # Список подуровней
         scroll_view = ScrollView(size_hint=(1, 0.6))
         sublevel_layout = GridLayout(cols=1, spacing=10, size_hint_y=None)
         sublevel_layout.bind(minimum_height=sublevel_layout.setter('height'))
 
-        for i in range(1, 6):
-            is_unlocked = i <= 3  # Пример: первые 3 уровня открыты
-            sublevel_button = Button(
-                text=f"Подуровень {i}",
-                font_size=20,
-                font_name='SFPro',
-                size_hint_y=None,
-                height=60,
-                background_color=ORANGE if is_unlocked else GRAY_BG,
-                color=WHITE_TEXT if is_unlocked else BLACK_TEXT,
-                disabled=not is_unlocked,
-                background_normal='',
-                background_down=''
-            )
-            sublevel_button.bind(on_press=lambda x, sl=i: self.start_game(sl))
-            sublevel_layout.add_widget(sublevel_button)
+        for _ in range(TASKS_COUNT):
+            task_button = LevelButton(size_hint_y=None, height=60)
+            task_button.task = None
+            task_button.bind(on_press=self.on_task_press)
+            self.task_buttons.append(task_button)
+            sublevel_layout.add_widget(task_button)
+        self.update_tasks()
 
         scroll_view.add_widget(sublevel_layout)
-        self.ids.content_layout.add_widget(scroll_view)
-
-        self.apply_theme()
+        return [scroll_view]
+
+    def update_tasks(self):
+        # Ближайшие подуровни по всем уровням берутся из индекса разблокировки прогресса
+        tasks = self.manager.progress.next_tasks(TASKS_COUNT)
+        for i, task_button in enumerate(self.task_buttons):
+            task = tasks[i] if i < len(tasks) else None
+            task_button.task = task
+            task_button.text = f"{task[0]} · Подуровень {task[1]}" if task else ""
+            task_button.locked = task is None or not self.manager.progress.is_sub_level_unlocked(*task)
+
+    def on_task_press(self, task_button):
+        if task_button.task is not None and not task_button.locked:
+            self.start_game(*task_button.task)
+
+    def on_progress_changed(self, cefr_level, sub_level, stars):
+        if self.tasks_widgets is not None:
+            self.update_tasks()
+
+    def on_words_changed(self, changed):
+        if self.tasks_widgets is not None:
+            self.update_tasks()
+        if self.today_widgets is not None:
+            self.update_carousel()
 
     def start_warmup(self, *args):
         logger.debug("Запуск разминки")
+        self.manager.get_screen("game").setup_warmup()
         self.manager.transition = SlideTransition(direction='left')
         self.manager.current = "game"
 
-    def start_game_with_theme(self, *args):
-        logger.debug("Запуск игры с выбранной темой")
+    def start_game_with_theme(self, theme_button):
+        logger.debug("Запуск игры с темой %s", theme_button.theme)
+        self.manager.get_screen("game").setup_theme(theme_button.theme)
         self.manager.transition = SlideTransition(direction='left')
         self.manager.current = "game"
 
-    def start_game(self, sub_level):
-        logger.debug(f"Запуск игры для подуровня {sub_level}")
+    def start_game(self, cefr_level, sub_level):
+        logger.debug("Запуск игры для %s, подуровня %s", cefr_level, sub_level)
         game_screen = self.manager.get_screen("game")
-        game_screen.setup_game("A1", sub_level)
+        game_screen.setup_game(cefr_level, sub_level)
         self.manager.transition = SlideTransition(direction='left')
         self.manager.current = "game"
 
@@ -254,86 +345,79 @@ class MainMenuScreen(Screen):
 
 
 class MapScreen(Screen):
+    current_cefr_level = StringProperty("")
+    levels = ListProperty([])
+    summary_text = StringProperty("")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.current_cefr_level = "A1"  # Инициализация
-        self.completed_sub_levels = {}  # Инициализация
+        self.sub_level_index = {}  # подуровень -> позиция в data сетки
 
+    @traced(category="ui")
     def on_pre_enter(self):
-        self.update_map()
-        self.apply_theme()
-
-    def load_progress(self):
-        try:
-            if os.path.exists(PROGRESS_FILE):
-                with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    logger.info("Прогресс успешно загружен")
-                    return data
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning("Ошибка загрузки прогресса, используется стандартный")
-        return {"current_cefr_level": "A1", "completed_sub_levels": {}}
-
-    def save_progress(self):
-        try:
-            with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-                json.dump({
-                    "current_cefr_level": self.current_cefr_level,
-                    "completed_sub_levels": self.completed_sub_levels
-                }, f, ensure_ascii=False, indent=4)
-            logger.info("Прогресс сохранён")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения прогресса: {e}")
-
-    def apply_theme(self):
-        settings = self.manager.app_settings
-        theme = settings.get("theme", "light")
-        if theme == "dark":
-            Window.clearcolor = (0.1, 0.1, 0.1, 1)
-            self.ids.title_label.color = WHITE_TEXT
-            self.ids.back_button.color = WHITE_TEXT
-            for btn in self.ids.map_layout.children:
-                btn.color = WHITE_TEXT if btn.background_color == ORANGE else BLACK_TEXT
-        else:
-            Window.clearcolor = WHITE_BG
-            self.ids.title_label.color = BLACK_TEXT
-            self.ids.back_button.color = WHITE_TEXT
-            for btn in self.ids.map_layout.children:
-                btn.color = WHITE_TEXT if btn.background_color == ORANGE else BLACK_TEXT
-
-    def update_map(self):
-        self.current_cefr_level = "A1"
-        self.completed_sub_levels = self.load_progress().get("completed_sub_levels", {})
-        self.ids.map_layout.clear_widgets()
-        for sub_level in range(1, 11):
-            try:
-                stars = self.completed_sub_levels.get(self.current_cefr_level, {}).get(str(sub_level), 0)
-                btn_text = f"{sub_level}\n{'★' * stars}{'☆' * (3 - stars)}" if stars > 0 else str(sub_level)
-                is_locked = not self.is_sub_level_unlocked(sub_level)
-                btn = Button(
-                    text=btn_text,
-                    font_size=20,
-                    font_name='SFPro',
-                    background_color=ORANGE if not is_locked else GRAY_BG,
-                    color=WHITE_TEXT if not is_locked else BLACK_TEXT,
-                    disabled=is_locked,
-                    background_normal='',
-                    background_down='',
-                    on_press=lambda x, sl=sub_level: self.start_game(sl)
-                )
-                self.ids.map_layout.add_widget(btn)
-            except Exception as e:
-                logger.error(f"Ошибка при обновлении карты для подуровня {sub_level}: {e}")
-        self.apply_theme()
+        # Данные карты собираются один раз, дальше ячейки обновляются по уведомлениям прогресса
+        if not self.sub_level_index:
+            self.update_map(self.current_cefr_level or self.manager.progress.current_cefr_level)
+
+    def select_level(self, cefr_level):
+        if cefr_level != self.current_cefr_level and cefr_level in self.levels:
+            self.update_map(cefr_level)
+
+    def update_summary(self):
+        # Сводка уровня поддерживается прогрессом, звёзды подуровней не пересчитываются
+        summary = self.manager.progress.level_summary(self.current_cefr_level)
+        self.summary_text = f"Пройдено {summary['completed']}/{summary['total']} · ★ {summary['stars']}"
+
+    @traced(category="ui")
+    def update_map(self, cefr_level=None):
+        # Сетка — RecycleView: виджеты создаются только для видимых ячеек,
+        # поэтому уровень с сотнями подуровней не требует сотен кнопок
+        self.levels = WORD_STORE.levels()
+        if cefr_level is not None:
+            self.current_cefr_level = cefr_level
+        if self.current_cefr_level not in self.levels and self.levels:
+            self.current_cefr_level = self.levels[0]
+        self.update_summary()
+        sub_levels = WORD_STORE.sub_levels(self.current_cefr_level)
+        self.sub_level_index = {int(sub_level): i for i, sub_level in enumerate(sub_levels)}
+        self.ids.map_grid.data = [self.sub_level_data(sub_level) for sub_level in sub_levels]
+
+    def sub_level_data(self, sub_level):
+        progress = self.manager.progress
+        stars = progress.stars(self.current_cefr_level, sub_level)
+        return {
+            "sub_level": str(sub_level),
+            "text": f"{sub_level}\n{'★' * stars}{'☆' * (3 - stars)}" if stars > 0 else str(sub_level),
+            "locked": not progress.is_sub_level_unlocked(self.current_cefr_level, sub_level),
+        }
+
+    def update_sub_level_button(self, sub_level):
+        index = self.sub_level_index.get(int(sub_level))
+        if index is None:
+            return
+        data = self.sub_level_data(sub_level)
+        grid = self.ids.map_grid
+        if grid.data[index] != data:
+            # Замена одного элемента обновляет только его ячейку, если она видна
+            grid.data[index] = data
+
+    def on_progress_changed(self, cefr_level, sub_level, stars):
+        # Результат подуровня меняет только его ячейку и разблокировку следующего
+        following = self.manager.progress.next_sub_level(cefr_level, sub_level)
+        if following is not None and following[0] == self.current_cefr_level:
+            self.update_sub_level_button(following[1])
+        if cefr_level != self.current_cefr_level:
+            return
+        self.update_summary()
+        self.update_sub_level_button(sub_level)
 
-    def is_sub_level_unlocked(self, sub_level):
-        if sub_level == 1:
-            return True
-        prev_sub_level = sub_level - 1
-        return str(prev_sub_level) in self.completed_sub_levels.get(self.current_cefr_level, {})
+    def on_words_changed(self, changed):
+        # Карта зависит только от списка подуровней; пересобираем её, если он мог измениться
+        if self.sub_level_index and changed:
+            self.update_map()
 
     def start_game(self, sub_level):
-        logger.debug(f"Запуск игры для подуровня {sub_level}")
+        logger.debug("Запуск игры для подуровня %s", sub_level)
         game_screen = self.manager.get_screen("game")
         game_screen.setup_game(self.current_cefr_level, sub_level)
         self.manager.transition = SlideTransition(direction='left')
@@ -345,116 +429,219 @@ class MapScreen(Screen):
         self.manager.current = "main_menu"
 
 
-class DictionaryScreen(Screen):
+class DictionaryRow(RecycleDataViewBehavior, BoxLayout):
+    # Строка словаря, переиспользуемая RecycleView; состояние хранится в data.
+    # Текст не хранится в data: строка берёт его из кэша блока (block, position)
+    # для текущего языка словаря, поэтому смена языка перепривязывает только видимые строки
+    text = StringProperty("")
+    word_key = StringProperty("")
+    difficult = BooleanProperty(False)
+    block = ObjectProperty(None, allownone=True)
+    position = NumericProperty(0)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.difficult_words = {}  # Инициализация
+        self.index = None
+        self.recycle_view = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.recycle_view = rv
+        result = super().refresh_view_attrs(rv, index, data)
+        dictionary_screen = self.dictionary_screen()
+        language = dictionary_screen.display_language if dictionary_screen is not None else "ru"
+        self.text = data["block"].display(language)[data["position"]]
+        return result
+
+    def dictionary_screen(self):
+        screen = self.recycle_view.parent if self.recycle_view is not None else None
+        while screen is not None and not isinstance(screen, DictionaryScreen):
+            screen = screen.parent
+        return screen
+
+    def on_checkbox_active(self, value):
+        # При переиспользовании строки чекбокс получает значение из data — это не клик
+        if self.recycle_view is None or self.index is None:
+            return
+        item = self.recycle_view.data[self.index]
+        if item["difficult"] == value:
+            return
+        item["difficult"] = value
+        self.difficult = value
+        dictionary_screen = self.dictionary_screen()
+        if dictionary_screen is not None:
+            dictionary_screen.toggle_difficult_word(item["word_key"], value)
+
+
+class DictionaryScreen(Screen):
+    # Язык, на котором строки словаря показывают перевод и определение
+    display_language = StringProperty("ru")
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.difficult_words = None  # Загружаются при первом входе
+        self.completed_sub_levels = []  # [(уровень, подуровень)] в порядке прохождения
+        self.sub_level_choices = {}  # текст пункта фильтра -> (уровень, подуровень)
+        self.needs_refresh = True
+        self.rows = []  # Строки после фильтров, до поиска
+        self.rows_by_key = {}
+        self.rows_filtered = False  # строки ограничены подуровнем или сложными словами
+        self.search_docs = None  # номера документов индекса для текущих строк (при фильтре)
+        # Индекс поиска пополняется пройденными подуровнями в фоновом потоке
+        self.search_index = SearchIndex()
+        self.search_thread = None
+
+    @traced(category="ui")
     def on_pre_enter(self):
-        self.load_words()
-        self.apply_theme()
+        if self.needs_refresh:
+            self.load_words()
+
+    def on_progress_changed(self, cefr_level, sub_level, stars):
+        # Список пересобирается при следующем входе на экран
+        self.needs_refresh = True
+
+    def on_words_changed(self, changed):
+        # Удалить блок из индекса поиска нельзя — индекс пересобирается лениво при следующем запросе
+        if any(self.search_index.has_block(key) for key in changed):
+            self.search_index = SearchIndex()
+            self.search_docs = None
+        if self.manager.current == self.name:
+            self.load_words()
+        else:
+            self.needs_refresh = True
 
     def load_difficult_words(self):
-        try:
-            if os.path.exists(DIFFICULT_WORDS_FILE):
-                with open(DIFFICULT_WORDS_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning("Файл difficult_words.json не найден, создаём новый")
-        return {}
+        return dict(self.manager.persistence.load(DIFFICULT_WORDS_FILE, {}))
 
     def save_difficult_words(self):
-        try:
-            with open(DIFFICULT_WORDS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.difficult_words, f, ensure_ascii=False, indent=4)
-            logger.info("Список сложных слов сохранён")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения сложных слов: {e}")
+        self.manager.persistence.save(DIFFICULT_WORDS_FILE, dict(self.difficult_words))
 
-    def apply_theme(self):
-        settings = self.manager.app_settings
-        theme = settings.get("theme", "light")
-        if theme == "dark":
-            Window.clearcolor = (0.1, 0.1, 0.1, 1)
-            self.ids.title_label.color = WHITE_TEXT
-            self.ids.filter_label.color = WHITE_TEXT
-            self.ids.sub_level_spinner.color = WHITE_TEXT
-            self.ids.back_button.color = WHITE_TEXT
-            for child in self.ids.word_list.children:
-                for widget in child.children:
-                    if isinstance(widget, Label):
-                        widget.color = WHITE_TEXT
-        else:
-            Window.clearcolor = WHITE_BG
-            self.ids.title_label.color = BLACK_TEXT
-            self.ids.filter_label.color = BLACK_TEXT
-            self.ids.sub_level_spinner.color = BLACK_TEXT
-            self.ids.back_button.color = WHITE_TEXT
-            for child in self.ids.word_list.children:
-                for widget in child.children:
-                    if isinstance(widget, Label):
-                        widget.color = BLACK_TEXT
+    def get_difficult_words(self):
+        if self.difficult_words is None:
+            self.difficult_words = self.load_difficult_words()
+        return self.difficult_words
 
     def load_words(self):
-        try:
-            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                progress = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            progress = {"current_cefr_level": "A1", "completed_sub_levels": {}}
-
-        self.completed_sub_levels = progress.get("completed_sub_levels", {}).get("A1", {})
-        self.difficult_words = self.load_difficult_words()
+        progress = self.manager.progress
+        self.completed_sub_levels = [(cefr_level, sub_level) for cefr_level in progress.levels()
+                                     for sub_level in progress.completed_sub_levels(cefr_level)]
+        self.sub_level_choices = {f"{cefr_level} · Подуровень {sub_level}": (cefr_level, sub_level)
+                                  for cefr_level, sub_level in self.completed_sub_levels}
+        self.ids.sub_level_spinner.values = [ALL_SUB_LEVELS] + list(self.sub_level_choices)
+        if self.ids.sub_level_spinner.text not in self.ids.sub_level_spinner.values:
+            self.ids.sub_level_spinner.text = ALL_SUB_LEVELS
+        self.get_difficult_words()
         self.update_word_list()
+        self.needs_refresh = False
+        # Индекс поиска для новых пройденных подуровней строится заранее, до первого запроса
+        self.update_search_index()
 
+    @traced(category="ui")
     def update_word_list(self, *args):
-        self.ids.word_list.clear_widgets()
+        # Собираем только модель данных; виджеты строк создаёт RecycleView для видимой области
         if not self.completed_sub_levels:
-            self.ids.word_list.add_widget(Label(
-                text="Вы ещё не прошли ни одного подуровня!",
-                font_size=20,
-                font_name='SFPro',
-                color=BLACK_TEXT,
-                size_hint_y=None,
-                height=40
-            ))
-            self.apply_theme()
+            self.ids.empty_label.text = "Вы ещё не прошли ни одного подуровня!"
+            self.rows = []
+            self.rows_by_key = {}
+            self.search_docs = None
+            self.ids.word_list.data = []
             return
+        self.ids.empty_label.text = ""
 
         selected_sub_level = self.ids.sub_level_spinner.text
         show_difficult_only = self.ids.difficult_only_checkbox.active
 
-        sub_levels_to_show = self.completed_sub_levels.keys()
-        if selected_sub_level != "Все подуровни":
-            sub_level_num = selected_sub_level.split()[-1]
-            sub_levels_to_show = [sub_level_num] if sub_level_num in self.completed_sub_levels else []
+        sub_levels_to_show = self.completed_sub_levels
+        if selected_sub_level != ALL_SUB_LEVELS:
+            selected = self.sub_level_choices.get(selected_sub_level)
+            sub_levels_to_show = [selected] if selected is not None else []
 
-        settings = self.manager.app_settings
-        language = settings.get("language", "ru")
-        for sub_level in sub_levels_to_show:
+        self.display_language = self.manager.app_settings.get("language", "ru")
+        data = []
+        for cefr_level, sub_level in sub_levels_to_show:
             try:
-                words = WORD_DATABASE["A1"][sub_level]["words"]
-                for word_data in words:
-                    word_key = f"A1_{sub_level}_{word_data['translations']['ru']}"
-                    if show_difficult_only and word_key not in self.difficult_words:
+                words = WORD_STORE.get_words(cefr_level, sub_level)
+                # Текст строк не собирается здесь: его берут видимые строки из кэша блока
+                for position, key in enumerate(words.ids):
+                    is_difficult = key in self.difficult_words
+                    if show_difficult_only and not is_difficult:
                         continue
-
-                    word_row = BoxLayout(size_hint_y=None, height=40, spacing=10)
-                    word_label = Label(
-                        text=f"{word_data['translations'][language]} - {word_data['definitions'][language]}",
-                        font_size=18,
-                        font_name='SFPro',
-                        color=BLACK_TEXT,
-                        halign="left",
-                        text_size=(300, None)
-                    )
-                    difficult_checkbox = CheckBox(active=word_key in self.difficult_words)
-                    difficult_checkbox.bind(active=lambda cb, value, wk=word_key: self.toggle_difficult_word(wk, value))
-                    word_row.add_widget(word_label)
-                    word_row.add_widget(difficult_checkbox)
-                    self.ids.word_list.add_widget(word_row)
+                    data.append({
+                        "word_key": key,
+                        "difficult": is_difficult,
+                        "block": words,
+                        "position": position,
+                    })
             except KeyError as e:
-                logger.error(f"Ошибка при загрузке слов для подуровня {sub_level}: {e}")
-        self.apply_theme()
+                logger.error(f"Ошибка при загрузке слов для подуровня {cefr_level}/{sub_level}: {e}")
+        self.rows = data
+        self.rows_by_key = {row["word_key"]: row for row in data}
+        self.rows_filtered = show_difficult_only or selected_sub_level != ALL_SUB_LEVELS
+        self.search_docs = None
+        self.apply_search()
+
+    @traced(category="ui")
+    def apply_search(self, *args):
+        query = self.ids.search_input.text.strip()
+        if not query or not self.update_search_index():
+            # Пока индекс строится, показываем строки без поиска; по готовности поиск повторится
+            self.ids.word_list.data = self.rows
+            return
+        language = self.manager.app_settings.get("language", "ru")
+        if self.rows_filtered and self.search_docs is None:
+            self.search_docs = self.search_index.doc_set(self.rows_by_key)
+        found = self.search_index.search(query, language, limit=SEARCH_LIMIT,
+                                         docs=self.search_docs if self.rows_filtered else None)
+        rows_by_key = self.rows_by_key
+        self.ids.word_list.data = [rows_by_key[key] for key in found if key in rows_by_key]
+
+    def update_language(self, language):
+        # Данные строк от языка не зависят: перепривязываем текст видимых строк,
+        # результаты поиска пересчитываются, так как ищем на выбранном языке
+        if language == self.display_language:
+            return
+        self.display_language = language
+        if self.ids.search_input.text.strip():
+            self.apply_search()
+        else:
+            self.ids.word_list.refresh_from_data()
+
+    def update_search_index(self):
+        # Недостающие пройденные подуровни индексируются в фоновом потоке (это дорого:
+        # сотни микросекунд на слово). Пока поток работает, UI-поток индекс не читает.
+        # Возвращает True, если индекс готов к поиску
+        if self.search_thread is not None:
+            return False
+        index = self.search_index
+        blocks = []
+        for block_key in self.completed_sub_levels:
+            if index.has_block(block_key):
+                continue
+            try:
+                blocks.append((block_key, WORD_STORE.get_words(*block_key)))
+            except KeyError:
+                index.add_block(block_key, [])
+        if not blocks:
+            return True
+
+        def run():
+            try:
+                with tracing.span("search.index", "app", blocks=len(blocks)):
+                    for block_key, words in blocks:
+                        index.add_block(block_key, list(zip(words.ids, words)))
+            except Exception as e:
+                logger.error(f"Ошибка построения индекса поиска: {e}")
+            Clock.schedule_once(lambda dt: self.on_search_index_ready(index))
+
+        self.search_thread = threading.Thread(target=run, name="search-index", daemon=True)
+        self.search_thread.start()
+        return False
+
+    def on_search_index_ready(self, index):
+        self.search_thread = None
+        self.search_docs = None
+        if index is self.search_index and self.ids.search_input.text.strip():
+            self.apply_search()
 
     def toggle_difficult_word(self, word_key, value):
         if value:
@@ -462,7 +649,7 @@ class DictionaryScreen(Screen):
         else:
             self.difficult_words.pop(word_key, None)
         self.save_difficult_words()
-        logger.debug(f"[Слово {word_key} помечено как сложное] {value}")
+        logger.debug("[Слово %s помечено как сложное] %s", word_key, value)
 
     def go_back(self, *args):
         logger.debug("Возврат на главное меню")
@@ -475,47 +662,18 @@ class SettingsScreen(Screen):
         super().__init__(**kwargs)
         self.settings = {}  # Инициализация
 
+    @traced(category="ui")
     def on_pre_enter(self):
         self.settings = self.manager.app_settings
         self.ids.timer_spinner.text = str(self.settings.get("timer_duration", 30))
         self.ids.language_spinner.text = self.settings.get("language", "ru")
         self.ids.sound_checkbox.active = self.settings.get("sound_enabled", True)
+        self.ids.choice_checkbox.active = self.settings.get("answer_mode", "text") == "choice"
         self.ids.theme_spinner.text = self.settings.get("theme", "light")
-        self.apply_theme()
 
     def save_settings(self):
-        try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=4)
-            logger.info("Настройки сохранены")
-            self.manager.app_settings = self.settings  # Обновляем кэш в приложении
-        except Exception as e:
-            logger.error(f"Ошибка сохранения настроек: {e}")
-
-    def apply_theme(self):
-        theme = self.settings.get("theme", "light")
-        if theme == "dark":
-            Window.clearcolor = (0.1, 0.1, 0.1, 1)
-            self.ids.title_label.color = WHITE_TEXT
-            self.ids.timer_label.color = WHITE_TEXT
-            self.ids.timer_spinner.color = WHITE_TEXT
-            self.ids.language_label.color = WHITE_TEXT
-            self.ids.language_spinner.color = WHITE_TEXT
-            self.ids.sound_label.color = WHITE_TEXT
-            self.ids.theme_label.color = WHITE_TEXT
-            self.ids.theme_spinner.color = WHITE_TEXT
-            self.ids.back_button.color = WHITE_TEXT
-        else:
-            Window.clearcolor = WHITE_BG
-            self.ids.title_label.color = BLACK_TEXT
-            self.ids.timer_label.color = BLACK_TEXT
-            self.ids.timer_spinner.color = BLACK_TEXT
-            self.ids.language_label.color = BLACK_TEXT
-            self.ids.language_spinner.color = BLACK_TEXT
-            self.ids.sound_label.color = BLACK_TEXT
-            self.ids.theme_label.color = BLACK_TEXT
-            self.ids.theme_spinner.color = BLACK_TEXT
-            self.ids.back_button.color = WHITE_TEXT
+        self.manager.persistence.save(SETTINGS_FILE, dict(self.settings))
+        self.manager.app_settings = self.settings  # Обновляем кэш в приложении
 
     def update_timer_setting(self, spinner, text):
         self.settings["timer_duration"] = int(text)
@@ -526,7 +684,7 @@ class SettingsScreen(Screen):
         self.settings["language"] = text
         self.save_settings()
         logger.debug(f"Язык обновлён: {text}")
-        self.manager.get_screen("dictionary").update_word_list()
+        self.manager.get_screen("dictionary").update_language(text)
         self.manager.get_screen("game").update_language()
 
     def update_sound_setting(self, checkbox, value):
@@ -534,15 +692,17 @@ class SettingsScreen(Screen):
         self.save_settings()
         logger.debug(f"Звук {'включён' if value else 'выключен'}")
 
+    def update_choice_setting(self, checkbox, value):
+        self.settings["answer_mode"] = "choice" if value else "text"
+        self.save_settings()
+        logger.debug(f"Режим ответа: {self.settings['answer_mode']}")
+
     def update_theme_setting(self, spinner, text):
         self.settings["theme"] = text
         self.save_settings()
         logger.debug(f"Тема обновлена: {text}")
-        self.apply_theme()
-        self.manager.get_screen("main_menu").apply_theme()
-        self.manager.get_screen("map").apply_theme()
-        self.manager.get_screen("dictionary").apply_theme()
-        self.manager.get_screen("game").apply_theme()
+        # Все виджеты привязаны к свойствам THEME, поэтому достаточно сменить палитру
+        THEME.apply(text)
 
     def go_back(self, *args):
         logger.debug("Возврат на главное меню")
@@ -551,178 +711,383 @@ class SettingsScreen(Screen):
 
 
 class GameScreen(Screen):
+    # Режим с вариантами ответа вместо ввода слова (настройка answer_mode)
+    choice_mode = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.choice_buttons = []
+        self.choices_for = None  # номер слова, для которого показаны варианты
+        self.rng = random.Random()
+        self.session = None
+        self.session_id = None
+        self.timer = AnswerTimer(self.on_time_expired, self.update_timer_label)
+        self.game_widgets = None  # Виджеты игры, скрытые на время показа результатов
+        self.current_cefr_level = None
+        self.current_sub_level = None
+        self.current_theme = None
+
+    @traced(category="ui")
     def on_pre_enter(self):
         self.load_settings()
-        self.apply_theme()
+        self.timer.show()
+        # Режим могли переключить в настройках посреди сессии
+        session = self.session
+        if self.choice_mode and session is not None and not session.is_finished and not session.answered \
+                and self.choices_for != session.current_word_index:
+            self.show_choices()
+
+    def on_leave(self):
+        # Цифры таймера не обновляются, пока экран игры не виден; таймаут при этом остаётся в силе
+        self.timer.hide()
+
+    def on_words_changed(self, changed):
+        # Идущая сессия держит свой раскодированный блок и доигрывается на нём,
+        # новая версия слов попадёт в следующую сессию
+        if self.session is not None and not self.session.is_finished \
+                and (self.current_cefr_level, str(self.current_sub_level)) in changed:
+            logger.info("Подуровень %s/%s обновлён, изменения вступят в силу в следующей сессии",
+                        self.current_cefr_level, self.current_sub_level)
 
     def load_settings(self):
         settings = self.manager.app_settings
         self.initial_time = settings.get("timer_duration", 30)
-        self.time_left = self.initial_time
         self.target_lang = settings.get("language", "ru")
+        self.choice_mode = settings.get("answer_mode", "text") == "choice"
         return settings
 
-    def apply_theme(self):
-        settings = self.manager.app_settings
-        theme = settings.get("theme", "light")
-        if theme == "dark":
-            Window.clearcolor = (0.1, 0.1, 0.1, 1)
-            self.ids.score_label.color = WHITE_TEXT
-            self.ids.progress_label.color = WHITE_TEXT
-            self.ids.timer_label.color = WHITE_TEXT
-            self.ids.definition_label.color = WHITE_TEXT
-            self.ids.answer_input.foreground_color = WHITE_TEXT
-            self.ids.hint_button.color = WHITE_TEXT
-            self.ids.check_button.color = WHITE_TEXT
-            self.ids.feedback_label.color = WHITE_TEXT
-            if hasattr(self, 'result_label'):
-                self.result_label.color = WHITE_TEXT
-            if hasattr(self, 'return_button'):
-                self.return_button.color = WHITE_TEXT
-        else:
-            Window.clearcolor = WHITE_BG
-            self.ids.score_label.color = BLACK_TEXT
-            self.ids.progress_label.color = BLACK_TEXT
-            self.ids.timer_label.color = BLACK_TEXT
-            self.ids.definition_label.color = BLACK_TEXT
-            self.ids.answer_input.foreground_color = BLACK_TEXT
-            self.ids.hint_button.color = WHITE_TEXT
-            self.ids.check_button.color = WHITE_TEXT
-            self.ids.feedback_label.color = BLACK_TEXT
-            if hasattr(self, 'result_label'):
-                self.result_label.color = BLACK_TEXT
-            if hasattr(self, 'return_button'):
-                self.return_button.color = WHITE_TEXT
-
     def update_language(self):
         self.load_settings()
-        if self.current_word_index < len(self.words):
-            word_data = self.words[self.current_word_index]
+        if self.session is not None and not self.session.is_finished:
+            word_data = self.session.current_word
             self.ids.definition_label.text = word_data["definitions"][self.target_lang]
             if self.ids.feedback_label.text.startswith("Ответ:"):
-                correct_answer = self.words[self.current_word_index]["translations"][self.target_lang]
+                correct_answer = self.session.correct_answer(self.target_lang)
                 self.ids.feedback_label.text = f"Ответ: {correct_answer}"
 
-    def setup_game(self, cefr_level, sub_level):
-        logger.debug(f"Настройка игры для уровня {cefr_level}, подуровня {sub_level}")
+    @traced(category="ui")
+    def setup_game(self, cefr_level, sub_level, seed=None):
+        logger.debug("Настройка игры для уровня %s, подуровня %s", cefr_level, sub_level)
         try:
+            words = WORD_STORE.get_words(cefr_level, sub_level)
             self.current_cefr_level = cefr_level
             self.current_sub_level = sub_level
-            self.words = WORD_DATABASE[cefr_level][str(sub_level)]["words"]
-            random.shuffle(self.words)
-            self.current_word_index = 0
-            self.correct_answers = 0
-            self.score = 0
-            self.ids.score_label.text = "Очки: 0"
-            self.load_settings()
-            self.ids.progress_bar.max = len(self.words)
-            self.ids.progress_bar.value = 0
-            self.show_next_word()
-            logger.info(f"Игра настроена для {cefr_level}, подуровень {sub_level}")
+            self.current_theme = None
+            # Колода из хранилища общая и не меняется: сессия получает только выборку индексов
+            sampler = DeckSampler(len(words), seed=seed)
+            order = sampler.take(SESSION_SIZE, self.difficult_weights(cefr_level, sub_level, words))
+            word_ids = {index: words.ids[index] for index in order}
+            self.start_session(GameSession(words, word_ids=word_ids, order=order, seed=sampler.seed))
+            logger.debug("Зерно выборки: %s", sampler.seed)
+            logger.info("Игра настроена для %s, подуровень %s", cefr_level, sub_level)
         except KeyError as e:
             logger.error(f"Ошибка в структуре базы данных: {e}")
             self.ids.definition_label.text = "Ошибка: уровень или подуровень не найден"
             self.ids.input_layout.clear_widgets()
 
+    def difficult_weights(self, cefr_level, sub_level, words):
+        # Слова, отмеченные в словаре как сложные, выпадают в сессии чаще
+        prefix = word_key(cefr_level, sub_level, {"translations": {"ru": ""}})
+        difficult = self.manager.get_screen("dictionary").get_difficult_words()
+        if not any(key.startswith(prefix) for key in difficult):
+            return None
+        return {index: DIFFICULT_WEIGHT for index, key in enumerate(words.ids) if key in difficult}
+
+    @traced(category="ui")
+    def setup_warmup(self):
+        # Разминка: карточки, срок повторения которых наступил, затем новые слова
+        # из открытых подуровней, затем самые трудные из уже изученных;
+        # результат не влияет на звёзды карты
+        review = self.manager.review
+        progress = self.manager.progress
+        word_ids = review.pick_due(WARMUP_SIZE)
+        if len(word_ids) < WARMUP_SIZE:
+            picked = set(word_ids)
+            for cefr_level in WORD_STORE.levels():
+                for sub_level in WORD_STORE.sub_levels(cefr_level):
+                    if len(word_ids) >= WARMUP_SIZE:
+                        break
+                    if not progress.is_sub_level_unlocked(cefr_level, sub_level):
+                        continue
+                    for key in WORD_STORE.get_words(cefr_level, sub_level).ids:
+                        if key not in review and key not in picked:
+                            word_ids.append(key)
+                            picked.add(key)
+                            if len(word_ids) >= WARMUP_SIZE:
+                                break
+        if len(word_ids) < WARMUP_SIZE:
+            word_ids.extend(review.pick_weak(WARMUP_SIZE - len(word_ids), exclude=set(word_ids)))
+
+        words = []
+        found_ids = []
+        for key in word_ids:
+            try:
+                words.append(WORD_STORE.get_word(key))
+                found_ids.append(key)
+            except KeyError:
+                logger.warning(f"Слово {key} больше нет в базе, пропускаем")
+        self.current_cefr_level = None
+        self.current_sub_level = None
+        self.current_theme = None
+        self.start_session(GameSession(words, word_ids=found_ids))
+        logger.info("Разминка настроена: %d слов", len(words))
+
+    @traced(category="ui")
+    def setup_theme(self, theme, seed=None):
+        # Колода темы: случайные слова из всех подуровней с этой темой; раскодируются
+        # только блоки, в которые попали выбранные слова
+        positions, seed = self.manager.themes.sample(theme, THEME_DECK_SIZE, seed)
+        words = []
+        word_ids = []
+        for cefr_level, sub_level, index in positions:
+            block = WORD_STORE.get_words(cefr_level, sub_level)
+            words.append(block[index])
+            word_ids.append(block.ids[index])
+        self.current_cefr_level = None
+        self.current_sub_level = None
+        self.current_theme = theme
+        self.start_session(GameSession(words, word_ids=word_ids, shuffle=False, seed=seed))
+        logger.info("Игра по теме %s: %d слов, зерно %s", theme, len(words), seed)
+
+    def resume_session(self, state):
+        # Сессия из журнала: те же слова в том же порядке, с того же слова и с теми же очками.
+        # Если подуровни сессии с тех пор изменились, журнал отбрасывается
+        start = state["start"]
+        if blocks_changed(start, WORD_STORE.block_hash):
+            logger.warning("Прерванную сессию не продолжить: база слов изменилась")
+            self.manager.journal.finish()
+            self.manager.resume_state = None
+            return False
+        positions = start["words"]
+        if start.get("sub_level") is not None:
+            words = WORD_STORE.get_words(start["level"], start["sub_level"])
+            order = [index for _, _, index in positions]
+            session = GameSession(words, word_ids={index: words.ids[index] for index in order}, order=order,
+                                  seed=start.get("seed"))
+        else:
+            blocks = [WORD_STORE.get_words(level, sub_level) for level, sub_level, _ in positions]
+            words = [block[index] for block, (_, _, index) in zip(blocks, positions)]
+            word_ids = [block.ids[index] for block, (_, _, index) in zip(blocks, positions)]
+            session = GameSession(words, word_ids=word_ids, shuffle=False, seed=start.get("seed"))
+        session.restore(resume_position(state), state["score"], state["correct_answers"],
+                        state["hint_used"] and not state["answered"], state["latencies_ms"])
+        self.current_cefr_level = start.get("level")
+        self.current_sub_level = start.get("sub_level")
+        self.current_theme = start.get("theme")
+        self.manager.journal.resume(state)
+        self.start_session(session, start["session"])
+        if session.hint_used and not session.is_finished:
+            self.ids.hint_button.disabled = True
+        logger.info("Продолжение сессии: слово %d из %d, очки %d",
+                    session.current_word_index + 1, session.total_words, session.score)
+        return True
+
+    def start_session(self, session, session_id=None):
+        self.restore_game_widgets()
+        self.session = session
+        if session_id is None:
+            # Новая сессия заменяет прерванную в журнале
+            session_id = new_session_id()
+            positions = word_positions(session.words[index] for index in session.order)
+            self.manager.journal.begin({
+                "session": session_id,
+                "level": self.current_cefr_level,
+                "sub_level": self.current_sub_level,
+                "theme": self.current_theme,
+                "seed": session.seed,
+                "words": positions,
+                "blocks": block_hashes(positions, WORD_STORE.block_hash),
+            })
+        self.manager.resume_state = None
+        self.session_id = session_id
+        self.ids.score_label.text = f"Очки: {session.score}"
+        self.load_settings()
+        self.ids.progress_bar.max = session.total_words
+        self.ids.progress_bar.value = 0
+        self.show_next_word()
+
+    def restore_game_widgets(self):
+        if self.game_widgets is None:
+            return
+        self.ids.layout.clear_widgets()
+        for widget in reversed(self.game_widgets):
+            self.ids.layout.add_widget(widget)
+        self.game_widgets = None
+
+    def record_answer(self, result, latency_ms):
+        session = self.session
+        self.manager.journal.answer(session.current_word_index, result, session.score, session.correct_answers,
+                                    session.hint_used, latency_ms)
+        self.record_review(result)
+        self.manager.telemetry.record(self.session_id, self.session.current_word_id, self.target_lang, latency_ms,
+                                      result, self.session.hint_used, result == TIMEOUT)
+
+    def record_review(self, result):
+        word_id = self.session.current_word_id
+        if word_id is None:
+            return
+        if result not in (CORRECT, CLOSE):
+            quality = QUALITY_WRONG
+        elif result == CLOSE or self.session.hint_used:
+            quality = QUALITY_WITH_HINT
+        else:
+            quality = QUALITY_CORRECT
+        self.manager.review.record_answer(word_id, quality)
+
     def show_next_word(self):
-        logger.debug(f"Показ следующего слова, индекс: {self.current_word_index}, всего слов: {len(self.words)}")
-        if self.current_word_index < len(self.words):
-            word_data = self.words[self.current_word_index]
-            self.ids.progress_label.text = f"Слово {self.current_word_index + 1}/{len(self.words)}"
-            self.ids.progress_bar.value = self.current_word_index + 1
+        session = self.session
+        logger.debug("Показ следующего слова, индекс: %d, всего слов: %d", session.current_word_index, session.total_words)
+        if not session.is_finished:
+            word_data = session.current_word
+            self.ids.progress_label.text = f"Слово {session.current_word_index + 1}/{session.total_words}"
+            self.ids.progress_bar.value = session.current_word_index + 1
             self.ids.definition_label.text = word_data["definitions"][self.target_lang]
             self.ids.answer_input.text = ""
             self.ids.feedback_label.text = ""
-            self.ids.feedback_label.color = BLACK_TEXT if self.load_settings().get("theme",
-                                                                                   "light") == "light" else WHITE_TEXT
+            self.ids.feedback_label.color = THEME.text
             self.ids.check_button.text = "Проверить"
-            self.ids.check_button.on_press = self.check_answer
+            self.ids.check_button.disabled = False
             self.ids.hint_button.disabled = False
-            self.hint_used = False
-            self.time_left = self.initial_time
-            self.ids.timer_label.text = str(self.time_left)
-            if self.timer_event:
-                self.timer_event.cancel()
-            self.timer_event = Clock.schedule_interval(self.update_timer, 1)
-            logger.debug(f"Показ слова {self.current_word_index + 1}: {word_data['definitions'][self.target_lang]}")
+            if self.choice_mode:
+                self.show_choices()
+            self.timer.start(self.initial_time)
+            logger.debug("Показ слова %d: %s", session.current_word_index + 1, word_data["definitions"][self.target_lang])
         else:
             self.show_results()
 
-    def update_timer(self, dt):
-        self.time_left -= 1
-        self.ids.timer_label.text = str(self.time_left)
-        if self.time_left <= 0:
-            self.timer_event.cancel()
-            self.ids.feedback_label.text = f"Время вышло! Ответ: {self.words[self.current_word_index]['translations'][self.target_lang]}"
-            self.ids.feedback_label.color = (1, 0, 0, 1)
-            self.score -= 5
-            if self.score < 0:
-                self.score = 0
-            self.ids.score_label.text = f"Очки: {self.score}"
-            self.ids.check_button.text = "Дальше"
-            self.ids.check_button.on_press = self.next_word
-            self.ids.hint_button.disabled = True
-            logger.debug("Время вышло для текущего слова")
+    def show_choices(self):
+        # Неправильные варианты — похожие слова из заранее построенного индекса
+        if not self.choice_buttons:
+            for _ in range(CHOICES):
+                choice_button = Factory.SurfaceButton(font_size=20)
+                choice_button.bind(on_press=self.choose_answer)
+                self.choice_buttons.append(choice_button)
+                self.ids.choice_layout.add_widget(choice_button)
+        options = choice_options(self.session.current_word, self.target_lang, self.manager.distractors, rng=self.rng)
+        for i, choice_button in enumerate(self.choice_buttons):
+            choice_button.text = options[i] if i < len(options) else ""
+            choice_button.disabled = i >= len(options)
+        self.choices_for = self.session.current_word_index
+        # Кнопка "Проверить" в этом режиме нужна только как "Дальше"
+        self.ids.check_button.disabled = True
+
+    def end_choices(self):
+        for choice_button in self.choice_buttons:
+            choice_button.disabled = True
+        self.ids.check_button.disabled = False
+
+    def choose_answer(self, choice_button):
+        if self.session is None or not self.session.can_answer():
+            return
+        input_time = time.perf_counter()
+        latency_ms = self.timer.stop()
+        result = self.session.answer_choice(choice_button.text, self.target_lang, latency_ms)
+        self.record_answer(result, latency_ms)
+        self.end_choices()
+        self.show_feedback(result, choice_button.text.lower(), self.session.correct_answer(self.target_lang).lower(),
+                           input_time)
+
+    def update_timer_label(self, seconds):
+        self.ids.timer_label.text = str(seconds)
+
+    def on_time_expired(self):
+        if self.session is None or not self.session.can_answer():
+            return
+        latency_ms = self.timer.elapsed_ms()
+        self.play_sound(sound_cues.TIMEOUT)
+        self.record_answer(self.session.timeout(latency_ms), latency_ms)
+        self.ids.feedback_label.text = f"Время вышло! Ответ: {self.session.correct_answer(self.target_lang)}"
+        self.ids.feedback_label.color = RED_TEXT
+        self.ids.score_label.text = f"Очки: {self.session.score}"
+        self.ids.check_button.text = "Дальше"
+        self.ids.hint_button.disabled = True
+        self.end_choices()
+        logger.debug("Время вышло для текущего слова")
 
     def show_hint(self, *args):
-        if not self.hint_used and self.current_word_index < len(self.words):
-            correct_answer = self.words[self.current_word_index]["translations"][self.target_lang].lower()
-            self.ids.answer_input.text = correct_answer[0]
-            self.hint_used = True
+        first_letter = self.session.use_hint(self.target_lang) if self.session else None
+        if first_letter is not None:
+            self.ids.answer_input.text = first_letter
             self.ids.hint_button.disabled = True
-            self.score -= 5
-            if self.score < 0:
-                self.score = 0
-            self.ids.score_label.text = f"Очки: {self.score}"
-            logger.debug(f"Подсказка использована: показана первая буква '{correct_answer[0]}'")
+            self.ids.score_label.text = f"Очки: {self.session.score}"
+            self.manager.journal.hint(self.session.current_word_index, self.session.score)
+            logger.debug("Подсказка использована: показана первая буква '%s'", first_letter)
+
+    def on_check_button(self):
+        # Одна кнопка в двух ролях: "Проверить", пока слово без ответа, и "Дальше" после
+        # ответа или таймаута. Одно нажатие — одно действие
+        session = self.session
+        if session is None or session.is_finished:
+            return
+        if session.answered:
+            self.next_word()
+        elif not self.choice_mode:
+            self.check_answer()
 
     def check_answer(self, *args):
-        self.timer_event.cancel()
+        if self.session is None or not self.session.can_answer():
+            return
+        input_time = time.perf_counter()
+        latency_ms = self.timer.stop()
         user_answer = self.ids.answer_input.text.strip().lower()
-        correct_answer = self.words[self.current_word_index]["translations"][self.target_lang].lower()
+        correct_answer = self.session.correct_answer(self.target_lang).lower()
 
-        settings = self.load_settings()
-        sound_enabled = settings.get("sound_enabled", True)
-        if user_answer == correct_answer:
+        self.load_settings()
+        result = self.session.answer(user_answer, self.target_lang, latency_ms)
+        self.record_answer(result, latency_ms)
+        if latency_ms is not None:
+            logger.debug("Время ответа: %.0f мс", latency_ms)
+        self.show_feedback(result, user_answer, correct_answer, input_time)
+
+    def play_sound(self, cue, input_time=None):
+        # Клипы уже раскодированы и лежат в пуле, диск здесь не трогается
+        if self.manager.app_settings.get("sound_enabled", True):
+            self.manager.sounds.play(cue, input_time)
+
+    def show_feedback(self, result, user_answer, correct_answer, input_time=None):
+        # Сигнал запускаем до обновления виджетов, чтобы он не ждал перерисовки
+        self.play_sound(sound_cues.CORRECT if result in (CORRECT, CLOSE) else sound_cues.WRONG, input_time)
+        if result == CORRECT:
             self.ids.feedback_label.text = "✓"
-            self.ids.feedback_label.color = (0, 1, 0, 1)
-            self.correct_answers += 1
-            self.score += 10
-            if sound_enabled:
-                logger.debug("Звук правильного ответа (будет добавлен позже)")
-            logger.debug(f"Правильный ответ: {correct_answer}")
+            self.ids.feedback_label.color = GREEN_TEXT
+            logger.debug("Правильный ответ: %s", correct_answer)
+        elif result == CLOSE:
+            # Засчитываем с меньшим числом очков и показываем правильное написание
+            self.ids.feedback_label.text = f"Почти! {correct_answer}"
+            self.ids.feedback_label.color = THEME.accent
+            logger.debug("[Почти правильный ответ] %s, правильный: %s", user_answer, correct_answer)
         else:
             self.ids.feedback_label.text = f"Ответ: {correct_answer}"
-            self.ids.feedback_label.color = (1, 0, 0, 1)
-            self.score -= 5
-            if self.score < 0:
-                self.score = 0
-            if sound_enabled:
-                logger.debug("Звук неправильного ответа (будет добавлен позже)")
-            logger.debug(f"[Неправильный ответ] {user_answer}, правильный: {correct_answer}")
-
-        self.ids.score_label.text = f"Очки: {self.score}"
+            self.ids.feedback_label.color = RED_TEXT
+            logger.debug("[Неправильный ответ] %s, правильный: %s", user_answer, correct_answer)
+
+        self.ids.score_label.text = f"Очки: {self.session.score}"
         self.ids.check_button.text = "Дальше"
-        self.ids.check_button.on_press = self.next_word
 
     def next_word(self, *args):
-        self.current_word_index += 1
+        self.session.next_word()
         self.show_next_word()
 
     def show_results(self):
-        if self.timer_event:
-            self.timer_event.cancel()
-        stars = self.calculate_stars()
+        self.timer.stop()
+        self.play_sound(sound_cues.LEVEL_COMPLETE)
+        self.manager.journal.finish()
+        stars = self.session.calculate_stars()
+        # Разминка и игра по теме не относятся к подуровню и не влияют на звёзды карты
+        is_warmup = self.current_sub_level is None
+        if self.current_theme is not None:
+            title = f"Тема «{self.current_theme}» завершена"
+        else:
+            title = "Разминка завершена" if is_warmup else "Подуровень пройден"
 
+        self.game_widgets = list(self.ids.layout.children)
         self.ids.layout.clear_widgets()
 
         result_layout = BoxLayout(orientation="vertical", padding=20, spacing=20)
 
-        self.result_label = Label(
-            text=f"Подуровень пройден!\nОчки: {self.score}",
+        self.result_label = Factory.ThemedLabel(
+            text=f"{title}!\nОчки: {self.session.score}",
             font_size=32,
-            font_name='SFPro',
-            color=BLACK_TEXT,
             halign="center"
         )
         result_layout.add_widget(self.result_label)
@@ -737,68 +1102,97 @@ class GameScreen(Screen):
             stars_layout.add_widget(star_label)
         result_layout.add_widget(stars_layout)
 
-        self.return_button = Button(
-            text="Вернуться к карте",
-            font_size=20,
-            font_name='SFPro',
+        self.return_button = Factory.AccentButton(
+            text="Вернуться в меню" if is_warmup else "Вернуться к карте",
             size_hint=(0.8, 0.2),
             pos_hint={'center_x': 0.5},
-            background_color=ORANGE,
-            color=WHITE_TEXT,
-            background_normal='',
-            background_down='',
-            on_press=self.go_to_map
+            on_press=self.go_to_main if is_warmup else self.go_to_map
         )
         result_layout.add_widget(self.return_button)
 
         self.ids.layout.add_widget(result_layout)
-        self.apply_theme()
-
-        map_screen = self.manager.get_screen("map")
-        if self.current_cefr_level not in map_screen.completed_sub_levels:
-            map_screen.completed_sub_levels[self.current_cefr_level] = {}
-        map_screen.completed_sub_levels[self.current_cefr_level][str(self.current_sub_level)] = stars
-        map_screen.save_progress()
-        map_screen.update_map()
-
-        logger.info(f"Результат: {stars} звёзд, очки: {self.score}")
-
-    def calculate_stars(self):
-        percentage = (self.correct_answers / len(self.words)) * 100
-        if percentage >= 90 and self.score >= len(self.words) * 10 * 0.9:
-            return 3
-        elif percentage >= 70 and self.score >= len(self.words) * 10 * 0.7:
-            return 2
-        elif percentage >= 50 and self.score >= len(self.words) * 10 * 0.5:
-            return 1
-        return 0
+
+        if not is_warmup:
+            self.manager.progress.record_result(self.current_cefr_level, self.current_sub_level, stars)
+        self.manager.review.save()
+
+        logger.info("Результат: %d звёзд, очки: %d", stars, self.session.score)
 
     def go_to_map(self, *args):
         logger.debug("Возврат на карту")
         self.manager.transition = SlideTransition(direction='right')
         self.manager.current = "map"
 
+    def go_to_main(self, *args):
+        logger.debug("Возврат на главное меню")
+        self.manager.transition = SlideTransition(direction='right')
+        self.manager.current = "main_menu"
+
+
+def trace_transitions(sm):
+    # Интервал перехода: от смены текущего экрана до on_enter нового (конец анимации)
+    state = {"span": None}
+
+    def on_current(manager, name):
+        tracing.end(state["span"])
+        state["span"] = tracing.begin(f"transition -> {name}", "ui")
+
+    def on_enter(screen):
+        tracing.end(state["span"])
+        state["span"] = None
+
+    sm.bind(current=on_current)
+    for screen in sm.screens:
+        screen.bind(on_enter=on_enter)
+
 
 class WordGameApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.is_closing = False
+        # Общий сервис отложенной записи JSON-файлов
+        self.persistence = PersistenceService()
         # Кэшируем настройки приложения
         self.app_settings = self.load_settings()
+        THEME.apply(self.app_settings.get("theme", "light"))
+        # Прогресс читается один раз и дальше живёт в памяти
+        self.progress = ProgressStore(self.persistence, PROGRESS_FILE)
+        self.progress.set_layout(WORD_STORE.layout())
+        # Индекс тем для карусели строится по заголовку хранилища
+        self.themes = ThemeIndex.build(WORD_STORE)
+        # Карточки интервальных повторений для разминки
+        self.review = ReviewScheduler(self.persistence, REVIEW_FILE)
+        # Поток событий по каждому ответу, сбрасывается сжатыми сегментами в фоне
+        if "device_id" not in self.app_settings:
+            self.app_settings["device_id"] = new_device_id()
+            self.persistence.save(SETTINGS_FILE, dict(self.app_settings))
+        self.telemetry = TelemetryRecorder(self.app_settings["device_id"], TELEMETRY_DIR)
+        # Звуковые сигналы загружаются в фоне при запуске (см. on_start)
+        self.sounds = SoundCues(SOUNDS_DIR)
+        # Журнал текущей сессии; незавершённая сессия прошлого запуска предлагается в главном меню
+        self.journal = SessionJournal(JOURNAL_FILE)
 
     def load_settings(self):
-        try:
-            if os.path.exists(SETTINGS_FILE):
-                with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+        settings = self.persistence.load(SETTINGS_FILE)
+        if settings is None:
             logger.warning("Файл settings.json не найден, создаём новый")
-        return {"timer_duration": 30, "language": "ru", "sound_enabled": True, "theme": "light"}
+            return {"timer_duration": 30, "language": "ru", "sound_enabled": True, "theme": "light"}
+        return settings
 
     def build(self):
         logger.debug("Создание приложения")
         sm = ScreenManager()
         sm.app_settings = self.app_settings  # Передаём настройки в ScreenManager
+        sm.persistence = self.persistence
+        sm.progress = self.progress
+        sm.review = self.review
+        sm.telemetry = self.telemetry
+        sm.themes = self.themes
+        sm.sounds = self.sounds
+        sm.journal = self.journal
+        sm.resume_state = read_journal(JOURNAL_FILE)
+        # Индекс вариантов ответа строится в фоне при запуске (см. build_distractors)
+        sm.distractors = None
         sm.add_widget(WelcomeScreen(name="welcome"))
         sm.add_widget(MainMenuScreen(name="main_menu"))
         sm.add_widget(MapScreen(name="map"))
@@ -806,6 +1200,15 @@ class WordGameApp(App):
         sm.add_widget(DictionaryScreen(name="dictionary"))
         sm.add_widget(SettingsScreen(name="settings"))
         logger.debug("Все экраны добавлены в ScreenManager")
+        self.progress.subscribe(sm.get_screen("main_menu").on_progress_changed)
+        self.progress.subscribe(sm.get_screen("map").on_progress_changed)
+        self.progress.subscribe(sm.get_screen("dictionary").on_progress_changed)
+
+        if tracing.ENABLED:
+            trace_transitions(sm)
+
+        # Исправления words.json подхватываются без перезапуска
+        self.pack_watcher = PackWatcher(WORDS_FILE, WORD_STORE, self.on_pack_reloaded)
 
         # Всегда открываем WelcomeScreen для тестирования
         sm.current = "welcome"
@@ -817,16 +1220,67 @@ class WordGameApp(App):
 
     def on_start(self):
         logger.debug("Приложение запущено, основной цикл начинается")
+        self.pack_watcher.start()
+        self.sounds.preload()
+        self.build_distractors(WORD_STORE)
+
+    def build_distractors(self, store):
+        # Индекс похожих слов читается из кэша или строится заново в фоновом потоке;
+        # пока его нет, варианты ответа берутся из подуровня слова
+        def run():
+            try:
+                index = DistractorIndex.load_or_build(store)
+            except Exception as e:
+                logger.error(f"Ошибка построения индекса вариантов: {e}")
+                return
+            Clock.schedule_once(lambda dt: self.set_distractors(store, index))
+
+        threading.Thread(target=run, name="distractors", daemon=True).start()
+
+    def set_distractors(self, store, index):
+        # Индекс, построенный для уже заменённого хранилища, не подходит к новым блокам
+        if store is WORD_STORE:
+            self.root.distractors = index
+
+    def on_pack_reloaded(self, store, changed):
+        # Вызывается из потока наблюдателя: подмена хранилища и обновление экранов — на UI-потоке
+        Clock.schedule_once(lambda dt: self.swap_word_store(store, changed))
+
+    def swap_word_store(self, store, changed):
+        global WORD_STORE
+        if self.is_closing:
+            store.close()
+            return
+        previous = WORD_STORE
+        # Кэш живого хранилища читается только здесь, на UI-потоке
+        store.adopt_cache(previous, changed)
+        WORD_STORE = store
+        # Раскодированные блоки, которые держат экраны, от файла старого хранилища не зависят
+        previous.close()
+        self.progress.set_layout(store.layout())
+        self.themes = self.root.themes = ThemeIndex.build(store)
+        self.root.distractors = None
+        self.build_distractors(store)
+        for name in ("main_menu", "map", "dictionary", "game"):
+            self.root.get_screen(name).on_words_changed(changed)
 
     def on_stop(self):
         logger.debug("Приложение закрывается")
-        for screen in self.root.screens:
-            if hasattr(screen, 'save_progress'):
-                screen.save_progress()
-            if hasattr(screen, 'save_settings'):
-                screen.save_settings()
-            if hasattr(screen, 'save_difficult_words'):
-                screen.save_difficult_words()
+        # Перезагрузки базы, которые ещё ждут в Clock, больше не применяются
+        self.is_closing = True
+        self.pack_watcher.stop()
+        WORD_STORE.close()
+        latency = self.sounds.latency_summary()
+        if latency is not None:
+            logger.info("Задержка звука от ввода: медиана %.1f мс, p95 %.1f мс (%d замеров)",
+                        latency["p50_ms"], latency["p95_ms"], latency["count"])
+        self.sounds.unload()
+        self.journal.close()
+        self.review.save()
+        self.telemetry.stop()
+        # Все изменения уже переданы сервису записи; дописываем на диск то, что ещё ждёт
+        self.persistence.stop()
+        stop_logging()
 
     def on_keyboard(self, window, key, scancode, codepoint, modifier):
         if key == 27:
@@ -843,10 +1297,11 @@ class WordGameApp(App):
         return False
 
     def on_request_close(self, *args):
+        # Закрытие отклоняется, поэтому is_closing здесь не ставится: приложение продолжает
+        # работать и должно принимать перезагрузки базы. Флаг ставит on_stop
         if self.is_closing:
-            logger.debug("Запрос на закрытие уже обрабатывается, игнорируем повторный вызов")
+            logger.debug("Приложение уже закрывается, игнорируем повторный запрос")
             return True
-        self.is_closing = True
         logger.debug("Получен запрос на закрытие приложения")
         return True
 
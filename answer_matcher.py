@@ -0,0 +1,129 @@
+import unicodedata
+
+# Результаты сравнения ответа
+MATCH_EXACT = "exact"
+MATCH_CLOSE = "close"
+MATCH_NONE = "none"
+
+# Языки, где ответ без диакритики засчитывается как почти верный. В русском
+# снятие диакритики превратило бы "й" в "и" ("мои" вместо "мой"), там равнозначны только ё и е
+DIACRITIC_LANGUAGES = ("de", "fr")
+
+# Немецкие умлауты часто вводят двумя буквами
+GERMAN_DIGRAPHS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+def normalize(text, language):
+    # Регистр, Unicode-нормализация и пробелы; для русского ё и е равнозначны
+    text = " ".join(unicodedata.normalize("NFC", text).casefold().split())
+    if language == "ru":
+        text = text.replace("ё", "е")
+    return text
+
+
+def strip_diacritics(text):
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def fold(normalized, language):
+    # Основная форма для сравнения с опечатками
+    if language not in DIACRITIC_LANGUAGES:
+        return normalized
+    return strip_diacritics(normalized.replace("ß", "ss"))
+
+
+def folded_forms(normalized, language):
+    # Варианты написания без диакритики; первый — основной, по нему считается расстояние
+    forms = [fold(normalized, language)]
+    if language == "de":
+        digraphs = normalized.translate(GERMAN_DIGRAPHS)
+        if digraphs not in forms:
+            forms.append(digraphs)
+    return forms
+
+
+def max_distance_for(length):
+    # Допустимое число опечаток растёт с длиной слова
+    if length <= 3:
+        return 0
+    if length <= 6:
+        return 1
+    return 2
+
+
+def pattern_masks(pattern):
+    masks = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def osa_distance(pattern, masks, text):
+    # Битово-параллельное расстояние Дамерау–Левенштейна (вариант OSA, Hyyrö 2003):
+    # столбец матрицы расстояний кодируется битовыми векторами длины len(pattern)
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    vp = full
+    vn = 0
+    d0 = 0
+    prev_pm = 0
+    score = m
+    for ch in text:
+        pm = masks.get(ch, 0)
+        tr = ((((~d0) & pm) << 1) & prev_pm)
+        d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | tr) & full
+        hp = (vn | ~(d0 | vp)) & full
+        hn = d0 & vp
+        if hp & high:
+            score += 1
+        elif hn & high:
+            score -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = (hn | ~(d0 | hp)) & full
+        vn = d0 & hp
+        prev_pm = pm
+    return score
+
+
+class PreparedAnswer:
+    # Заранее посчитанные формы правильного ответа для одного языка
+    __slots__ = ("text", "exact", "folded", "masks", "max_distance")
+
+    def __init__(self, text, language):
+        self.text = text
+        self.exact = normalize(text, language)
+        self.folded = folded_forms(self.exact, language)
+        self.masks = pattern_masks(self.folded[0])
+        self.max_distance = max_distance_for(len(self.folded[0]))
+
+
+def prepare_word(word_data):
+    return {language: PreparedAnswer(text, language) for language, text in word_data["translations"].items()}
+
+
+def prepare_deck(words):
+    return [prepare_word(word_data) for word_data in words]
+
+
+def match_answer(prepared, user_answer, language):
+    answer = normalize(user_answer, language)
+    if answer == prepared.exact:
+        return MATCH_EXACT
+    if not answer:
+        return MATCH_NONE
+    folded = fold(answer, language)
+    if folded in prepared.folded:
+        return MATCH_CLOSE
+    pattern = prepared.folded[0]
+    if prepared.max_distance == 0 or abs(len(folded) - len(pattern)) > prepared.max_distance:
+        return MATCH_NONE
+    if osa_distance(pattern, prepared.masks, folded) <= prepared.max_distance:
+        return MATCH_CLOSE
+    return MATCH_NONE
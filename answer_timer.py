@@ -0,0 +1,91 @@
+import math
+import time
+
+from kivy.clock import Clock
+
+# Период обновления цифр на экране; сам таймаут от него не зависит
+DISPLAY_INTERVAL = 0.1
+
+
+class AnswerTimer:
+    # Таймер ответа по дедлайну: время истечения считается от time.monotonic(),
+    # поэтому подвисания кадров не копятся. Таймаут — одно одноразовое событие,
+    # обновление цифр включается только пока экран с таймером виден.
+    def __init__(self, on_expire, on_display=None, clock=time.monotonic):
+        self.on_expire = on_expire
+        self.on_display = on_display
+        self.clock = clock
+        self.started_at = None
+        self.deadline = None
+        self.displayed = None
+        # События создаются один раз и дальше только перезапускаются
+        self._expire_trigger = Clock.create_trigger(self._expire, 0)
+        self._display_event = Clock.schedule_interval(self._display, DISPLAY_INTERVAL)
+        self._display_event.cancel()
+        self._visible = False
+
+    @property
+    def is_running(self):
+        return self.deadline is not None
+
+    def start(self, duration):
+        self.started_at = self.clock()
+        self.deadline = self.started_at + duration
+        self._schedule_expire(duration)
+        self._display()
+        if self._visible:
+            self._display_event()
+
+    def stop(self):
+        # Останавливает таймер и возвращает время ответа в миллисекундах
+        if self.deadline is None:
+            return None
+        self.deadline = None
+        self._expire_trigger.cancel()
+        self._display_event.cancel()
+        return self.elapsed_ms()
+
+    def elapsed_ms(self):
+        if self.started_at is None:
+            return None
+        return (self.clock() - self.started_at) * 1000.0
+
+    def remaining(self):
+        if self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - self.clock())
+
+    def show(self):
+        self._visible = True
+        if self.is_running:
+            self._display()
+            self._display_event()
+
+    def hide(self):
+        self._visible = False
+        self._display_event.cancel()
+
+    def _schedule_expire(self, delay):
+        self._expire_trigger.cancel()
+        self._expire_trigger.timeout = delay
+        self._expire_trigger()
+
+    def _expire(self, dt):
+        if self.deadline is None:
+            return
+        left = self.deadline - self.clock()
+        if left > 0:
+            # Часы Kivy сработали раньше монотонного дедлайна — дожидаемся остатка
+            self._schedule_expire(left)
+            return
+        self.stop()
+        self._display()
+        self.on_expire()
+
+    def _display(self, *args):
+        # Показываем целые секунды с округлением вверх, метку трогаем только при смене значения
+        seconds = math.ceil(self.remaining())
+        if seconds != self.displayed:
+            self.displayed = seconds
+            if self.on_display is not None:
+                self.on_display(seconds)
@@ -0,0 +1,125 @@
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic_deck import write_deck  # noqa: E402
+from word_store import WordBlock  # noqa: E402
+
+# Память на одно слово в раскодированной колоде: прежние вложенные словари
+# против столбцовых блоков WordBlock.
+#
+#   python -m benchmarks.memory_footprint --words 100000
+#   python -m benchmarks.memory_footprint --input words.json
+#
+# Замер через tracemalloc: сколько байт остаётся занято после раскодирования
+# всех подуровней (и пик во время раскодирования).
+
+
+def load_payloads(words_file):
+    # JSON-блоки подуровней в том виде, в каком их хранит скомпилированное хранилище
+    with open(words_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    payloads = []
+    for level, sub_levels in data.items():
+        for sub_level, sub_data in sub_levels.items():
+            words = sub_data.get("words", [])
+            payloads.append((level, sub_level, len(words),
+                             json.dumps(words, ensure_ascii=False, separators=(",", ":"))))
+    return payloads
+
+
+def decode_dicts(payloads):
+    return [json.loads(payload) for _, _, _, payload in payloads]
+
+
+def decode_blocks(payloads):
+    return [WordBlock(level, sub_level, json.loads(payload)) for level, sub_level, _, payload in payloads]
+
+
+def decode_blocks_with_ids(payloads):
+    blocks = decode_blocks(payloads)
+    for block in blocks:
+        block.ids
+    return blocks
+
+
+REPRESENTATIONS = [
+    ("dict", decode_dicts),
+    ("word_block", decode_blocks),
+    ("word_block+ids", decode_blocks_with_ids),
+]
+
+
+def measure(decode, payloads):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = decode(payloads)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current - baseline, peak - baseline
+
+
+def run(payloads):
+    total_words = sum(count for _, _, count, _ in payloads) or 1
+    results = []
+    for name, decode in REPRESENTATIONS:
+        retained, peak = measure(decode, payloads)
+        results.append({
+            "representation": name,
+            "words": total_words,
+            "retained_bytes": retained,
+            "peak_bytes": peak,
+            "bytes_per_word": retained / total_words,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Память на слово в раскодированной колоде")
+    parser.add_argument("--words", type=int, default=100000, help="размер синтетической колоды")
+    parser.add_argument("--input", help="готовый words.json вместо синтетической колоды")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="записать результаты в JSON-файл")
+    args = parser.parse_args(argv)
+
+    workdir = None
+    words_file = args.input
+    if words_file is None:
+        workdir = tempfile.mkdtemp(prefix="wordgame-memory-")
+        words_file = os.path.join(workdir, "words.json")
+        write_deck(words_file, args.words, args.seed)
+    try:
+        results = run(load_payloads(words_file))
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[0]["bytes_per_word"]
+    print(f"{results[0]['words']} слов ({words_file if args.input else 'синтетическая колода'})")
+    for result in results:
+        ratio = result["bytes_per_word"] / baseline if baseline else 0.0
+        print(f"  {result['representation']:<16} {result['bytes_per_word']:8.1f} байт/слово "
+              f"({ratio:.0%}) | пик {result['peak_bytes'] / 1024 / 1024:.1f} МБ")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
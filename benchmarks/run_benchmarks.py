@@ -0,0 +1,325 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Kivy не должен разбирать аргументы бенчмарка
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic_deck import write_deck  # noqa: E402
+from persistence import atomic_write_json  # noqa: E402
+from word_store import WordStore, compile_store, default_store_path  # noqa: E402
+
+# Бенчмарки роста контента: загрузка базы слов, экраны и пути сохранения
+# на синтетических колодах разного размера.
+#
+#   python -m benchmarks.run_benchmarks --sizes 1000,100000 --output bench_results.json
+#
+# Пороговые значения (секунды, медиана) лежат в benchmarks/thresholds.json;
+# при превышении любого порога скрипт завершается с кодом 1.
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+DEFAULT_REPEAT = 5
+SF_FONTS = ("SFPro", "SFProTextLight", "SFProTextMedium")
+
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=DEFAULT_REPEAT, setup=None):
+    # setup(ctx) выполняется один раз перед замерами и в них не входит
+    def decorator(func):
+        BENCHMARKS.append((name, repeat, func, setup))
+        return func
+    return decorator
+
+
+class DeckContext:
+    # Рабочая папка с синтетической колодой и экраны приложения поверх неё
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.workdir = tempfile.mkdtemp(prefix=f"wordgame-bench-{size}-")
+        self.words_file = os.path.join(self.workdir, "words.json")
+        self.layout = write_deck(self.words_file, size, seed)
+        self.store = None
+        self.app = None
+
+    def prepare_state_files(self):
+        # Все подуровни A1 пройдены, каждое десятое слово помечено как сложное
+        from Word_Game import PROGRESS_FILE, DIFFICULT_WORDS_FILE
+        store = WordStore.open(self.words_file)
+        completed = {}
+        difficult = {}
+        for sub_level in store.sub_levels("A1"):
+            completed[sub_level] = 2
+            for i, word_data in enumerate(store.get_words("A1", sub_level)):
+                if i % 10 == 0:
+                    difficult[f"A1_{sub_level}_{word_data['translations']['ru']}"] = True
+        store.close()
+        atomic_write_json(os.path.join(self.workdir, PROGRESS_FILE),
+                          {"current_cefr_level": "A1", "completed_sub_levels": {"A1": completed}})
+        atomic_write_json(os.path.join(self.workdir, DIFFICULT_WORDS_FILE), difficult)
+
+    def start_app(self):
+        import Word_Game
+        self.store = WordStore.open(self.words_file)
+        Word_Game.WORD_STORE = self.store
+        self.app = Word_Game.WordGameApp()
+        self.root = self.app.build()
+        self.app.root = self.root
+        return self.app
+
+    def screen(self, name):
+        return self.root.get_screen(name)
+
+    def close(self):
+        if self.app is not None:
+            self.app.persistence.stop()
+        if self.store is not None:
+            self.store.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def ensure_fonts():
+    # Шрифты SF Pro не входят в репозиторий; для замеров подменяем их стандартным шрифтом Kivy
+    from kivy.core.text import LabelBase
+    from kivy.resources import resource_find
+    if resource_find("SF-Pro.ttf"):
+        return
+    import kivy
+    roboto = os.path.join(os.path.dirname(kivy.__file__), "data", "fonts", "Roboto-Regular.ttf")
+    for name in SF_FONTS:
+        LabelBase.register(name=name, fn_regular=roboto)
+
+
+@benchmark("word_store_compile", repeat=3)
+def bench_word_store_compile(ctx):
+    compile_store(ctx.words_file)
+
+
+@benchmark("word_store_open")
+def bench_word_store_open(ctx):
+    store = WordStore(default_store_path(ctx.words_file))
+    store.levels()
+    store.close()
+
+
+@benchmark("word_store_first_sub_level")
+def bench_word_store_first_sub_level(ctx):
+    store = WordStore(default_store_path(ctx.words_file))
+    store.get_words("A1", store.sub_levels("A1")[0])
+    store.close()
+
+
+@benchmark("game_setup_game")
+def bench_setup_game(ctx):
+    game = ctx.screen("game")
+    game.setup_game("A1", "1")
+    game.timer.stop()
+
+
+def _update_word_list(ctx, difficult_only):
+    dictionary = ctx.screen("dictionary")
+    dictionary.ids.difficult_only_checkbox.active = difficult_only
+    dictionary.load_words()
+
+
+@benchmark("dictionary_update_word_list", repeat=3)
+def bench_update_word_list(ctx):
+    _update_word_list(ctx, False)
+
+
+@benchmark("dictionary_update_word_list_difficult_only", repeat=3)
+def bench_update_word_list_difficult(ctx):
+    _update_word_list(ctx, True)
+
+
+@benchmark("dictionary_switch_language")
+def bench_switch_language(ctx):
+    # Смена языка перепривязывает только видимые строки; тексты кэшируются по языку
+    dictionary = ctx.screen("dictionary")
+    dictionary.update_language("de" if dictionary.display_language == "ru" else "ru")
+
+
+@benchmark("map_update_map")
+def bench_update_map(ctx):
+    ctx.screen("map").update_map()
+
+
+CHOICE_QUESTIONS = 1000
+
+
+def _build_distractors(ctx):
+    from distractor_index import DistractorIndex
+    ctx.distractors = DistractorIndex.load_or_build(ctx.store)
+    level = ctx.store.levels()[0]
+    ctx.choice_words = list(ctx.store.get_words(level, ctx.store.sub_levels(level)[0]))
+
+
+@benchmark("game_choice_options", setup=_build_distractors)
+def bench_choice_options(ctx):
+    # CHOICE_QUESTIONS вопросов с четырьмя вариантами из индекса похожих слов
+    from distractor_index import choice_options
+    words = ctx.choice_words
+    for i in range(CHOICE_QUESTIONS):
+        choice_options(words[i % len(words)], "ru", ctx.distractors)
+
+
+SOUND_PLAYS = 100
+
+
+def _preload_sounds(ctx):
+    # Тоны генерируются в рабочем каталоге бенчмарка и загружаются синхронно
+    ctx.app.sounds.preload(background=False)
+
+
+@benchmark("sound_cue_play", setup=_preload_sounds)
+def bench_sound_cue_play(ctx):
+    # SOUND_PLAYS сигналов подряд из пула; задержка от ввода копится в sounds.latencies_ms
+    from sound_cues import CUES
+    sounds = ctx.app.sounds
+    for i in range(SOUND_PLAYS):
+        sounds.play(CUES[i % len(CUES)], time.perf_counter())
+
+
+JOURNAL_ANSWERS = 1000
+
+
+@benchmark("session_journal_answers")
+def bench_session_journal_answers(ctx):
+    # JOURNAL_ANSWERS ответов в журнал сессии: дозапись строки, fsync по политике, периодическое сжатие
+    from session_journal import SessionJournal
+    journal = SessionJournal("bench_journal.jsonl")
+    journal.begin({"session": "bench", "level": None, "sub_level": None, "theme": None, "seed": None,
+                   "words": [["A1", "1", i] for i in range(JOURNAL_ANSWERS)], "blocks": [["A1", "1", "0" * 40]]})
+    for i in range(JOURNAL_ANSWERS):
+        journal.answer(i, "correct", i * 10, i + 1, False, 1500.0)
+    journal.finish()
+
+
+@benchmark("save_progress")
+def bench_save_progress(ctx):
+    from Word_Game import PROGRESS_FILE
+    atomic_write_json(PROGRESS_FILE, ctx.app.progress.to_dict())
+
+
+@benchmark("save_difficult_words")
+def bench_save_difficult_words(ctx):
+    from Word_Game import DIFFICULT_WORDS_FILE
+    atomic_write_json(DIFFICULT_WORDS_FILE, ctx.screen("dictionary").difficult_words or {})
+
+
+@benchmark("save_settings")
+def bench_save_settings(ctx):
+    from Word_Game import SETTINGS_FILE
+    atomic_write_json(SETTINGS_FILE, dict(ctx.app.app_settings))
+
+
+def time_call(func, ctx, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def load_thresholds(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(sizes, only=None, repeat_scale=1.0, thresholds=None, seed=0):
+    thresholds = thresholds or {}
+    results = []
+    cwd = os.getcwd()
+    from kivy.lang import Builder
+    for size in sizes:
+        print(f"Колода {size} слов: генерация...", flush=True)
+        ctx = DeckContext(size, seed)
+        try:
+            ctx.prepare_state_files()
+            # Приложение работает с файлами состояния относительно текущей папки
+            os.chdir(ctx.workdir)
+            compile_store(ctx.words_file)
+            import Word_Game  # noqa: F401  # импорт открывает words.json из рабочей папки
+            ensure_fonts()
+            if not getattr(run, "kv_loaded", False):
+                Builder.load_file(os.path.join(ROOT_DIR, "wordgame.kv"))
+                run.kv_loaded = True
+            ctx.start_app()
+            for name, repeat, func, setup in BENCHMARKS:
+                if only and name not in only:
+                    continue
+                if setup is not None:
+                    setup(ctx)
+                timings = time_call(func, ctx, max(1, round(repeat * repeat_scale)))
+                median = statistics.median(timings)
+                threshold = thresholds.get(name, {}).get(str(size))
+                passed = threshold is None or median <= threshold
+                results.append({
+                    "benchmark": name,
+                    "deck_size": size,
+                    "median_sec": median,
+                    "min_sec": min(timings),
+                    "repeat": len(timings),
+                    "threshold_sec": threshold,
+                    "passed": passed,
+                })
+                mark = "OK  " if passed else "FAIL"
+                limit = f" (порог {threshold:.4f})" if threshold is not None else ""
+                print(f"  {mark} {name:<45} {median:.6f} с{limit}", flush=True)
+        finally:
+            os.chdir(cwd)
+            ctx.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки WordMaster на синтетических колодах")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="размеры колод через запятую")
+    parser.add_argument("--only", help="запустить только перечисленные бенчмарки (через запятую)")
+    parser.add_argument("--repeat-scale", type=float, default=1.0, help="множитель числа повторов")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    results = run(sizes, only, args.repeat_scale, load_thresholds(args.thresholds), args.seed)
+    failed = [result for result in results if not result["passed"]]
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+            "failed": len(failed),
+        }, f, ensure_ascii=False, indent=4)
+
+    if failed:
+        print(f"Регрессия производительности: {len(failed)} бенчмарков превысили порог", file=sys.stderr)
+        for result in failed:
+            print(f"  {result['benchmark']} [{result['deck_size']}]: {result['median_sec']:.6f} с "
+                  f"> {result['threshold_sec']:.6f} с", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
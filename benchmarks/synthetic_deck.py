@@ -0,0 +1,101 @@
+import argparse
+import json
+import random
+
+# Генератор синтетических колод в формате words.json для бенчмарков.
+#
+#   python -m benchmarks.synthetic_deck --words 100000 --output big_words.json
+
+CEFR_LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+WORDS_PER_SUB_LEVEL = 20
+THEMES = ["животные", "семья", "еда", "город", "работа", "природа", "спорт", "дом", "транспорт", "одежда"]
+
+ALPHABETS = {
+    "en": "abcdefghijklmnopqrstuvwxyz",
+    "ru": "абвгдеёжзийклмнопрстуфхцчшщыэюя",
+    "de": "abcdefghijklmnopqrstuvwxyzäöüß",
+    "fr": "abcdefghijklmnopqrstuvwxyzéèêàçô",
+}
+
+
+def fake_word(rng, language, min_len=3, max_len=10):
+    alphabet = ALPHABETS[language]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(min_len, max_len)))
+
+
+# Определения собираются из ограниченного словаря с распределением Ципфа,
+# как в настоящих колодах, где служебные и частые слова повторяются
+VOCABULARY_SIZE = 20000
+_vocabularies = {}
+
+
+def vocabulary(language):
+    words = _vocabularies.get(language)
+    if words is None:
+        vocab_rng = random.Random(language)
+        words = _vocabularies[language] = [fake_word(vocab_rng, language, 2, 9) for _ in range(VOCABULARY_SIZE)]
+    return words
+
+
+def fake_definition(rng, language, words=6):
+    pool = vocabulary(language)
+    # Логарифмически равномерный индекс даёт частоты, близкие к закону Ципфа
+    picked = (pool[int(VOCABULARY_SIZE ** rng.random()) - 1] for _ in range(words))
+    return " ".join(picked).capitalize()
+
+
+def make_word(rng):
+    return {
+        "word": fake_word(rng, "en"),
+        "definitions": {language: fake_definition(rng, language) for language in ("en", "ru", "de", "fr")},
+        "translations": {language: fake_word(rng, language) for language in ("ru", "de", "fr")},
+    }
+
+
+def deck_layout(total_words, levels=CEFR_LEVELS, words_per_sub_level=WORDS_PER_SUB_LEVEL):
+    # Равномерно раскладываем слова по уровням и подуровням: {уровень: [размеры подуровней]}
+    layout = {}
+    per_level = total_words // len(levels)
+    extra = total_words % len(levels)
+    for i, level in enumerate(levels):
+        count = per_level + (1 if i < extra else 0)
+        sizes = [words_per_sub_level] * (count // words_per_sub_level)
+        if count % words_per_sub_level:
+            sizes.append(count % words_per_sub_level)
+        layout[level] = sizes
+    return layout
+
+
+def write_deck(path, total_words, seed=0):
+    # Пишем потоково, чтобы колода на миллион слов не собиралась целиком в памяти
+    rng = random.Random(seed)
+    layout = deck_layout(total_words)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for level_index, (level, sizes) in enumerate(layout.items()):
+            f.write(("," if level_index else "") + json.dumps(level) + ":{")
+            for sub_index, size in enumerate(sizes):
+                sub_level = {
+                    "theme": THEMES[sub_index % len(THEMES)],
+                    "words": [make_word(rng) for _ in range(size)],
+                }
+                f.write(("," if sub_index else "") + json.dumps(str(sub_index + 1)) + ":")
+                f.write(json.dumps(sub_level, ensure_ascii=False, separators=(",", ":")))
+            f.write("}")
+        f.write("}")
+    return layout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетической колоды words.json")
+    parser.add_argument("--words", type=int, default=1000, help="количество слов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic_words.json")
+    args = parser.parse_args(argv)
+    layout = write_deck(args.output, args.words, args.seed)
+    sub_levels = sum(len(sizes) for sizes in layout.values())
+    print(f"{args.output}: {args.words} слов, {sub_levels} подуровней")
+
+
+if __name__ == "__main__":
+    main()
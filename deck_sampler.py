@@ -0,0 +1,80 @@
+import random
+from bisect import bisect_right
+
+# Выбор слов для сессии без копирования и перемешивания самой колоды:
+# сэмплер возвращает только индексы, колода остаётся общей и неизменной.
+#
+#   sampler = DeckSampler(len(words), seed=42)
+#   order = sampler.take(10)                           # 10 из M, равновероятно
+#   order = sampler.take(10, weights={3: 4.0, 7: 4.0})  # сложные слова выпадают чаще
+
+
+def new_seed():
+    # Зерно сессии сохраняется вместе с ней, чтобы прохождение можно было повторить
+    return random.randrange(2 ** 32)
+
+
+def _sparse_shuffle(size, k, rng):
+    # Частичный Фишер–Йетс по виртуальному списку range(size): перестановки
+    # хранятся в словаре, поэтому память и время O(k), а не O(size)
+    swaps = {}
+    picked = []
+    for i in range(min(k, size)):
+        j = rng.randrange(i, size)
+        picked.append(swaps.get(j, j))
+        swaps[j] = swaps.get(i, i)
+    return picked
+
+
+class DeckSampler:
+    def __init__(self, size, seed=None, rng=None):
+        self.size = size
+        self.seed = new_seed() if seed is None and rng is None else seed
+        self.rng = rng or random.Random(self.seed)
+
+    def take(self, k=None, weights=None):
+        # k=None — вся колода. weights: {индекс: вес} для выделенных слов, у остальных вес 1.
+        # Выборка без возвращения, каждый шаг выбирает слово с вероятностью вес / сумма весов
+        # оставшихся; стоимость O(k log d + d log d), где d — число выделенных слов
+        k = self.size if k is None else min(k, self.size)
+        weighted = sorted(index for index, weight in (weights or {}).items()
+                          if 0 <= index < self.size and weight > 0)
+        if not weighted:
+            return _sparse_shuffle(self.size, k, self.rng)
+
+        rng = self.rng
+        # Ключи Эфраимидиса–Спиракиса: порядок по убыванию u^(1/w) — это взвешенная
+        # выборка без возвращения внутри группы выделенных слов
+        heavy = sorted(weighted, key=lambda index: rng.random() ** (1.0 / weights[index]), reverse=True)
+        heavy_left = sum(weights[index] for index in weighted)
+        light_size = self.size - len(weighted)
+        # Остальные слова равновероятны: тянем номер среди невыделенных и переводим его
+        # в индекс колоды, пропуская выделенные (бинарный поиск по отсортированному списку)
+        light_swaps = {}
+        light_taken = 0
+        heavy_taken = 0
+        order = []
+        while len(order) < k:
+            light_left = light_size - light_taken
+            if heavy_taken < len(heavy) and rng.random() * (heavy_left + light_left) < heavy_left:
+                index = heavy[heavy_taken]
+                heavy_taken += 1
+                heavy_left -= weights[index]
+                order.append(index)
+                continue
+            j = rng.randrange(light_taken, light_size)
+            position = light_swaps.get(j, j)
+            light_swaps[j] = light_swaps.get(light_taken, light_taken)
+            light_taken += 1
+            order.append(_nth_unweighted(position, weighted))
+        return order
+
+
+def _nth_unweighted(position, weighted):
+    # position-й по счёту индекс колоды, не входящий в отсортированный список weighted
+    index = position
+    while True:
+        skipped = bisect_right(weighted, index)
+        if position + skipped == index:
+            return index
+        index = position + skipped
@@ -0,0 +1,280 @@
+import os
+import random
+import tempfile
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # без numpy индекс не строится, варианты берутся из подуровня слова
+    np = None
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Индекс похожих слов для режима с вариантами ответа. Для каждого слова и языка
+# заранее выбираются NEIGHBOURS ближайших переводов: похожее написание (косинус
+# векторов хэшированных символьных 2- и 3-грамм) с бонусом за ту же тему.
+#
+# Сравнивать все пары слов слишком дорого, поэтому кандидаты берутся из нескольких
+# сортировок по SimHash-подписям векторов (слова с близкими подписями оказываются
+# рядом) и из сортировки по (тема, подпись). Всё построение векторизовано numpy;
+# результат кэшируется рядом с хранилищем и пересобирается при смене words.json.
+# Выбор вариантов для вопроса — чтение одной строки массива соседей.
+
+NGRAM_DIM = 128
+MAX_CHARS = 24
+SIGNATURE_BITS = 32
+TABLES = 4
+WINDOW = 3
+NEIGHBOURS = 8
+THEME_BONUS = 0.15
+CHOICES = 4
+CHUNK_ROWS = 16384
+CHUNK_PAIRS = 65536
+RANDOM_SEED = 20240501
+CACHE_SUFFIX = ".distractors.npz"
+
+
+def default_cache_path(store_path):
+    return os.path.splitext(store_path)[0] + CACHE_SUFFIX
+
+
+def ngram_vectors(texts):
+    # Счётчики хэшированных 2- и 3-грамм, N x NGRAM_DIM (uint8). Слово обрамлено пробелами,
+    # чтобы начало и конец слова давали свои n-граммы
+    framed = np.array([" " + text.lower()[:MAX_CHARS - 2] + " " for text in texts], dtype=f"U{MAX_CHARS}")
+    codes = framed.view(np.uint32).reshape(len(texts), MAX_CHARS).astype(np.uint64)
+    vectors = np.zeros((len(texts), NGRAM_DIM), np.uint8)
+    shift = np.uint64(64 - int(np.log2(NGRAM_DIM)))
+    for start in range(0, len(texts), CHUNK_ROWS):
+        chunk = codes[start:start + CHUNK_ROWS]
+        cells = []
+        for n in (2, 3):
+            width = MAX_CHARS - n + 1
+            hashed = np.full((len(chunk), width), n, np.uint64)
+            present = np.ones((len(chunk), width), bool)
+            for offset in range(n):
+                hashed = hashed * np.uint64(1000003) + chunk[:, offset:offset + width]
+                present &= chunk[:, offset:offset + width] > 0
+            buckets = (hashed * np.uint64(0x9E3779B97F4A7C15)) >> shift
+            rows = np.broadcast_to(np.arange(len(chunk), dtype=np.uint64)[:, None], buckets.shape)
+            cells.append((rows * np.uint64(NGRAM_DIM) + buckets)[present])
+        counts = np.bincount(np.concatenate(cells).astype(np.int64), minlength=len(chunk) * NGRAM_DIM)
+        vectors[start:start + len(chunk)] = np.minimum(counts, 255).reshape(len(chunk), NGRAM_DIM)
+    return vectors
+
+
+def signatures(vectors, rng):
+    # SimHash: знаки проекций на случайные гиперплоскости, по одной 32-битной подписи на таблицу
+    planes = rng.standard_normal((NGRAM_DIM, TABLES * SIGNATURE_BITS)).astype(np.float32)
+    weights = (np.uint64(1) << np.arange(SIGNATURE_BITS, dtype=np.uint64))
+    result = np.zeros((len(vectors), TABLES), np.uint64)
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        bits = (vectors[start:start + CHUNK_ROWS].astype(np.float32) @ planes) > 0
+        bits = bits.reshape(len(bits), TABLES, SIGNATURE_BITS).astype(np.uint64)
+        result[start:start + len(bits)] = (bits * weights).sum(axis=2)
+    return result
+
+
+def window_pairs(order):
+    # Пары соседей в пределах WINDOW позиций отсортированного порядка, в обе стороны
+    left = []
+    right = []
+    for step in range(1, WINDOW + 1):
+        left.extend((order[:-step], order[step:]))
+        right.extend((order[step:], order[:-step]))
+    return np.concatenate(left), np.concatenate(right)
+
+
+def nearest_neighbours(texts, themes, rng):
+    # texts — переводы на одном языке в сквозном порядке слов, themes — номер темы каждого слова.
+    # Возвращает N x NEIGHBOURS индексов слов (-1 — соседей не хватило)
+    count = len(texts)
+    neighbours = np.full((count, NEIGHBOURS), -1, np.int32)
+    if count < 2:
+        return neighbours
+    vectors = ngram_vectors(texts)
+    norms = np.sqrt((vectors.astype(np.float32) ** 2).sum(axis=1))
+    sigs = signatures(vectors, rng)
+    known = {}
+    text_ids = np.fromiter((known.setdefault(text.lower(), len(known)) for text in texts), np.int64, count)
+
+    orders = [np.argsort(sigs[:, table], kind="stable") for table in range(TABLES)]
+    orders.append(np.lexsort((sigs[:, 0], themes)))
+    pairs = [window_pairs(order) for order in orders]
+    left = np.concatenate([pair[0] for pair in pairs]).astype(np.int64)
+    right = np.concatenate([pair[1] for pair in pairs]).astype(np.int64)
+    # Пустые переводы и совпадающие по тексту слова вариантами быть не могут
+    keep = (text_ids[left] != text_ids[right]) & (norms[left] > 0) & (norms[right] > 0)
+    keys = np.sort(left[keep] * count + right[keep])
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    left, right = keys // count, keys % count
+
+    scores = np.empty(len(left), np.float32)
+    for start in range(0, len(left), CHUNK_PAIRS):
+        a = left[start:start + CHUNK_PAIRS]
+        b = right[start:start + CHUNK_PAIRS]
+        dots = np.einsum("ij,ij->i", vectors[a], vectors[b], dtype=np.float32, casting="unsafe")
+        scores[start:start + len(a)] = dots / (norms[a] * norms[b]) + THEME_BONUS * (themes[a] == themes[b])
+
+    # Порядок: по слову, внутри — по убыванию сходства. Одна сортировка по составному
+    # целому ключу заметно быстрее lexsort на миллионах пар
+    quantized = np.round((1.0 - scores / (1.0 + THEME_BONUS)) * 65535).clip(0, 65535).astype(np.int64)
+    order = np.argsort(left * 65536 + quantized, kind="stable")
+    left, right = left[order], right[order]
+    # У слова не должно быть двух вариантов с одинаковым текстом: остаётся лучший из них
+    groups = left * (int(text_ids.max()) + 1) + text_ids[right]
+    by_group = np.argsort(groups, kind="stable")
+    duplicate = np.zeros(len(left), bool)
+    duplicate[by_group[1:]] = groups[by_group[1:]] == groups[by_group[:-1]]
+    left, right = left[~duplicate], right[~duplicate]
+    rank = np.arange(len(left)) - np.searchsorted(left, left, side="left")
+    top = rank < NEIGHBOURS
+    neighbours[left[top], rank[top]] = right[top]
+    return neighbours
+
+
+def pack_texts(texts):
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), np.uint8), offsets
+
+
+class DistractorIndex:
+    def __init__(self, source_hash, blocks, languages):
+        self.source_hash = source_hash
+        # (уровень, подуровень) -> сквозной номер первого слова блока
+        self.block_starts = {}
+        start = 0
+        for level, sub_level, count in blocks:
+            self.block_starts[(level, str(sub_level))] = start
+            start += count
+        self.size = start
+        # язык -> (соседи N x NEIGHBOURS, байты переводов, смещения)
+        self.languages = languages
+
+    @classmethod
+    def build(cls, store):
+        blocks = [(block["level"], block["sub_level"], block["count"]) for block in store.header.get("blocks", [])]
+        theme_names = {}
+        themes = []
+        columns = {}
+        total = 0
+        with span("distractors.decode", "io"):
+            for block, (level, sub_level, count) in zip(store.header.get("blocks", []), blocks):
+                words = store.read_block(level, sub_level)
+                theme = theme_names.setdefault(block.get("theme", ""), len(theme_names))
+                themes.extend([theme] * count)
+                for language in words.translations:
+                    columns.setdefault(language, [""] * total)
+                for language, column in columns.items():
+                    values = words.translations.get(language) or [None] * count
+                    column.extend(value or "" for value in values)
+                total += count
+        themes = np.array(themes, np.int64)
+        languages = {}
+        with span("distractors.build", "app", words=total):
+            for language, texts in columns.items():
+                rng = np.random.default_rng(RANDOM_SEED)
+                languages[language] = (nearest_neighbours(texts, themes, rng),) + pack_texts(texts)
+        return cls(store.header.get("source_hash"), blocks, languages)
+
+    def save(self, path):
+        arrays = {"source_hash": np.array(self.source_hash or "")}
+        for language, (neighbours, blob, offsets) in self.languages.items():
+            arrays[f"{language}_neighbours"] = neighbours
+            arrays[f"{language}_texts"] = blob
+            arrays[f"{language}_offsets"] = offsets
+        # Свой временный файл на каждую запись: после горячей перезагрузки индекс
+        # прежней и новой версии может сохраняться одновременно
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp.npz",
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path, store):
+        # None, если кэш построен для другой версии words.json
+        with np.load(path) as cached:
+            if str(cached["source_hash"]) != store.header.get("source_hash"):
+                return None
+            languages = {}
+            for name in cached.files:
+                if name.endswith("_neighbours"):
+                    language = name[:-len("_neighbours")]
+                    languages[language] = (cached[name], cached[f"{language}_texts"], cached[f"{language}_offsets"])
+        blocks = [(block["level"], block["sub_level"], block["count"]) for block in store.header.get("blocks", [])]
+        index = cls(store.header.get("source_hash"), blocks, languages)
+        if any(len(item[0]) != index.size for item in languages.values()):
+            return None
+        return index
+
+    @classmethod
+    def load_or_build(cls, store, path=None):
+        # Кэш лежит рядом с основным хранилищем (base_path), общий для всех его версий
+        if np is None or (path is None and store.base_path is None):
+            return None
+        path = path or default_cache_path(store.base_path)
+        try:
+            index = cls.load(path, store)
+            if index is not None:
+                return index
+        except (OSError, KeyError, ValueError):
+            pass
+        index = cls.build(store)
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"Индекс вариантов не сохранён: {e}")
+        logger.info("Индекс вариантов ответа построен: %d слов", index.size)
+        return index
+
+    def text(self, language, number):
+        _, blob, offsets = self.languages[language]
+        return blob[offsets[number]:offsets[number + 1]].tobytes().decode("utf-8")
+
+    def distractors(self, word_data, language, count=CHOICES - 1, rng=random):
+        # Неправильные варианты для слова хранилища (WordView); случайные из лучших 2 * count соседей
+        entry = self.languages.get(language)
+        block = getattr(word_data, "block", None)
+        if entry is None or block is None:
+            return []
+        start = self.block_starts.get((block.level, block.sub_level))
+        if start is None:
+            return []
+        row = entry[0][start + word_data.index]
+        candidates = [int(number) for number in row[:count * 2] if number >= 0]
+        if len(candidates) > count:
+            candidates = rng.sample(candidates, count)
+        return [self.text(language, number) for number in candidates]
+
+
+def choice_options(word_data, language, index=None, count=CHOICES, rng=random):
+    # Правильный перевод и count - 1 похожих неправильных в случайном порядке.
+    # Без индекса (ещё строится или нет numpy) — случайные слова того же подуровня
+    correct = word_data["translations"][language]
+    options = index.distractors(word_data, language, count - 1, rng) if index is not None else []
+    seen = {correct.lower()} | {option.lower() for option in options}
+    block = getattr(word_data, "block", None)
+    if len(options) < count - 1 and block is not None:
+        column = block.translations.get(language, [])
+        for number in rng.sample(range(len(column)), len(column)):
+            value = column[number]
+            if value and value.lower() not in seen:
+                options.append(value)
+                seen.add(value.lower())
+                if len(options) >= count - 1:
+                    break
+    options.append(correct)
+    rng.shuffle(options)
+    return options
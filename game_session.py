@@ -0,0 +1,164 @@
+import random
+
+from answer_matcher import prepare_deck, prepare_word, match_answer, MATCH_EXACT, MATCH_CLOSE
+
+# Правила подсчёта очков
+CORRECT_POINTS = 10
+CLOSE_POINTS = 5  # Ответ с опечаткой или без диакритики
+WRONG_PENALTY = 5
+HINT_PENALTY = 5
+TIMEOUT_PENALTY = 5
+
+# (звёзды, минимальная доля правильных ответов и набранных очков от максимума)
+STAR_THRESHOLDS = ((3, 0.9), (2, 0.7), (1, 0.5))
+
+# Слов в сессии подуровня; None — весь подуровень. Общая для игры и simulate_sessions.py
+SESSION_SIZE = None
+
+# Результаты ответа
+CORRECT = "correct"
+CLOSE = "close"
+WRONG = "wrong"
+TIMEOUT = "timeout"
+
+
+def calculate_stars(correct_answers, total_words, score, thresholds=STAR_THRESHOLDS):
+    if total_words == 0:
+        return 0
+    percentage = (correct_answers / total_words) * 100
+    max_score = total_words * CORRECT_POINTS
+    for stars, ratio in thresholds:
+        if percentage >= ratio * 100 and score >= max_score * ratio:
+            return stars
+    return 0
+
+
+class GameSession:
+    # Состояние одного прохождения подуровня без привязки к Kivy:
+    # порядок слов, очки, подсказки и таймауты
+    def __init__(self, words, rng=None, shuffle=True, thresholds=STAR_THRESHOLDS, word_ids=None, prepared=None,
+                 order=None, seed=None):
+        # Перемешиваем индексы, а не сам список: он может быть общим кэшем базы слов.
+        # order — готовая выборка индексов (DeckSampler), тогда играются только они
+        self.words = words
+        self.word_ids = word_ids
+        self.seed = seed
+        if order is None:
+            order = list(range(len(words)))
+            if shuffle:
+                (rng or random).shuffle(order)
+        self.order = order
+        # Нормализованные формы ответов считаются один раз при загрузке колоды;
+        # для выборки — только для попавших в неё слов
+        if prepared is None:
+            prepared = prepare_deck(words) if len(order) == len(words) else \
+                {index: prepare_word(words[index]) for index in order}
+        self.prepared = prepared
+        self.thresholds = thresholds
+        self.current_word_index = 0
+        self.correct_answers = 0
+        self.score = 0
+        self.hint_used = False
+        self.answered = False
+        # Время ответа на каждое слово в миллисекундах (для бонусов за скорость и аналитики)
+        self.latencies_ms = []
+
+    @property
+    def total_words(self):
+        return len(self.order)
+
+    @property
+    def is_finished(self):
+        return self.current_word_index >= len(self.order)
+
+    @property
+    def current_word(self):
+        return self.words[self.order[self.current_word_index]]
+
+    @property
+    def current_word_id(self):
+        if self.word_ids is None:
+            return None
+        return self.word_ids[self.order[self.current_word_index]]
+
+    def correct_answer(self, target_lang):
+        return self.current_word["translations"][target_lang]
+
+    def _penalize(self, points):
+        self.score -= points
+        if self.score < 0:
+            self.score = 0
+
+    def use_hint(self, target_lang):
+        # Возвращает первую букву ответа или None, если подсказка недоступна
+        if self.hint_used or self.answered or self.is_finished:
+            return None
+        self.hint_used = True
+        self._penalize(HINT_PENALTY)
+        return self.correct_answer(target_lang).lower()[0]
+
+    def _record_latency(self, latency_ms):
+        if latency_ms is not None:
+            self.latencies_ms.append(latency_ms)
+
+    def can_answer(self):
+        # На каждое слово засчитывается ровно один ответ (или таймаут)
+        return not self.answered and not self.is_finished
+
+    def answer(self, user_answer, target_lang, latency_ms=None):
+        # None — слово уже отвечено, повторный ответ не засчитывается
+        if not self.can_answer():
+            return None
+        prepared = self.prepared[self.order[self.current_word_index]][target_lang]
+        self.answered = True
+        self._record_latency(latency_ms)
+        match = match_answer(prepared, user_answer, target_lang)
+        if match == MATCH_EXACT:
+            self.correct_answers += 1
+            self.score += CORRECT_POINTS
+            return CORRECT
+        if match == MATCH_CLOSE:
+            self.correct_answers += 1
+            self.score += CLOSE_POINTS
+            return CLOSE
+        self._penalize(WRONG_PENALTY)
+        return WRONG
+
+    def answer_choice(self, option, target_lang, latency_ms=None):
+        # Режим с вариантами ответа: засчитывается только выбор правильного варианта
+        if not self.can_answer():
+            return None
+        self.answered = True
+        self._record_latency(latency_ms)
+        if option == self.correct_answer(target_lang):
+            self.correct_answers += 1
+            self.score += CORRECT_POINTS
+            return CORRECT
+        self._penalize(WRONG_PENALTY)
+        return WRONG
+
+    def timeout(self, latency_ms=None):
+        if not self.can_answer():
+            return None
+        self.answered = True
+        self._record_latency(latency_ms)
+        self._penalize(TIMEOUT_PENALTY)
+        return TIMEOUT
+
+    def restore(self, current_word_index, score, correct_answers, hint_used=False, latencies_ms=()):
+        # Продолжение прерванной сессии (журнал сессии): порядок слов задан при создании
+        self.current_word_index = current_word_index
+        self.score = score
+        self.correct_answers = correct_answers
+        self.hint_used = hint_used
+        self.answered = False
+        self.latencies_ms = list(latencies_ms)
+
+    def next_word(self):
+        self.current_word_index += 1
+        self.hint_used = False
+        self.answered = False
+        return not self.is_finished
+
+    def calculate_stars(self):
+        return calculate_stars(self.correct_answers, len(self.order), self.score, self.thresholds)
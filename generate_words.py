@@ -0,0 +1,416 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Сборка пакета слов words.json из больших исходников (CSV, TSV, JSONL или words.json):
+# проверка полей, удаление дублей и раскладка по уровням CEFR, подуровням и темам.
+#
+#   python generate_words.py source.tsv extra.jsonl --output words.json
+#
+# Колонки CSV/TSV (первая строка — заголовок): level, sub_level (необязательно), theme, word,
+# definition_en, definition_ru, definition_de, definition_fr, translation_ru, translation_de,
+# translation_fr. Поля в кавычках могут содержать переводы строк. В JSONL одна запись — одна строка,
+# допустимы те же плоские ключи или вложенные словари "definitions" и "translations", как в words.json.
+#
+# Исходник режется на пачки по содержимому записей (граница — запись, хэш которой делится на
+# BATCH_DIVISOR), поэтому правка одной записи меняет только её пачку. Записи CSV/TSV читаются
+# csv.reader, так что многострочное поле никогда не разрезается между пачками. Проверенные пачки
+# кэшируются по хэшу, при пересборке заново разбираются только изменившиеся.
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+# Языки, по которым GameScreen и DictionaryScreen обращаются к слову
+DEFINITION_LANGS = ("en", "ru", "de", "fr")
+TRANSLATION_LANGS = ("ru", "de", "fr")
+WORDS_PER_SUB_LEVEL = 20
+
+CACHE_DIR = ".build_cache"
+MANIFEST_FILE = "manifest.json"
+# Меняется вместе с правилами проверки, чтобы старый кэш не использовался
+BUILD_VERSION = 3
+BATCH_DIVISOR = 512
+MAX_BATCH_RECORDS = 4096
+IN_FLIGHT_PER_WORKER = 4
+
+
+class BuildError(Exception):
+    pass
+
+
+def source_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".tsv", ".jsonl", ".json"):
+        return extension[1:]
+    raise BuildError(f"Неизвестный формат исходника: {path}")
+
+
+def legacy_lines(path):
+    # words.json старого формата превращается в плоские строки JSONL
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for level, sub_levels in data.items():
+        for sub_level, block in sub_levels.items():
+            for word_data in block.get("words", []):
+                record = dict(word_data, level=level, sub_level=sub_level, theme=block.get("theme", ""))
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def read_records(path):
+    # -> (формат, заголовок, итератор (номер первой строки записи в файле, запись));
+    # запись CSV/TSV — список полей, JSONL — строка
+    fmt = source_format(path)
+    if fmt == "json":
+        return "jsonl", None, enumerate(legacy_lines(path), 1)
+    if fmt == "jsonl":
+        return fmt, None, _jsonl_records(path)
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    # strict: незакрытая кавычка — ошибка, а не поле до конца файла
+    reader = csv.reader(f, delimiter="\t" if fmt == "tsv" else ",", strict=True)
+    try:
+        header = next(reader, None)
+    except csv.Error as e:
+        f.close()
+        raise BuildError(f"{path}:{reader.line_num}: ошибка разбора заголовка: {e}")
+    return fmt, header, _csv_records(path, f, reader)
+
+
+def _jsonl_records(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from enumerate(f, 1)
+
+
+def _csv_records(path, f, reader):
+    with f:
+        while True:
+            line = reader.line_num + 1
+            try:
+                fields = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                raise BuildError(f"{path}:{reader.line_num}: ошибка разбора CSV: {e}")
+            yield line, fields
+
+
+def record_text(record):
+    # Поля CSV склеиваются через разделитель записей ASCII (\x1f): в тексте слов его нет
+    return record if isinstance(record, str) else "\x1f".join(record)
+
+
+def read_batches(path):
+    # -> (формат, заголовок, записи пачки, номера первых строк записей в файле)
+    fmt, header, records = read_records(path)
+    batch = []
+    lines = []
+    for line, record in records:
+        batch.append(record)
+        lines.append(line)
+        if len(batch) >= MAX_BATCH_RECORDS or zlib.crc32(record_text(record).encode("utf-8")) % BATCH_DIVISOR == 0:
+            yield fmt, header, batch, lines
+            batch = []
+            lines = []
+    if batch:
+        yield fmt, header, batch, lines
+
+
+def batch_hash(fmt, header, records):
+    header_text = "" if header is None else record_text(header)
+    digest = hashlib.sha1(f"{BUILD_VERSION}\0{fmt}\0{header_text}\0".encode("utf-8"))
+    digest.update("\n".join(map(record_text, records)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_rows(fmt, header, records):
+    if fmt == "jsonl":
+        # Строки разбираются по одной в validate_batch: битая строка — ошибка только этой записи
+        for line in records:
+            yield line if line.strip() else None
+        return
+    # Как csv.DictReader: недостающие поля — None, лишние — списком под ключом None
+    for fields in records:
+        if not fields:
+            yield None
+            continue
+        row = dict(zip(header, fields))
+        for name in header[len(fields):]:
+            row[name] = None
+        if len(fields) > len(header):
+            row[None] = fields[len(header):]
+        yield row
+
+
+def normalize_row(row):
+    # Плоская строка или вложенная запись ->
+    # (level, sub_level, theme, ключ дубля, русский перевод, слово, готовый JSON слова);
+    # JSON собирается здесь, в пуле, и кэшируется вместе с пачкой
+    if not isinstance(row, dict):
+        raise ValueError("запись должна быть объектом")
+    definitions = row.get("definitions") or {lang: row.get(f"definition_{lang}") for lang in DEFINITION_LANGS}
+    translations = row.get("translations") or {lang: row.get(f"translation_{lang}") for lang in TRANSLATION_LANGS}
+    for field, value in (("definitions", definitions), ("translations", translations)):
+        if not isinstance(value, dict):
+            raise ValueError(f"поле {field} должно быть объектом")
+    level = str(row.get("level") or "").strip().upper()
+    if level not in CEFR_LEVELS:
+        raise ValueError(f"неизвестный уровень {level!r}")
+    word = " ".join(str(row.get("word") or "").split())
+    if not word:
+        raise ValueError("нет слова")
+    theme = " ".join(str(row.get("theme") or "").split())
+    sub_level = str(row.get("sub_level") or "").strip()
+    if sub_level and not sub_level.isdigit():
+        raise ValueError(f"подуровень должен быть числом: {sub_level!r}")
+    missing = [f"definition_{lang}" for lang in DEFINITION_LANGS if not str(definitions.get(lang) or "").strip()]
+    missing += [f"translation_{lang}" for lang in TRANSLATION_LANGS if not str(translations.get(lang) or "").strip()]
+    if missing:
+        raise ValueError("нет полей " + ", ".join(missing))
+    word_data = {
+        "word": word,
+        "definitions": {lang: " ".join(str(definitions[lang]).split()) for lang in DEFINITION_LANGS},
+        "translations": {lang: " ".join(str(translations[lang]).split()) for lang in TRANSLATION_LANGS},
+    }
+    duplicate_key = f"{word.casefold()}\0{word_data['definitions']['en'].casefold()}"
+    return (level, sub_level, theme, duplicate_key, word_data["translations"]["ru"].casefold(), word,
+            json.dumps(word_data, ensure_ascii=False))
+
+
+def validate_batch(fmt, header, batch):
+    # Выполняется в пуле процессов; в ошибках — номер записи внутри пачки
+    records = []
+    errors = []
+    try:
+        rows = list(parse_rows(fmt, header, batch))
+    except (ValueError, csv.Error) as e:
+        return records, [(0, f"ошибка разбора пачки: {e}")]
+    for offset, row in enumerate(rows):
+        if row is None:
+            continue
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            records.append(normalize_row(row))
+        except (ValueError, TypeError) as e:
+            errors.append((offset, str(e)))
+    return records, errors
+
+
+class BatchCache:
+    def __init__(self, directory):
+        self.directory = os.path.join(directory, "batches")
+        os.makedirs(self.directory, exist_ok=True)
+        self.used = set()
+        self.hits = 0
+
+    # Кэш локальный и пишется только этой программой, поэтому pickle: он в разы быстрее JSON
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, key):
+        self.used.add(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                records, errors = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return None
+        self.hits += 1
+        return records, errors
+
+    def put(self, key, result):
+        write_atomic(self._path(key), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def prune(self):
+        # Пачки, которых больше нет в исходниках, удаляются, чтобы кэш не рос бесконечно
+        for name in os.listdir(self.directory):
+            stem, extension = os.path.splitext(name)
+            if extension == ".pickle" and stem not in self.used:
+                os.remove(os.path.join(self.directory, name))
+
+
+def write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode("utf-8") if isinstance(content, str) else content)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def validated_batches(sources, cache, workers):
+    # Пачки проверяются в пуле, но результаты отдаются в порядке исходника:
+    # от порядка зависят удаление дублей и раскладка по подуровням
+    pending = deque()
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in sources:
+            for fmt, header, batch, lines in read_batches(path):
+                key = batch_hash(fmt, header, batch)
+                cached = cache.get(key)
+                future = None if cached is not None else pool.submit(validate_batch, fmt, header, batch)
+                pending.append((path, lines, key, cached, future))
+                while len(pending) > max_in_flight:
+                    yield _finish(pending.popleft(), cache)
+        while pending:
+            yield _finish(pending.popleft(), cache)
+
+
+def _finish(entry, cache):
+    path, lines, key, cached, future = entry
+    if cached is None:
+        cached = future.result()
+        cache.put(key, cached)
+    records, errors = cached
+    return path, lines, records, errors
+
+
+def bucket_words(batches, words_per_sub_level=WORDS_PER_SUB_LEVEL):
+    # Дубли (то же слово с тем же английским определением, без учёта регистра) отбрасываются,
+    # первое вхождение остаётся; омонимы с разными определениями сохраняются.
+    # Слова с явным подуровнем идут в него, остальные — по темам в порядке появления,
+    # по words_per_sub_level слов в подуровне после явно заданных
+    seen = set()
+    explicit = {level: {} for level in CEFR_LEVELS}
+    by_theme = {level: {} for level in CEFR_LEVELS}
+    stats = {"words": 0, "duplicates": 0, "errors": [], "collisions": []}
+    for path, lines, records, errors in batches:
+        # Номер записи в пачке -> номер её первой строки в файле
+        stats["errors"].extend((path, lines[offset], message) for offset, message in errors)
+        for level, sub_level, theme, duplicate_key, translation, word, word_json in records:
+            if duplicate_key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(duplicate_key)
+            word_data = (translation, word, word_json)
+            stats["words"] += 1
+            if sub_level:
+                block = explicit[level].setdefault(int(sub_level), {"theme": theme, "words": []})
+                block["words"].append(word_data)
+            else:
+                by_theme[level].setdefault(theme, []).append(word_data)
+
+    pack = {}
+    for level in CEFR_LEVELS:
+        blocks = dict(explicit[level])
+        next_sub_level = max(blocks, default=0) + 1
+        for theme, words in by_theme[level].items():
+            for i in range(0, len(words), words_per_sub_level):
+                blocks[next_sub_level] = {"theme": theme, "words": words[i:i + words_per_sub_level]}
+                next_sub_level += 1
+        if blocks:
+            pack[level] = {str(sub_level): drop_translation_collisions(f"{level}/{sub_level}", blocks[sub_level], stats)
+                           for sub_level in sorted(blocks)}
+    return pack, stats
+
+
+def drop_translation_collisions(block_key, block, stats):
+    # Ключ слова в приложении — уровень, подуровень и русский перевод, он должен быть уникален
+    seen = {}
+    words = []
+    for translation, word, word_json in block["words"]:
+        if translation in seen:
+            stats["collisions"].append((block_key, word, seen[translation], translation))
+            continue
+        seen[translation] = word
+        words.append(word_json)
+    block["words"] = words
+    return block
+
+
+def block_text(block, indent):
+    # Раскладка как в words.json: одно слово на строку, удобно смотреть в диффах
+    pad = " " * indent
+    words = (",\n" + pad + "        ").join(block["words"])
+    return (f"{{\n{pad}    \"theme\": {json.dumps(block['theme'], ensure_ascii=False)},\n"
+            f"{pad}    \"words\": [\n{pad}        {words}\n{pad}    ]\n{pad}}}")
+
+
+def write_pack(pack, output, previous_hashes):
+    # Возвращает хэши подуровней; файл переписывается только если что-то изменилось
+    hashes = {}
+    parts = []
+    for level, sub_levels in pack.items():
+        level_parts = []
+        for sub_level, block in sub_levels.items():
+            text = block_text(block, 8)
+            hashes[f"{level}/{sub_level}"] = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            level_parts.append(f"        {json.dumps(sub_level)}: {text}")
+        parts.append(f"    {json.dumps(level)}: {{\n" + ",\n".join(level_parts) + "\n    }")
+    if hashes != previous_hashes or not os.path.exists(output):
+        write_atomic(output, "{\n" + ",\n".join(parts) + "\n}\n")
+    return hashes
+
+
+def load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build(sources, output, cache_dir=CACHE_DIR, workers=None, words_per_sub_level=WORDS_PER_SUB_LEVEL):
+    os.makedirs(cache_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    cache = BatchCache(cache_dir)
+    manifest = load_manifest(cache_dir)
+    previous_hashes = manifest.get("outputs", {}).get(os.path.abspath(output), {})
+
+    pack, stats = bucket_words(validated_batches(sources, cache, workers), words_per_sub_level)
+    hashes = write_pack(pack, output, previous_hashes)
+    cache.prune()
+
+    manifest.setdefault("outputs", {})[os.path.abspath(output)] = hashes
+    write_atomic(os.path.join(cache_dir, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=4))
+    stats["cached_batches"] = cache.hits
+    stats["batches"] = len(cache.used)
+    stats["changed"] = sorted(key for key, digest in hashes.items() if previous_hashes.get(key) != digest)
+    stats["removed"] = sorted(key for key in previous_hashes if key not in hashes)
+    stats["sub_levels"] = len(hashes)
+    stats["words"] -= len(stats["collisions"])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сборка пакета слов WordMaster")
+    parser.add_argument("sources", nargs="+", help="исходники .csv, .tsv, .jsonl или words.json")
+    parser.add_argument("--output", default="words.json")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--words-per-sub-level", type=int, default=WORDS_PER_SUB_LEVEL)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-errors", type=int, default=20, help="сколько ошибок показать")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        stats = build(args.sources, args.output, args.cache_dir, args.workers, args.words_per_sub_level)
+    except (BuildError, OSError) as e:
+        parser.exit(1, f"Ошибка сборки: {e}\n")
+    elapsed = time.perf_counter() - started
+
+    for path, line, message in stats["errors"][:args.max_errors]:
+        print(f"{path}:{line}: {message}")
+    if len(stats["errors"]) > args.max_errors:
+        print(f"... и ещё {len(stats['errors']) - args.max_errors} ошибок")
+    for block_key, word, kept, translation in stats["collisions"][:args.max_errors]:
+        print(f"{block_key}: слово {word!r} пропущено, перевод {translation!r} уже у {kept!r}")
+    print(f"{args.output}: {stats['words']} слов, {stats['sub_levels']} подуровней, "
+          f"дублей {stats['duplicates']}, совпадений перевода {len(stats['collisions'])}, "
+          f"ошибок {len(stats['errors'])} | "
+          f"пачек {stats['batches']} (из кэша {stats['cached_batches']}) | "
+          f"изменено подуровней {len(stats['changed'])}, удалено {len(stats['removed'])} | {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Уровень логирования: переменная окружения важнее settings.json
+LOG_LEVEL_ENV = "WORDGAME_LOG_LEVEL"
+SETTINGS_KEY = "log_level"
+DEFAULT_LOG_LEVEL = "INFO"
+
+LOG_FILE = "wordgame.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+_queue_handler = None
+_original_handlers = []
+
+
+def level_number(name):
+    # Числовой уровень по имени ("debug", "WARNING"); None для пустого или неизвестного имени
+    if not name:
+        return None
+    level = logging.getLevelName(str(name).strip().upper())
+    return level if isinstance(level, int) else None
+
+
+def resolve_level(settings_path=None):
+    # Порядок: переменная окружения, settings.json, DEFAULT_LOG_LEVEL;
+    # неизвестное имя уровня пропускается, как если бы его не было
+    level = level_number(os.environ.get(LOG_LEVEL_ENV))
+    if level is None and settings_path:
+        try:
+            with open(settings_path, "r", encoding="utf-8") as f:
+                level = level_number(json.load(f).get(SETTINGS_KEY))
+        except (OSError, ValueError, AttributeError):
+            level = None
+    return level if level is not None else level_number(DEFAULT_LOG_LEVEL)
+
+
+def configure_logging(level=None, log_file=LOG_FILE):
+    # На UI-потоке запись лога — только постановка в очередь; форматирование вывода
+    # и запись в файлы с ротацией по размеру идут в фоновом потоке QueueListener.
+    # Уже установленные обработчики корневого логгера (консоль и файл Kivy)
+    # переезжают за очередь вместе с нашим файлом.
+    global _listener, _queue_handler, _original_handlers
+    root = logging.getLogger()
+    root.setLevel(level if level is not None else resolve_level())
+    if _listener is not None:
+        return _listener
+    handlers = list(root.handlers)
+    if log_file:
+        try:
+            file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                               encoding="utf-8", delay=True)
+            file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            handlers.append(file_handler)
+        except OSError as e:
+            logging.getLogger(__name__).warning("Файл лога недоступен: %s", e)
+    records = queue.SimpleQueue()
+    _original_handlers = list(root.handlers)
+    for handler in _original_handlers:
+        root.removeHandler(handler)
+    _queue_handler = QueueHandler(records)
+    root.addHandler(_queue_handler)
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    # Дописывает очередь, останавливает фоновый поток и возвращает прежние обработчики,
+    # чтобы сообщения при завершении не терялись; повторный вызов ничего не делает
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _original_handlers:
+        root.addHandler(handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        if handler not in _original_handlers:
+            handler.close()
+    _listener = None
+    _queue_handler = None
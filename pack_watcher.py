@@ -0,0 +1,126 @@
+import glob
+import hashlib
+import os
+import threading
+import logging
+
+from tracing import span
+from word_store import WordStore, WordStoreError, STORE_SUFFIX, build_store, compile_store, default_store_path
+
+logger = logging.getLogger(__name__)
+
+# Горячая перезагрузка words.json: фоновый поток раз в DEFAULT_INTERVAL секунд
+# сверяет mtime и размер файла, при изменении — хэш содержимого. Новое хранилище
+# компилируется и открывается в фоне; готовое хранилище передаётся в
+# on_reload(store, changed), а подмену живого хранилища (и перенос кэша через
+# adopt_cache) делает вызывающий код на UI-потоке. Кэш живого хранилища
+# принадлежит UI-потоку, наблюдатель его не читает.
+#
+# Каждая версия компилируется в свой файл words.reload-<pid>-<n>.store рядом
+# с основным хранилищем: открытый файл отображён в память, перезаписывать его
+# нельзя (на Windows os.replace поверх него и не пройдёт). Файл версии удаляется
+# при закрытии её хранилища, то есть когда её сменит следующая. Если писать
+# некуда, версия собирается в памяти. Производные кэши версий (индекс вариантов)
+# пишутся рядом с основным хранилищем (store.base_path), а не рядом с версией.
+DEFAULT_INTERVAL = 2.0
+RELOAD_INFIX = ".reload-"
+
+
+class PackWatcher:
+    def __init__(self, source_path, store, on_reload, store_path=None, interval=DEFAULT_INTERVAL):
+        self.source_path = source_path
+        self.store_path = store_path or store.store_path or default_store_path(source_path)
+        self.on_reload = on_reload
+        self.interval = interval
+        # Хранилище, с которым сравниваем следующую версию (последнее отданное в on_reload)
+        self.store = store
+        self.reloads = 0
+        self._version = 0
+        self._stat = self._read_stat()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def version_path(self, version):
+        return f"{os.path.splitext(self.store_path)[0]}{RELOAD_INFIX}{os.getpid()}-{version}{STORE_SUFFIX}"
+
+    def remove_stale_versions(self):
+        # Версии, оставшиеся после аварийного завершения прошлых запусков
+        # и их временные файлы
+        pattern = glob.escape(os.path.splitext(self.store_path)[0] + RELOAD_INFIX) + "*"
+        for path in glob.glob(pattern):
+            if path != self.store.store_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def start(self):
+        if self._thread is None:
+            self.remove_stale_versions()
+            self._thread = threading.Thread(target=self._run, name="pack-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Ошибка проверки {self.source_path}: {e}")
+
+    def _read_stat(self):
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        # Одна проверка; возвращает множество изменённых подуровней или None
+        stat = self._read_stat()
+        if stat is None or stat == self._stat:
+            return None
+        self._stat = stat
+        with open(self.source_path, "rb") as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+        if source_hash == self.store.header.get("source_hash"):
+            # Файл перезаписан без изменений (например, touch)
+            return None
+
+        with span("pack.reload", "io", path=self.source_path):
+            try:
+                store = self.load_version()
+            except (WordStoreError, OSError) as e:
+                # Недописанный или битый файл: оставляем старое хранилище, ждём следующей версии
+                logger.error(f"Новая версия {self.source_path} не загружена: {e}")
+                return None
+            changed = store.changed_blocks(self.store)
+
+        logger.info("База слов обновлена: изменено подуровней: %d", len(changed))
+        self.store = store
+        self.reloads += 1
+        self.on_reload(store, changed)
+        return changed
+
+    def load_version(self):
+        self._version += 1
+        path = self.version_path(self._version)
+        try:
+            compile_store(self.source_path, path)
+        except OSError as e:
+            logger.warning(f"Хранилище {path} не записано, новая версия собирается в памяти: {e}")
+            store = WordStore.from_bytes(build_store(self.source_path), cache_size=self.store.cache_size)
+        else:
+            try:
+                store = WordStore(path, cache_size=self.store.cache_size)
+            except Exception:
+                os.remove(path)
+                raise
+            store.remove_on_close = True
+        store.base_path = self.store_path
+        return store
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import logging
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Задержка перед записью: все изменения за это время сливаются в одну запись
+DEFAULT_DEBOUNCE = 1.0
+# Максимальная задержка записи при непрерывном потоке изменений
+DEFAULT_MAX_DELAY = 5.0
+
+
+def atomic_write_json(path, data):
+    # Пишем во временный файл рядом с целевым и подменяем его одним rename,
+    # поэтому после сбоя на диске остаётся либо старая, либо новая версия
+    with span("json.save", "io", path=path):
+        atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=4))
+
+
+def atomic_write_text(path, payload):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class PersistenceService:
+    def __init__(self, debounce=DEFAULT_DEBOUNCE, max_delay=DEFAULT_MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # path -> (снимок данных, время первого изменения, время последнего изменения)
+        self._pending = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def save(self, path, data):
+        # Только помечаем файл как изменённый; data должна быть снимком (копией) состояния,
+        # сама запись произойдёт в фоновом потоке после паузы в изменениях
+        now = time.monotonic()
+        with self._lock:
+            previous = self._pending.get(path)
+            first_change = previous[1] if previous else now
+            self._pending[path] = (data, first_change, now)
+            self._wakeup.notify()
+
+    def load(self, path, default=None):
+        # Несохранённые изменения важнее содержимого файла
+        with self._lock:
+            pending = self._pending.get(path) or self._inflight.get(path)
+        if pending is not None:
+            return pending[0]
+        try:
+            if os.path.exists(path):
+                with span("json.load", "io", path=path), open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            logger.warning(f"Ошибка чтения {path}, используются значения по умолчанию")
+        return default
+
+    def flush(self):
+        self._write_due(lambda entry: True)
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.flush()
+
+    def _due_time(self, first_change, last_change):
+        return min(last_change + self.debounce, first_change + self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._stopped:
+                    now = time.monotonic()
+                    due_times = [self._due_time(entry[1], entry[2]) for entry in self._pending.values()]
+                    if due_times and min(due_times) <= now:
+                        break
+                    self._wakeup.wait(min(due_times) - now if due_times else None)
+                if self._stopped:
+                    return
+            now = time.monotonic()
+            self._write_due(lambda entry: self._due_time(entry[1], entry[2]) <= now)
+
+    def _write_due(self, is_due):
+        # Забираем записи под _write_lock, чтобы старый снимок не перезаписал более новый
+        with self._write_lock:
+            with self._lock:
+                due = {path: entry for path, entry in self._pending.items() if is_due(entry)}
+                for path in due:
+                    del self._pending[path]
+                self._inflight = due
+            for path, (data, _, _) in due.items():
+                try:
+                    atomic_write_json(path, data)
+                    logger.info("Файл %s сохранён", path)
+                except Exception as e:
+                    logger.error(f"Ошибка сохранения {path}: {e}")
+            with self._lock:
+                self._inflight = {}
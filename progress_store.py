@@ -0,0 +1,170 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CEFR_LEVEL = "A1"
+
+
+class ProgressStore:
+    # Единственный источник прогресса: читается с диска один раз,
+    # изменения рассылаются подписанным экранам
+    def __init__(self, persistence, path):
+        self.persistence = persistence
+        self.path = path
+        data = persistence.load(path)
+        if data is None:
+            logger.warning("Ошибка загрузки прогресса, используется стандартный")
+            data = {}
+        else:
+            logger.info("Прогресс успешно загружен")
+        self.current_cefr_level = data.get("current_cefr_level", DEFAULT_CEFR_LEVEL)
+        self._stars = {level: {str(sub_level): stars for sub_level, stars in sub_levels.items()}
+                       for level, sub_levels in data.get("completed_sub_levels", {}).items()}
+        self._listeners = []
+        # Порядок подуровней всех уровней из хранилища слов и индексы поверх него (см. set_layout)
+        self._order = []
+        self._position = {}
+        self._aggregates = {}
+        self._first = {}  # уровень -> его первый подуровень
+        self._unlocked = set()
+        self._open = set()  # открытые, но ещё не пройденные подуровни
+
+    def set_layout(self, layout):
+        # layout: {уровень: [подуровни по порядку]} из хранилища слов. Индекс разблокировки
+        # и сводки по уровням строятся здесь за один проход, дальше record_result
+        # обновляет их точечно
+        self._order = []
+        self._position = {}
+        self._aggregates = {}
+        self._first = {}
+        for level, sub_levels in layout.items():
+            level_stars = self._stars.get(level, {})
+            aggregate = {"total": 0, "completed": 0, "stars": 0}
+            for sub_level in sub_levels:
+                key = (level, str(sub_level))
+                self._first.setdefault(level, key)
+                self._position[key] = len(self._order)
+                self._order.append(key)
+                aggregate["total"] += 1
+                if key[1] in level_stars:
+                    aggregate["completed"] += 1
+                    aggregate["stars"] += level_stars[key[1]]
+            self._aggregates[level] = aggregate
+        self._unlocked = {key for key in self._order if self._compute_unlocked(key)}
+        self._open = {key for key in self._unlocked if not self.is_completed(*key)}
+        if self.current_cefr_level not in self._aggregates and self._order:
+            self.current_cefr_level = self._order[0][0]
+
+    def _compute_unlocked(self, key):
+        # Первый подуровень уровня открывается, когда пройден весь предыдущий уровень,
+        # остальные — когда пройден предыдущий подуровень
+        position = self._position[key]
+        if position == 0:
+            return True
+        previous = self._order[position - 1]
+        if previous[0] == key[0]:
+            return self.is_completed(*previous)
+        return self.is_level_completed(previous[0])
+
+    def subscribe(self, callback):
+        # callback(cefr_level, sub_level, stars)
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def stars(self, cefr_level, sub_level):
+        return self._stars.get(cefr_level, {}).get(str(sub_level), 0)
+
+    def is_completed(self, cefr_level, sub_level):
+        return str(sub_level) in self._stars.get(cefr_level, {})
+
+    def completed_sub_levels(self, cefr_level):
+        return self._stars.get(cefr_level, {})
+
+    def levels(self):
+        return list(self._aggregates)
+
+    def level_summary(self, cefr_level):
+        # {"total", "completed", "stars"} по уровню без обхода подуровней
+        return dict(self._aggregates.get(cefr_level, {"total": 0, "completed": 0, "stars": 0}))
+
+    def is_level_completed(self, cefr_level):
+        aggregate = self._aggregates.get(cefr_level)
+        return aggregate is not None and aggregate["completed"] >= aggregate["total"]
+
+    def is_level_unlocked(self, cefr_level):
+        return self._first.get(cefr_level) in self._unlocked
+
+    def next_sub_level(self, cefr_level, sub_level):
+        # Следующий подуровень в общем порядке (возможно, первый подуровень следующего уровня)
+        position = self._position.get((cefr_level, str(sub_level)))
+        if position is None or position + 1 >= len(self._order):
+            return None
+        return self._order[position + 1]
+
+    def next_tasks(self, limit):
+        # Ближайшие подуровни начиная с первого открытого и не пройденного
+        if not self._order:
+            return []
+        if self._open:
+            start = min(self._position[key] for key in self._open)
+        else:
+            start = max(len(self._order) - limit, 0)
+        return self._order[start:start + limit]
+
+    def is_sub_level_unlocked(self, cefr_level, sub_level):
+        key = (cefr_level, str(sub_level))
+        if key in self._position:
+            return key in self._unlocked
+        # Подуровень вне раскладки хранилища: прежнее правило по номерам
+        sub_level = int(sub_level)
+        if sub_level == 1:
+            return True
+        return self.is_completed(cefr_level, sub_level - 1)
+
+    def record_result(self, cefr_level, sub_level, stars):
+        sub_level = str(sub_level)
+        level_stars = self._stars.setdefault(cefr_level, {})
+        previous_stars = level_stars.get(sub_level)
+        if previous_stars == stars:
+            return
+        level_stars[sub_level] = stars
+        self._update_indexes(cefr_level, sub_level, previous_stars, stars)
+        self.save()
+        for callback in list(self._listeners):
+            try:
+                callback(cefr_level, sub_level, stars)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика прогресса: {e}")
+
+    def _update_indexes(self, cefr_level, sub_level, previous_stars, stars):
+        key = (cefr_level, sub_level)
+        if key not in self._position:
+            return
+        aggregate = self._aggregates[cefr_level]
+        aggregate["stars"] += stars - (previous_stars or 0)
+        if previous_stars is not None:
+            return
+        # Первое прохождение: подуровень закрыт, следующий может открыться
+        aggregate["completed"] += 1
+        self._open.discard(key)
+        following = self.next_sub_level(cefr_level, sub_level)
+        if following is not None and following not in self._unlocked and self._compute_unlocked(following):
+            self._unlocked.add(following)
+            if not self.is_completed(*following):
+                self._open.add(following)
+            if following[0] != cefr_level:
+                self.current_cefr_level = following[0]
+                logger.info(f"Открыт уровень {following[0]}")
+
+    def to_dict(self):
+        return {
+            "current_cefr_level": self.current_cefr_level,
+            "completed_sub_levels": {level: dict(sub_levels) for level, sub_levels in self._stars.items()},
+        }
+
+    def save(self):
+        self.persistence.save(self.path, self.to_dict())
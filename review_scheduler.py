@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Оценки ответа по шкале SM-2
+QUALITY_CORRECT = 4
+QUALITY_WITH_HINT = 3
+QUALITY_WRONG = 1
+
+
+class ReviewCard:
+    __slots__ = ("word_id", "interval", "ease", "due", "reps", "lapses", "version")
+
+    def __init__(self, word_id, interval=0.0, ease=DEFAULT_EASE, due=0.0, reps=0, lapses=0):
+        self.word_id = word_id
+        self.interval = interval  # в днях
+        self.ease = ease
+        self.due = due  # unix time
+        self.reps = reps
+        self.lapses = lapses
+        self.version = 0
+
+    def to_list(self):
+        return [self.interval, self.ease, self.due, self.reps, self.lapses]
+
+
+class ReviewScheduler:
+    # Интервальные повторения (SM-2) с кучей карточек по времени повторения.
+    # Устаревшие записи кучи не удаляются сразу, а пропускаются по версии карточки.
+    def __init__(self, persistence, path, clock=time.time):
+        self.persistence = persistence
+        self.path = path
+        self.clock = clock
+        self.cards = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self.dirty = False
+        for word_id, values in persistence.load(path, {}).items():
+            self.cards[word_id] = ReviewCard(word_id, *values)
+        self._heap = [(card.due, next(self._counter), card.word_id, card.version) for card in self.cards.values()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __contains__(self, word_id):
+        return word_id in self.cards
+
+    def _push(self, card):
+        card.version += 1
+        heapq.heappush(self._heap, (card.due, next(self._counter), card.word_id, card.version))
+        # Когда устаревших записей становится слишком много, пересобираем кучу
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            self._heap = [(c.due, next(self._counter), c.word_id, c.version) for c in self.cards.values()]
+            heapq.heapify(self._heap)
+
+    def record_answer(self, word_id, quality):
+        now = self.clock()
+        card = self.cards.get(word_id)
+        if card is None:
+            card = self.cards[word_id] = ReviewCard(word_id, due=now)
+        if quality < 3:
+            card.reps = 0
+            card.lapses += 1
+            card.interval = 0.0
+            card.ease = max(MIN_EASE, card.ease - 0.2)
+            # Ошибку повторяем в ближайшей разминке
+            card.due = now
+        else:
+            card.reps += 1
+            if card.reps == 1:
+                card.interval = 1.0
+            elif card.reps == 2:
+                card.interval = 6.0
+            else:
+                card.interval = round(card.interval * card.ease, 2)
+            card.ease = max(MIN_EASE, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+            card.due = now + card.interval * DAY
+        self._push(card)
+        self.dirty = True
+        return card
+
+    def pick_due(self, k):
+        # До k карточек, срок которых уже наступил (сначала самые просроченные): O(k log n)
+        now = self.clock()
+        picked = []
+        while self._heap and len(picked) < k:
+            due, _, word_id, version = self._heap[0]
+            card = self.cards.get(word_id)
+            if card is None or card.version != version:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            picked.append(card)
+        for card in picked:
+            heapq.heappush(self._heap, (card.due, next(self._counter), card.word_id, card.version))
+        return [card.word_id for card in picked]
+
+    def pick_weak(self, k, exclude=()):
+        # До k самых трудных карточек вне exclude: меньший ease, больше ошибок, раньше срок; O(n log k)
+        candidates = (card for word_id, card in self.cards.items() if word_id not in exclude)
+        weakest = heapq.nsmallest(k, candidates, key=lambda card: (card.ease, -card.lapses, card.due))
+        return [card.word_id for card in weakest]
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.persistence.save(self.path, {word_id: card.to_list() for word_id, card in self.cards.items()})
+        self.dirty = False
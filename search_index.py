@@ -0,0 +1,194 @@
+import re
+from bisect import insort
+from collections import Counter
+from itertools import chain
+
+from answer_matcher import normalize, strip_diacritics
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Ранг поля: совпадение в переводе важнее совпадения в определении
+FIELD_TRANSLATION = 0
+FIELD_DEFINITION = 1
+
+# Сколько лучших документов хранит каждый узел префиксного дерева
+TOP_K = 64
+MIN_TRIGRAM_QUERY = 3
+
+
+def tokenize(text, language):
+    return TOKEN_RE.findall(strip_diacritics(normalize(text, language)))
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrieNode:
+    __slots__ = ("children", "top", "token_id")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []  # [((ранг поля, длина), token_id)], не больше TOP_K лучших слов поддерева
+        self.token_id = None  # слово, которое заканчивается в этом узле
+
+
+class SearchIndex:
+    # Поиск по переводам и определениям: префиксное дерево для ввода с начала слова
+    # и триграммы для поиска по подстроке и с опечатками. Индекс пополняется
+    # блоками (подуровнями) по мере того, как они становятся доступны в словаре.
+    def __init__(self):
+        self.doc_keys = []
+        self._doc_ids = {}
+        self._blocks = set()
+        self._root = TrieNode()
+        self._token_ids = {}
+        self._tokens = []
+        self._postings = []  # token_id -> {документ: лучший ранг поля}
+        self._token_fields = []  # token_id -> лучший ранг поля среди вхождений
+        self._trigrams = {}  # триграмма -> [token_id]
+
+    def __len__(self):
+        return len(self.doc_keys)
+
+    def has_block(self, block_key):
+        return block_key in self._blocks
+
+    def add_block(self, block_key, entries):
+        # entries: [(ключ слова, word_data)]
+        if block_key in self._blocks:
+            return
+        self._blocks.add(block_key)
+        for key, word_data in entries:
+            if key in self._doc_ids:
+                continue
+            doc = len(self.doc_keys)
+            self._doc_ids[key] = doc
+            self.doc_keys.append(key)
+            for language, text in word_data.get("translations", {}).items():
+                for token in tokenize(text, language):
+                    self._add_token(token, doc, FIELD_TRANSLATION)
+            for language, text in word_data.get("definitions", {}).items():
+                for token in tokenize(text, language):
+                    self._add_token(token, doc, FIELD_DEFINITION)
+
+    def _add_token(self, token, doc, field):
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = len(self._tokens)
+            self._token_ids[token] = token_id
+            self._tokens.append(token)
+            self._postings.append({})
+            self._token_fields.append(field)
+            for trigram in trigrams(token):
+                self._trigrams.setdefault(trigram, []).append(token_id)
+            self._add_to_trie(token, token_id, field)
+        elif field < self._token_fields[token_id]:
+            # Слово впервые встретилось в переводе — поднимаем его в префиксном дереве
+            self._token_fields[token_id] = field
+            self._add_to_trie(token, token_id, field)
+        postings = self._postings[token_id]
+        if postings.get(doc, field + 1) > field:
+            postings[doc] = field
+
+    def _add_to_trie(self, token, token_id, field):
+        # Дерево строится по уникальным словам, документы берутся из их списков вхождений
+        entry = ((field, len(token)), token_id)
+        node = self._root
+        for ch in token:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = TrieNode()
+            node = child
+            top = node.top
+            if len(top) < TOP_K:
+                insort(top, entry)
+            elif entry < top[-1]:
+                top.pop()
+                insort(top, entry)
+        node.token_id = token_id
+
+    def doc_set(self, keys):
+        # Номера документов для ограничения поиска набором слов (см. search)
+        doc_ids = self._doc_ids
+        return {doc_ids[key] for key in keys if key in doc_ids}
+
+    def search(self, query, language="ru", limit=50, docs=None):
+        # Возвращает ключи слов по убыванию релевантности. docs — множество из doc_set:
+        # поиск только среди этих слов, лимит применяется уже после фильтра
+        tokens = tokenize(query, language)
+        if not tokens:
+            return []
+        scores = None
+        for token in tokens:
+            token_scores = self._prefix_scores(token, limit, docs)
+            if len(token_scores) < limit and len(token) >= MIN_TRIGRAM_QUERY:
+                for doc, score in self._trigram_scores(token, docs).items():
+                    if doc not in token_scores:
+                        token_scores[doc] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                # Несколько слов в запросе — ищем документы, где есть все
+                scores = {doc: scores[doc] + score for doc, score in token_scores.items() if doc in scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: item[1])[:limit]
+        return [self.doc_keys[doc] for doc, _ in ranked]
+
+    def _prefix_scores(self, token, limit, docs=None):
+        node = self._root
+        for ch in token:
+            node = node.children.get(ch)
+            if node is None:
+                return {}
+        scores = {}
+        entries = node.top
+        if docs is not None and len(entries) >= TOP_K:
+            # Лучшие слова узла могут не попасть в фильтр — берём всё поддерево
+            entries = sorted(self._subtree_entries(node))
+        for (_, length), token_id in entries:
+            # Точное совпадение слова ранжируется выше продолжений префикса
+            bonus = 0 if length == len(token) else 0.5 + (length - len(token)) * 0.01
+            for doc, field in self._postings[token_id].items():
+                if docs is not None and doc not in docs:
+                    continue
+                score = field + bonus
+                if score < scores.get(doc, 10):
+                    scores[doc] = score
+            if len(scores) >= limit:
+                break
+        return scores
+
+    def _subtree_entries(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if len(node.top) < TOP_K:
+                # В неполном списке узла уже есть все слова его поддерева
+                yield from node.top
+                continue
+            if node.token_id is not None:
+                token_id = node.token_id
+                yield (self._token_fields[token_id], len(self._tokens[token_id])), token_id
+            stack.extend(node.children.values())
+
+    def _trigram_scores(self, token, docs=None):
+        query_trigrams = trigrams(token)
+        # Требуем совпадения большей части триграмм: так проходят подстроки и 1-2 опечатки
+        needed = max(2, len(query_trigrams) - 3)
+        # Подсчёт совпадений идёт в Counter (на C), в Python-цикл попадают только кандидаты
+        counts = Counter(chain.from_iterable(self._trigrams.get(trigram, ()) for trigram in query_trigrams))
+        scores = {}
+        for token_id, common in counts.items():
+            if common < needed:
+                continue
+            similarity = common / (len(query_trigrams) + len(self._tokens[token_id]) + 2 - common)
+            for doc, field in self._postings[token_id].items():
+                if docs is not None and doc not in docs:
+                    continue
+                score = field + 2 - similarity
+                if score < scores.get(doc, 10):
+                    scores[doc] = score
+        return scores
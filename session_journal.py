@@ -0,0 +1,216 @@
+import json
+import os
+import time
+import logging
+
+from persistence import atomic_write_text
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Журнал текущей игровой сессии: при сбое приложения посреди подуровня
+# по нему восстанавливаются порядок слов, номер слова, очки и подсказка.
+#
+# Файл — JSON по записи на строку. Первая строка — запись "start": слова сессии
+# в порядке игры как позиции [уровень, подуровень, номер в блоке] и хэши их
+# подуровней. Ключи слов для этого не годятся (перевод в подуровне может
+# повторяться), а по хэшам видно, что база слов с тех пор изменилась и позиции
+# указывают уже не на те слова — такой журнал не продолжается. Дальше по записи на каждый ответ ("answer")
+# и подсказку ("hint") с итоговыми очками после них. Запись ответа — дозапись
+# одной строки, её стоимость не зависит от длины сессии. Каждые COMPACT_EVERY
+# записей журнал сжимается: атомарно переписывается как "start" и один снимок
+# состояния ("state"). Недописанная последняя строка при чтении отбрасывается.
+#
+# Политика fsync: FSYNC_ALWAYS — после каждой записи; FSYNC_INTERVAL — не чаще
+# раза в fsync_interval секунд; FSYNC_NEVER — только при начале сессии, сжатии
+# и закрытии. Строка в любом случае сразу передаётся ОС (flush), так что падение
+# самого приложения её не теряет; fsync защищает от отключения питания.
+
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+DEFAULT_FSYNC_INTERVAL = 1.0
+COMPACT_EVERY = 64
+
+
+def initial_state(start):
+    return {"start": start, "index": 0, "score": 0, "correct_answers": 0, "hint_used": False,
+            "answered": False, "latencies_ms": []}
+
+
+def apply_record(state, record):
+    # Свёртка одной записи журнала в снимок состояния
+    kind = record.get("t")
+    if kind == "state":
+        state = dict(record["state"], start=state["start"])
+        state["latencies_ms"] = list(state.get("latencies_ms", []))
+        return state
+    if kind == "answer":
+        state["index"] = record["i"]
+        state["score"] = record["score"]
+        state["correct_answers"] = record["correct"]
+        state["hint_used"] = record.get("hint", False)
+        state["answered"] = True
+        if record.get("latency") is not None:
+            state["latencies_ms"].append(record["latency"])
+    elif kind == "hint":
+        state["index"] = record["i"]
+        state["score"] = record["score"]
+        state["hint_used"] = True
+        state["answered"] = False
+    return state
+
+
+def word_positions(words):
+    # Слова сессии (WordView) в порядке игры -> [уровень, подуровень, номер в блоке]
+    return [[word.block.level, word.block.sub_level, word.index] for word in words]
+
+
+def block_hashes(positions, block_hash):
+    # Хэши подуровней, из которых взяты слова; block_hash(уровень, подуровень) — из хранилища
+    blocks = dict.fromkeys((level, sub_level) for level, sub_level, _ in positions)
+    return [[level, sub_level, block_hash(level, sub_level)] for level, sub_level in blocks]
+
+
+def blocks_changed(start, block_hash):
+    # True, если подуровни сессии изменились или исчезли с момента записи журнала
+    if "words" not in start or "blocks" not in start:
+        return True
+    for level, sub_level, digest in start["blocks"]:
+        try:
+            if block_hash(level, sub_level) != digest:
+                return True
+        except KeyError:
+            return True
+    return False
+
+
+def resume_position(state):
+    # Слово, с которого продолжать: после отвеченного — следующее
+    return state["index"] + 1 if state["answered"] else state["index"]
+
+
+def read_journal(path):
+    # Снимок состояния незавершённой сессии или None
+    try:
+        with span("journal.load", "io", path=path), open(path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Журнал сессии {path} не прочитан: {e}")
+        return None
+    state = None
+    for line in lines:
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # Строка, оборванная сбоем во время записи, — дальше ничего нет
+            break
+        if state is None:
+            if record.get("t") != "start":
+                return None
+            state = initial_state(record)
+        else:
+            state = apply_record(state, record)
+    return state
+
+
+class SessionJournal:
+    def __init__(self, path, fsync=FSYNC_INTERVAL, fsync_interval=DEFAULT_FSYNC_INTERVAL,
+                 compact_every=COMPACT_EVERY):
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.state = None
+        self._file = None
+        self._records = 0
+        self._synced_at = 0.0
+        self._dirty = False
+
+    @property
+    def is_open(self):
+        return self._file is not None
+
+    def begin(self, start):
+        # Новая сессия: журнал прежней перезаписывается
+        start = dict(start, t="start")
+        self.state = initial_state(start)
+        self._rewrite([start])
+
+    def resume(self, state):
+        # Продолжение по снимку из read_journal; журнал сразу сжимается,
+        # заодно отбрасывается возможный оборванный хвост
+        self.state = state
+        self.compact()
+
+    def append(self, record):
+        if self._file is None:
+            return
+        self.state = apply_record(self.state, record)
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._dirty = True
+        self._records += 1
+        if self._records >= self.compact_every:
+            self.compact()
+        elif self.fsync == FSYNC_ALWAYS or \
+                (self.fsync == FSYNC_INTERVAL and time.monotonic() - self._synced_at >= self.fsync_interval):
+            self.sync()
+
+    def answer(self, index, result, score, correct_answers, hint_used, latency_ms):
+        self.append({"t": "answer", "i": index, "r": result, "score": score, "correct": correct_answers,
+                     "hint": hint_used, "latency": None if latency_ms is None else round(latency_ms, 1)})
+
+    def hint(self, index, score):
+        self.append({"t": "hint", "i": index, "score": score})
+
+    def compact(self):
+        if self.state is None:
+            return
+        with span("journal.compact", "io", path=self.path):
+            snapshot = dict(self.state)
+            snapshot.pop("start")
+            self._rewrite([self.state["start"], {"t": "state", "state": snapshot}])
+
+    def sync(self):
+        if self._file is not None and self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._synced_at = time.monotonic()
+
+    def finish(self):
+        # Сессия доиграна: восстанавливать нечего
+        self._close_file()
+        self.state = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Журнал сессии {self.path} не удалён: {e}")
+
+    def close(self):
+        # Выход из приложения: незавершённая сессия остаётся в журнале
+        if self._file is not None:
+            self.sync()
+        self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rewrite(self, records):
+        self._close_file()
+        payload = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+        # Атомарная подмена с fsync: после сбоя остаётся прежний журнал или новый целиком
+        atomic_write_text(self.path, payload)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._records = 0
+        self._dirty = False
+        self._synced_at = time.monotonic()
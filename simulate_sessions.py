@@ -0,0 +1,202 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from answer_matcher import prepare_deck
+from deck_sampler import DeckSampler
+from game_session import GameSession, SESSION_SIZE, STAR_THRESHOLDS
+from word_store import WordStore
+
+# Массовая симуляция прохождений подуровней без окна: нужна для подбора
+# порогов звёзд и длительности таймера на реальных колодах.
+#
+#   python simulate_sessions.py --sessions 1000000 --timer 15,30,45 --p-correct 0.8
+
+SIMULATION_LANG = "ru"
+WRONG_ANSWER = "\0"
+CHUNK_SIZE = 20000
+
+_worker_decks = None
+
+
+class AnswerModel:
+    # Модель игрока: навык (вероятность правильного ответа) берётся из бета-распределения
+    # на каждую сессию, время ответа — логнормальное вокруг медианы
+    def __init__(self, p_correct=0.75, skill_spread=0.0, hint_rate=0.0,
+                 median_time=8.0, time_sigma=0.6):
+        self.p_correct = p_correct
+        self.skill_spread = skill_spread
+        self.hint_rate = hint_rate
+        self.median_time = median_time
+        self.time_sigma = time_sigma
+
+    def draw_skill(self, rng):
+        if self.skill_spread <= 0:
+            return self.p_correct
+        # Параметризация беты через среднее и "концентрацию"
+        concentration = 1.0 / self.skill_spread
+        alpha = max(self.p_correct * concentration, 1e-3)
+        beta = max((1 - self.p_correct) * concentration, 1e-3)
+        return rng.betavariate(alpha, beta)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def load_decks(words_file, cefr_level=None, sub_levels=None):
+    store = WordStore.open(words_file)
+    decks = []
+    for level in store.levels():
+        if cefr_level and level != cefr_level:
+            continue
+        for sub_level in store.sub_levels(level):
+            if sub_levels and sub_level not in sub_levels:
+                continue
+            words = store.get_words(level, sub_level)
+            if words:
+                decks.append(((level, sub_level), words, prepare_deck(words)))
+    store.close()
+    return decks
+
+
+def _init_worker(decks):
+    global _worker_decks
+    _worker_decks = decks
+
+
+def simulate_chunk(count, timer_duration, model, thresholds, seed, session_size=SESSION_SIZE):
+    rng = random.Random(seed)
+    decks = _worker_decks
+    log_median = math.log(model.median_time)
+    stars_counter = Counter()
+    score_sum = 0
+    correct_sum = 0
+    timeouts = 0
+    words_total = 0
+    latency_sum = 0.0
+    for _ in range(count):
+        key, words, prepared = decks[rng.randrange(len(decks))]
+        order = DeckSampler(len(words), rng=rng).take(session_size) if session_size else None
+        session = GameSession(words, rng=rng, thresholds=thresholds, prepared=prepared, order=order)
+        skill = model.draw_skill(rng)
+        while not session.is_finished:
+            if model.hint_rate and rng.random() < model.hint_rate:
+                session.use_hint(SIMULATION_LANG)
+            response_time = rng.lognormvariate(log_median, model.time_sigma)
+            if response_time > timer_duration:
+                session.timeout(timer_duration * 1000.0)
+                timeouts += 1
+            elif rng.random() < skill:
+                session.answer(session.correct_answer(SIMULATION_LANG), SIMULATION_LANG, response_time * 1000.0)
+            else:
+                session.answer(WRONG_ANSWER, SIMULATION_LANG, response_time * 1000.0)
+            session.next_word()
+        stars_counter[session.calculate_stars()] += 1
+        score_sum += session.score
+        correct_sum += session.correct_answers
+        words_total += session.total_words
+        latency_sum += sum(session.latencies_ms)
+    return stars_counter, score_sum, correct_sum, timeouts, words_total, latency_sum
+
+
+def run_simulation(decks, sessions, timer_duration, model, thresholds=STAR_THRESHOLDS,
+                   workers=None, seed=0, session_size=SESSION_SIZE):
+    workers = workers or os.cpu_count() or 1
+    chunks = []
+    remaining = sessions
+    index = 0
+    while remaining > 0:
+        count = min(CHUNK_SIZE, remaining)
+        chunks.append((count, seed * 1000003 + index))
+        remaining -= count
+        index += 1
+
+    stars_counter = Counter()
+    score_sum = correct_sum = timeouts = words_total = 0
+    latency_sum = 0.0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(decks,)) as pool:
+        futures = [pool.submit(simulate_chunk, count, timer_duration, model, thresholds, chunk_seed, session_size)
+                   for count, chunk_seed in chunks]
+        for future in futures:
+            chunk_stars, chunk_score, chunk_correct, chunk_timeouts, chunk_words, chunk_latency = future.result()
+            stars_counter.update(chunk_stars)
+            score_sum += chunk_score
+            correct_sum += chunk_correct
+            timeouts += chunk_timeouts
+            words_total += chunk_words
+            latency_sum += chunk_latency
+    elapsed = time.perf_counter() - started
+
+    return {
+        "timer_duration": timer_duration,
+        "sessions": sessions,
+        "session_size": session_size,
+        "elapsed_sec": round(elapsed, 3),
+        "sessions_per_minute": round(sessions / elapsed * 60) if elapsed else None,
+        "stars": {str(stars): stars_counter.get(stars, 0) / sessions for stars in range(4)},
+        "mean_score": score_sum / sessions,
+        "accuracy": correct_sum / words_total if words_total else 0.0,
+        "timeout_rate": timeouts / words_total if words_total else 0.0,
+        "mean_latency_ms": latency_sum / words_total if words_total else 0.0,
+    }
+
+
+def parse_thresholds(text):
+    # "0.9,0.7,0.5" -> ((3, 0.9), (2, 0.7), (1, 0.5))
+    ratios = [float(value) for value in text.split(",")]
+    return tuple((len(ratios) - i, ratio) for i, ratio in enumerate(ratios))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Симуляция прохождений подуровней WordMaster")
+    parser.add_argument("--words", default="words.json", help="файл колоды")
+    parser.add_argument("--level", help="уровень CEFR (по умолчанию все)")
+    parser.add_argument("--sub-levels", help="подуровни через запятую (по умолчанию все)")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--timer", default="30", help="длительности таймера через запятую, сек")
+    parser.add_argument("--thresholds", default=",".join(str(ratio) for _, ratio in STAR_THRESHOLDS),
+                        help="пороги на 3, 2 и 1 звезду через запятую")
+    parser.add_argument("--p-correct", type=float, default=0.75, help="средняя вероятность правильного ответа")
+    parser.add_argument("--skill-spread", type=float, default=0.0,
+                        help="разброс навыка между игроками (0 — все одинаковые)")
+    parser.add_argument("--hint-rate", type=float, default=0.0, help="доля слов с подсказкой")
+    parser.add_argument("--median-time", type=float, default=8.0, help="медианное время ответа, сек")
+    parser.add_argument("--time-sigma", type=float, default=0.6, help="сигма логнормального времени ответа")
+    parser.add_argument("--session-size", type=int, default=SESSION_SIZE,
+                        help="слов в сессии (по умолчанию весь подуровень)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="записать результаты в JSON-файл")
+    args = parser.parse_args(argv)
+
+    sub_levels = set(args.sub_levels.split(",")) if args.sub_levels else None
+    decks = load_decks(args.words, args.level, sub_levels)
+    if not decks:
+        parser.error("в колоде нет подходящих подуровней")
+
+    model = AnswerModel(args.p_correct, args.skill_spread, args.hint_rate, args.median_time, args.time_sigma)
+    thresholds = parse_thresholds(args.thresholds)
+    results = []
+    for timer_duration in (float(value) for value in args.timer.split(",")):
+        result = run_simulation(decks, args.sessions, timer_duration, model, thresholds,
+                                workers=args.workers, seed=args.seed, session_size=args.session_size)
+        results.append(result)
+        stars = " ".join(f"{stars}★ {share:.1%}" for stars, share in result["stars"].items())
+        print(f"таймер {timer_duration:g} с: {stars} | очки {result['mean_score']:.1f} | "
+              f"точность {result['accuracy']:.1%} | таймауты {result['timeout_rate']:.1%} | "
+              f"{result['sessions_per_minute']} сессий/мин")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": model.to_dict(), "thresholds": thresholds, "results": results},
+                      f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import array
+import math
+import os
+import threading
+import time
+import wave
+from collections import deque
+import logging
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Звуковые сигналы игры. Клипы загружаются один раз в фоновом потоке при запуске
+# (провайдер SDL2 раскодирует WAV целиком в память) и живут в пуле плееров:
+# на каждый сигнал POOL_SIZE готовых плееров, которые перебираются по кругу,
+# поэтому play() не читает диск и не ждёт декодирования, а частые сигналы
+# не обрывают друг друга. Пока пул не готов, сигналы просто пропускаются.
+#
+# Недостающие клипы генерируются как простые тоны (generate_tones), так что
+# звук работает и проверяется без внешних файлов. На машине без аудиоустройства
+# пул собирается с пустым драйвером SDL:
+#
+#   SDL_AUDIODRIVER=dummy python -m benchmarks.run_benchmarks --only sound_cue_play
+
+CORRECT = "correct"
+WRONG = "wrong"
+TIMEOUT = "timeout"
+LEVEL_COMPLETE = "level_complete"
+CUES = (CORRECT, WRONG, TIMEOUT, LEVEL_COMPLETE)
+
+DEFAULT_DIRECTORY = "sounds"
+POOL_SIZE = 2
+SAMPLE_RATE = 22050
+VOLUME = 0.4
+FADE_SECONDS = 0.01
+LATENCY_SAMPLES = 256
+
+# Ноты сигналов: (частота в Гц, длительность в секундах)
+TONES = {
+    CORRECT: [(880.0, 0.08), (1318.5, 0.12)],
+    WRONG: [(220.0, 0.22)],
+    TIMEOUT: [(659.3, 0.1), (440.0, 0.1), (329.6, 0.16)],
+    LEVEL_COMPLETE: [(523.3, 0.1), (659.3, 0.1), (784.0, 0.1), (1046.5, 0.25)],
+}
+
+
+def cue_path(directory, cue):
+    return os.path.join(directory, f"{cue}.wav")
+
+
+def write_tone(path, notes, sample_rate=SAMPLE_RATE, volume=VOLUME):
+    # Моно 16 бит; каждая нота с коротким нарастанием и затуханием, чтобы не было щелчков
+    samples = array.array("h")
+    fade = int(sample_rate * FADE_SECONDS)
+    for frequency, duration in notes:
+        count = int(sample_rate * duration)
+        step = 2 * math.pi * frequency / sample_rate
+        for i in range(count):
+            envelope = min(1.0, i / fade, (count - i) / fade) if fade else 1.0
+            samples.append(int(32767 * volume * envelope * math.sin(step * i)))
+    tmp_path = path + ".tmp"
+    with wave.open(tmp_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    os.replace(tmp_path, path)
+
+
+def generate_tones(directory, overwrite=False):
+    # Создаёт недостающие клипы сигналов; возвращает список созданных путей
+    os.makedirs(directory, exist_ok=True)
+    created = []
+    for cue in CUES:
+        path = cue_path(directory, cue)
+        if overwrite or not os.path.exists(path):
+            write_tone(path, TONES[cue])
+            created.append(path)
+    return created
+
+
+class SoundCues:
+    def __init__(self, directory=DEFAULT_DIRECTORY, pool_size=POOL_SIZE, loader=None):
+        self.directory = directory
+        self.pool_size = pool_size
+        # Загрузчик клипа: путь -> плеер с play()/stop() или None; по умолчанию SoundLoader Kivy
+        self.loader = loader
+        # сигнал -> [плееры] и номер следующего плеера; заменяется целиком, когда пул готов
+        self._pool = {}
+        self._next = {}
+        self._thread = None
+        # Задержка от ввода до запуска звука, мс
+        self.latencies_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    @property
+    def is_ready(self):
+        return bool(self._pool)
+
+    def preload(self, background=True):
+        if self._thread is not None:
+            return
+        if not background:
+            self._load()
+            return
+        self._thread = threading.Thread(target=self._load, name="sound-cues", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        loader = self.loader
+        if loader is None:
+            from kivy.core.audio import SoundLoader
+            loader = SoundLoader.load
+        pool = {}
+        # Абсолютный путь: SoundLoader кэширует разрешение относительных путей
+        directory = os.path.abspath(self.directory)
+        with span("sounds.preload", "io", directory=directory):
+            try:
+                generate_tones(directory)
+            except OSError as e:
+                logger.error(f"Не удалось создать звуки в {directory}: {e}")
+            for cue in CUES:
+                path = cue_path(directory, cue)
+                if not os.path.exists(path):
+                    continue
+                players = []
+                for _ in range(self.pool_size):
+                    try:
+                        player = loader(path)
+                    except Exception as e:
+                        logger.error(f"Ошибка загрузки звука {path}: {e}")
+                        player = None
+                    # SoundLoader отдаёт плеер и тогда, когда клип не раскодирован
+                    # (например, нет аудиоустройства) — у такого плеера нулевая длина
+                    if player is None or not player.length:
+                        break
+                    players.append(player)
+                if players:
+                    pool[cue] = players
+        self._next = {cue: 0 for cue in pool}
+        self._pool = pool
+        logger.info("Звуки загружены: %d из %d", len(pool), len(CUES))
+
+    def play(self, cue, input_time=None):
+        # input_time — time.perf_counter() момента ввода; по нему считается задержка
+        players = self._pool.get(cue)
+        if not players:
+            return False
+        number = self._next[cue]
+        self._next[cue] = (number + 1) % len(players)
+        player = players[number]
+        if player.state == "play":
+            player.stop()
+        player.play()
+        if input_time is not None:
+            latency_ms = (time.perf_counter() - input_time) * 1000.0
+            self.latencies_ms.append(latency_ms)
+            logger.debug("Звук %s: %.1f мс от ввода", cue, latency_ms)
+        return True
+
+    def latency_summary(self):
+        # Медиана, 95-й перцентиль и максимум задержки по последним замерам
+        values = sorted(self.latencies_ms)
+        if not values:
+            return None
+        return {
+            "count": len(values),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max_ms": values[-1],
+        }
+
+    def unload(self):
+        pool, self._pool = self._pool, {}
+        for players in pool.values():
+            for player in players:
+                try:
+                    player.stop()
+                    player.unload()
+                except Exception:
+                    pass
@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Поток событий по каждому ответу. Событие — кортеж в порядке EVENT_FIELDS;
+# в сегменте первая строка — заголовок, дальше по массиву JSON на строку.
+EVENT_FIELDS = ("ts", "session", "word_id", "lang", "latency_ms", "result", "hint", "timeout")
+SCHEMA_VERSION = 1
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+DEFAULT_DIRECTORY = "telemetry"
+DEFAULT_CAPACITY = 4096
+# Сегмент пишется, когда буфер заполнен наполовину или прошло столько секунд
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+
+def new_device_id():
+    return uuid.uuid4().hex
+
+
+def new_session_id():
+    return uuid.uuid4().hex[:16]
+
+
+def write_segment(directory, device_id, events):
+    # Сегменты неизменяемы: пишем во временный файл и переименовываем,
+    # поэтому анализатор никогда не увидит недописанный сегмент
+    os.makedirs(directory, exist_ok=True)
+    name = f"{device_id}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}"
+    header = {"schema": SCHEMA_VERSION, "device": device_id, "fields": EVENT_FIELDS}
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            lines = [json.dumps(header, ensure_ascii=False)]
+            lines.extend(json.dumps(event, ensure_ascii=False, separators=(",", ":")) for event in events)
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+        os.replace(tmp_path, os.path.join(directory, name))
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return name
+
+
+class TelemetryRecorder:
+    # Кольцевой буфер фиксированного размера: record() на UI-потоке только кладёт кортеж,
+    # сжатие и запись сегментов идут в фоновом потоке. Если запись не успевает,
+    # самые старые события перезаписываются и учитываются в dropped.
+    def __init__(self, device_id, directory=DEFAULT_DIRECTORY, capacity=DEFAULT_CAPACITY,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.device_id = device_id
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.segments_written = 0
+        self._ring = [None] * capacity
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self._count
+
+    def record(self, session_id, word_id, lang, latency_ms, result, hint_used, timed_out):
+        event = (round(time.time(), 3), session_id, word_id, lang,
+                 None if latency_ms is None else round(latency_ms, 1), result, hint_used, timed_out)
+        with self._lock:
+            if self._count == self.capacity:
+                self._start = (self._start + 1) % self.capacity
+                self._count -= 1
+                self.dropped += 1
+            self._ring[(self._start + self._count) % self.capacity] = event
+            self._count += 1
+            if self._count * 2 >= self.capacity:
+                self._wakeup.notify()
+
+    def _drain(self):
+        # Вызывается под self._lock
+        end = self._start + self._count
+        if end <= self.capacity:
+            events = self._ring[self._start:end]
+        else:
+            events = self._ring[self._start:] + self._ring[:end - self.capacity]
+        self._start = 0
+        self._count = 0
+        return events
+
+    def _write(self, events):
+        if not events:
+            return
+        try:
+            write_segment(self.directory, self.device_id, events)
+            self.segments_written += 1
+            logger.debug("Сегмент телеметрии записан: %d событий", len(events))
+        except Exception as e:
+            logger.error(f"Ошибка записи телеметрии: {e}")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._stopped and self._count * 2 < self.capacity:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            # Порядок блокировок везде один: сначала запись, потом буфер,
+            # поэтому flush() дожидается сегмента, который пишется в этот момент
+            with self._write_lock:
+                with self._lock:
+                    events = self._drain()
+                self._write(events)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                events = self._drain()
+            self._write(events)
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.flush()
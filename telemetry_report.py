@@ -0,0 +1,267 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from telemetry import SEGMENT_SUFFIX, DEFAULT_DIRECTORY
+from word_store import split_word_key
+
+# Сводка по сегментам телеметрии с многих устройств: доля ошибок по словам,
+# перцентили времени ответа и сложность подуровней.
+#
+#   python telemetry_report.py --input telemetry --top 20 --output report.json
+#
+# Каждый сегмент сворачивается в компактную сводку (счётчики и гистограмма времени
+# ответа по словам), сводки кэшируются рядом с сегментами. Сегменты неизменяемы,
+# поэтому повторный запуск разбирает только новые файлы.
+
+CACHE_DIR = ".cache"
+
+# Столбцы счётчиков в сводке
+COUNTERS = ("answers", "correct", "close", "wrong", "timeout", "hint")
+ANSWERS, CORRECT, CLOSE, WRONG, TIMEOUT, HINT = range(len(COUNTERS))
+
+# Логарифмические корзины времени ответа от 50 мс до 2 минут (шаг около 8%)
+LATENCY_EDGES = np.geomspace(50.0, 120000.0, 97)
+LATENCY_BINS = len(LATENCY_EDGES) + 1
+PERCENTILES = (50, 90, 99)
+
+
+def empty_summary():
+    return np.array([], dtype=str), np.zeros((0, len(COUNTERS)), np.int64), np.zeros(0, np.int64), \
+        np.zeros(0, np.int64)
+
+
+def sparse_histogram(rows, bins):
+    # Гистограммы хранятся разреженно: пары (строка * LATENCY_BINS + корзина, количество),
+    # у слова в одном сегменте обычно всего несколько ответов
+    cells, values = np.unique(rows * LATENCY_BINS + bins, return_counts=True)
+    return cells.astype(np.int64), values.astype(np.int64)
+
+
+def summarize_events(fields, events):
+    # events — список массивов в порядке fields;
+    # возвращает (слова, счётчики по словам, ячейки гистограмм времени ответа, их значения)
+    if not events:
+        return empty_summary()
+    columns = dict(zip(fields, zip(*events)))
+    word_ids, inverse = np.unique(np.array(columns["word_id"], dtype=str), return_inverse=True)
+    results = np.array(columns["result"], dtype=str)
+    flags = np.column_stack([
+        np.ones(len(events), dtype=bool),
+        results == "correct",
+        results == "close",
+        results == "wrong",
+        np.array(columns["timeout"], dtype=bool) | (results == "timeout"),
+        np.array(columns["hint"], dtype=bool),
+    ])
+    counts = np.column_stack([np.bincount(inverse, weights=flags[:, i], minlength=len(word_ids))
+                              for i in range(len(COUNTERS))]).astype(np.int64)
+    latency = np.array([np.nan if value is None else value for value in columns["latency_ms"]], dtype=float)
+    known = ~np.isnan(latency)
+    cells, values = sparse_histogram(inverse[known], np.searchsorted(LATENCY_EDGES, latency[known]))
+    return word_ids, counts, cells, values
+
+
+def read_segment(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return empty_summary()
+    header = json.loads(lines[0])
+    # Один вызов json.loads на весь сегмент вместо вызова на каждую строку
+    events = json.loads("[" + ",".join(line for line in lines[1:] if line) + "]")
+    return summarize_events(header["fields"], events)
+
+
+def cache_path(segment_path):
+    directory, name = os.path.split(segment_path)
+    return os.path.join(directory, CACHE_DIR, name[:-len(SEGMENT_SUFFIX)] + ".npz")
+
+
+def load_summary(segment_path):
+    path = cache_path(segment_path)
+    size = os.path.getsize(segment_path)
+    try:
+        with np.load(path) as cached:
+            if int(cached["source_size"]) == size:
+                return cached["word_ids"], cached["counts"], cached["cells"], cached["values"], True
+    except (OSError, KeyError, ValueError):
+        pass
+    word_ids, counts, cells, values = read_segment(segment_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, word_ids=word_ids, counts=counts, cells=cells, values=values, source_size=size)
+    os.replace(tmp_path, path)
+    return word_ids, counts, cells, values, False
+
+
+def find_segments(paths):
+    segments = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [name for name in dirs if name != CACHE_DIR]
+                segments.extend(os.path.join(root, name) for name in files if name.endswith(SEGMENT_SUFFIX))
+        elif path.endswith(SEGMENT_SUFFIX):
+            segments.append(path)
+    return sorted(segments)
+
+
+def merge_summaries(summaries):
+    # Сводки сегментов складываются по словам: уникальные ключи и bincount по обратному индексу.
+    # Возвращает (слова, счётчики, плотные гистограммы слов)
+    summaries = [summary for summary in summaries if len(summary[0])]
+    if not summaries:
+        return np.array([], dtype=str), np.zeros((0, len(COUNTERS)), np.int64), \
+            np.zeros((0, LATENCY_BINS), np.int64)
+    word_ids, inverse = np.unique(np.concatenate([summary[0] for summary in summaries]), return_inverse=True)
+    counts = np.concatenate([summary[1] for summary in summaries])
+    merged_counts = np.column_stack([np.bincount(inverse, weights=counts[:, i], minlength=len(word_ids))
+                                     for i in range(counts.shape[1])]).astype(np.int64)
+    # Строки ячеек гистограмм переводим из локальной нумерации сегмента в общую
+    offsets = np.cumsum([0] + [len(summary[0]) for summary in summaries])
+    cells = np.concatenate([summary[2] + offsets[i] * LATENCY_BINS for i, summary in enumerate(summaries)])
+    values = np.concatenate([summary[3] for summary in summaries])
+    global_cells = inverse[cells // LATENCY_BINS] * LATENCY_BINS + cells % LATENCY_BINS
+    hist = np.bincount(global_cells, weights=values, minlength=len(word_ids) * LATENCY_BINS)
+    return word_ids, merged_counts, hist.reshape(len(word_ids), LATENCY_BINS).astype(np.int64)
+
+
+def group_rows(keys, counts, hist):
+    # Сумма строк с одинаковым ключом (например, подуровнем слова)
+    groups, inverse = np.unique(keys, return_inverse=True)
+    grouped_counts = np.column_stack([np.bincount(inverse, weights=counts[:, i], minlength=len(groups))
+                                      for i in range(counts.shape[1])]).astype(np.int64)
+    flat = (inverse[:, None] * LATENCY_BINS + np.arange(LATENCY_BINS)).ravel()
+    grouped_hist = np.bincount(flat, weights=hist.ravel(), minlength=len(groups) * LATENCY_BINS)
+    return groups, grouped_counts, grouped_hist.reshape(len(groups), LATENCY_BINS)
+
+
+def histogram_percentiles(hist, percentiles=PERCENTILES):
+    # Перцентили по гистограмме: середина (геометрическая) корзины, в которую попадает перцентиль
+    hist = np.atleast_2d(hist)
+    totals = hist.sum(axis=1)
+    cumulative = np.cumsum(hist, axis=1)
+    lower = np.concatenate([[LATENCY_EDGES[0]], LATENCY_EDGES])
+    upper = np.concatenate([LATENCY_EDGES, [LATENCY_EDGES[-1]]])
+    centers = np.sqrt(lower * upper)
+    result = np.full((hist.shape[0], len(percentiles)), np.nan)
+    has_data = totals > 0
+    for i, percentile in enumerate(percentiles):
+        target = totals * percentile / 100.0
+        index = (cumulative >= target[:, None]).argmax(axis=1)
+        result[has_data, i] = centers[index[has_data]]
+    return result
+
+
+def error_rates(counts):
+    answers = np.maximum(counts[:, ANSWERS], 1)
+    return (counts[:, WRONG] + counts[:, TIMEOUT]) / answers
+
+
+def sub_level_key(word_id):
+    # "A1_10" по идентификатору слова; None для событий без слова (word_id отсутствовал
+    # и в сводке стал строкой "None") или с идентификатором не того вида
+    if not word_id or word_id == "None":
+        return None
+    try:
+        return "_".join(split_word_key(word_id))
+    except ValueError:
+        return None
+
+
+def build_report(word_ids, counts, hist, top=20, min_answers=5):
+    percentiles = histogram_percentiles(hist)
+    rates = error_rates(counts)
+    # Ответы без узнаваемого слова входят в общие итоги, но не в рейтинг слов и подуровней
+    keys = [sub_level_key(word_id) for word_id in word_ids.tolist()]
+    known = np.array([key is not None for key in keys], dtype=bool)
+
+    eligible = np.flatnonzero(known & (counts[:, ANSWERS] >= min_answers))
+    hardest = eligible[np.lexsort((-counts[eligible, ANSWERS], -rates[eligible]))][:top]
+    words = [{
+        "word_id": str(word_ids[i]),
+        "answers": int(counts[i, ANSWERS]),
+        "error_rate": round(float(rates[i]), 4),
+        "hint_rate": round(float(counts[i, HINT] / max(counts[i, ANSWERS], 1)), 4),
+        "latency_ms": {f"p{p}": round(float(percentiles[i, j]), 1) for j, p in enumerate(PERCENTILES)},
+    } for i in hardest]
+
+    sub_level_keys = np.array([key for key in keys if key is not None], dtype=str)
+    groups, group_counts, group_hist = group_rows(sub_level_keys, counts[known], hist[known])
+    group_rates = error_rates(group_counts)
+    group_percentiles = histogram_percentiles(group_hist)
+    sub_levels = [{
+        "sub_level": str(groups[i]),
+        "answers": int(group_counts[i, ANSWERS]),
+        "error_rate": round(float(group_rates[i]), 4),
+        "timeout_rate": round(float(group_counts[i, TIMEOUT] / max(group_counts[i, ANSWERS], 1)), 4),
+        "latency_p50_ms": round(float(group_percentiles[i, 0]), 1),
+    } for i in np.argsort(-group_rates, kind="stable")]
+
+    totals = counts.sum(axis=0)
+    overall = histogram_percentiles(hist.sum(axis=0))[0]
+    return {
+        "answers": int(totals[ANSWERS]) if len(totals) else 0,
+        "words": len(word_ids),
+        "error_rate": round(float(error_rates(totals[None, :])[0]), 4) if len(totals) else 0.0,
+        "unknown_word_answers": int(counts[~known, ANSWERS].sum()),
+        "latency_ms": {f"p{p}": round(float(overall[j]), 1) for j, p in enumerate(PERCENTILES)},
+        "hardest_words": words,
+        "sub_levels": sub_levels,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводка телеметрии WordMaster")
+    parser.add_argument("--input", nargs="+", default=[DEFAULT_DIRECTORY], help="каталоги или файлы сегментов")
+    parser.add_argument("--top", type=int, default=20, help="сколько самых трудных слов показать")
+    parser.add_argument("--min-answers", type=int, default=5, help="минимум ответов на слово для рейтинга")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="записать сводку в JSON-файл")
+    args = parser.parse_args(argv)
+
+    segments = find_segments(args.input)
+    if not segments:
+        parser.error("сегменты телеметрии не найдены")
+
+    started = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1 and len(segments) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = list(pool.map(load_summary, segments, chunksize=16))
+    else:
+        summaries = [load_summary(segment) for segment in segments]
+    cached = sum(1 for summary in summaries if summary[4])
+    word_ids, counts, hist = merge_summaries([summary[:4] for summary in summaries])
+    report = build_report(word_ids, counts, hist, args.top, args.min_answers)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(segments)} сегментов ({cached} из кэша), {report['answers']} ответов, "
+          f"{report['words']} слов за {elapsed:.2f} с")
+    latency = report["latency_ms"]
+    if report["unknown_word_answers"]:
+        print(f"ответов без слова: {report['unknown_word_answers']} (не входят в рейтинги)")
+    print(f"ошибки {report['error_rate']:.1%} | время ответа p50 {latency['p50']:.0f} мс, "
+          f"p90 {latency['p90']:.0f} мс, p99 {latency['p99']:.0f} мс")
+    print("Самые трудные слова:")
+    for word in report["hardest_words"]:
+        print(f"  {word['word_id']:<30} ошибки {word['error_rate']:.1%} из {word['answers']} | "
+              f"p50 {word['latency_ms']['p50']:.0f} мс")
+    print("Подуровни по сложности:")
+    for sub_level in report["sub_levels"][:args.top]:
+        print(f"  {sub_level['sub_level']:<10} ошибки {sub_level['error_rate']:.1%} | "
+              f"таймауты {sub_level['timeout_rate']:.1%} | p50 {sub_level['latency_p50_ms']:.0f} мс")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# Модули игры лежат в корне репозитория
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+class MemoryPersistence:
+    # PersistenceService без диска и фонового потока
+    def __init__(self):
+        self.files = {}
+
+    def load(self, path, default=None):
+        return self.files.get(path, default)
+
+    def save(self, path, data):
+        self.files[path] = data
+
+
+@pytest.fixture
+def persistence():
+    return MemoryPersistence()
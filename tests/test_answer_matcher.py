@@ -0,0 +1,66 @@
+import random
+
+from answer_matcher import (PreparedAnswer, match_answer, osa_distance, pattern_masks, MATCH_EXACT, MATCH_CLOSE,
+                            MATCH_NONE)
+
+
+def reference_osa(a, b):
+    # Обычная динамика O(n*m) для сверки с битово-параллельной версией
+    d = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        d[i][0] = i
+    for j in range(len(b) + 1):
+        d[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def check(correct, answer, language="ru"):
+    return match_answer(PreparedAnswer(correct, language), answer, language)
+
+
+def test_exact_ignores_case_spaces_and_yo():
+    assert check("ёлка", "  ЕЛКА ") == MATCH_EXACT
+    assert check("ice cream", "Ice   Cream", "en") == MATCH_EXACT
+
+
+def test_diacritics_and_german_digraphs_are_close():
+    assert check("café", "cafe", "fr") == MATCH_CLOSE
+    assert check("Straße", "strasse", "de") == MATCH_EXACT  # casefold раскрывает ß
+    assert check("Mädchen", "maedchen", "de") == MATCH_CLOSE
+
+
+def test_russian_keeps_short_i_and_accepts_yo():
+    # Диакритика в русском не снимается: "й" и "и" — разные буквы
+    assert check("мой", "мои") == MATCH_NONE
+    assert check("йод", "иод") == MATCH_NONE
+    assert check("ёж", "еж") == MATCH_EXACT
+    assert check("еж", "ёж") == MATCH_EXACT
+    assert check("мой", "Мой") == MATCH_EXACT
+
+
+def test_typo_budget_grows_with_length():
+    assert check("кот", "кит") == MATCH_NONE  # короткие слова — без опечаток
+    assert check("собака", "сабака") == MATCH_CLOSE
+    assert check("собака", "сабаки") == MATCH_NONE
+    assert check("молоко", "моолко") == MATCH_CLOSE  # перестановка соседних букв
+    assert check("телевизор", "тилевизар") == MATCH_CLOSE
+    assert check("телевизор", "тилевизарр") == MATCH_NONE
+
+
+def test_empty_answer_never_matches():
+    assert check("собака", "") == MATCH_NONE
+    assert check("собака", "   ") == MATCH_NONE
+
+
+def test_osa_distance_matches_reference():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = "".join(rng.choice("абвг") for _ in range(rng.randint(1, 9)))
+        b = "".join(rng.choice("абвг") for _ in range(rng.randint(0, 9)))
+        assert osa_distance(a, pattern_masks(a), b) == reference_osa(a, b), (a, b)
@@ -0,0 +1,81 @@
+import time
+
+from kivy.clock import Clock
+
+from answer_timer import AnswerTimer
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_timer(clock):
+    events = {"expired": 0, "shown": []}
+
+    def on_expire():
+        events["expired"] += 1
+
+    timer = AnswerTimer(on_expire, events["shown"].append, clock=clock)
+    return timer, events
+
+
+def test_remaining_and_display_follow_deadline():
+    clock = FakeClock()
+    timer, events = make_timer(clock)
+    timer.start(30)
+    assert timer.is_running and timer.remaining() == 30.0
+    clock.now += 0.5
+    timer._display()
+    assert timer.remaining() == 29.5
+    clock.now += 28.6
+    timer._display()
+    # Цифры округляются вверх и передаются только при смене значения
+    assert events["shown"] == [30, 1]
+    timer.stop()
+
+
+def test_early_clock_event_waits_for_deadline_then_expires_once():
+    clock = FakeClock()
+    timer, events = make_timer(clock)
+    timer.start(10)
+    clock.now += 9.9
+    timer._expire(0)
+    assert events["expired"] == 0 and timer.is_running
+    clock.now += 0.2
+    timer._expire(0)
+    timer._expire(0)
+    assert events["expired"] == 1
+    assert not timer.is_running and timer.remaining() == 0.0
+    assert events["shown"][-1] == 0
+    assert timer.stop() is None
+
+
+def test_stop_returns_answer_latency():
+    clock = FakeClock()
+    timer, _ = make_timer(clock)
+    assert timer.stop() is None and timer.elapsed_ms() is None
+    timer.start(30)
+    clock.now += 1.25
+    assert timer.stop() == 1250.0
+    assert not timer.is_running
+    # Новый старт отсчитывает задержку заново
+    timer.start(30)
+    clock.now += 0.5
+    assert timer.elapsed_ms() == 500.0
+    timer.stop()
+
+
+def test_expires_through_kivy_clock():
+    expired = []
+    timer = AnswerTimer(lambda: expired.append(time.monotonic()))
+    started = time.monotonic()
+    timer.start(0.05)
+    while not expired and time.monotonic() - started < 2.0:
+        Clock.tick()
+        time.sleep(0.005)
+    assert expired and expired[0] - started >= 0.05
+    assert not timer.is_running
@@ -0,0 +1,41 @@
+from collections import Counter
+
+from deck_sampler import DeckSampler, _nth_unweighted
+from game_session import SESSION_SIZE
+
+
+def test_default_session_takes_whole_deck():
+    order = DeckSampler(20, seed=1).take(SESSION_SIZE)
+    assert sorted(order) == list(range(20))
+
+
+def test_take_returns_distinct_indices_within_deck():
+    order = DeckSampler(1000, seed=2).take(10)
+    assert len(order) == len(set(order)) == 10
+    assert all(0 <= index < 1000 for index in order)
+    assert sorted(DeckSampler(5, seed=2).take(10)) == list(range(5))
+
+
+def test_same_seed_repeats_order():
+    weights = {3: 4.0, 7: 4.0}
+    assert DeckSampler(50, seed=7).take(10, weights) == DeckSampler(50, seed=7).take(10, weights)
+    assert DeckSampler(50, seed=7).take(10) != DeckSampler(50, seed=8).take(10)
+
+
+def test_weighted_take_covers_deck_without_repeats():
+    weights = {0: 3.0, 5: 3.0, 19: 3.0, 40: 2.0, 7: 0}
+    order = DeckSampler(20, seed=3).take(None, weights)
+    assert sorted(order) == list(range(20))
+
+
+def test_weighted_words_are_picked_more_often():
+    counts = Counter()
+    for seed in range(2000):
+        counts.update(DeckSampler(20, seed=seed).take(2, {4: 5.0}))
+    others = sum(counts[index] for index in range(20) if index != 4) / 19
+    assert counts[4] > 3 * others
+
+
+def test_nth_unweighted_skips_weighted_indices():
+    weighted = [0, 2, 3, 6]
+    assert [_nth_unweighted(position, weighted) for position in range(5)] == [1, 4, 5, 7, 8]
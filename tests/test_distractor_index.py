@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from distractor_index import CHOICES, DistractorIndex, choice_options, np
+from game_session import GameSession, CORRECT, WRONG, CORRECT_POINTS, WRONG_PENALTY
+from word_store import WordStore
+from test_word_store import make_word, write_words
+
+PAIRS = [("собака", "dog"), ("кошка", "cat"), ("корова", "cow"), ("коза", "goat"), ("конь", "horse"),
+         ("собачка", "doggy")]
+
+
+@pytest.fixture
+def store(tmp_path):
+    data = {"A1": {"1": {"theme": "Животные", "words": [make_word(ru, en) for ru, en in PAIRS]}}}
+    store = WordStore.open(write_words(tmp_path / "words.json", data))
+    yield store
+    store.close()
+
+
+def play_choice_round(session, pick, rng):
+    # Как GameScreen: выбор варианта, затем "Дальше" той же кнопкой "Проверить";
+    # повторное нажатие и таймаут после ответа ничего не засчитывают
+    results = []
+    while not session.is_finished:
+        options = choice_options(session.current_word, "ru", rng=rng)
+        assert len(options) == CHOICES and session.correct_answer("ru") in options
+        results.append(session.answer_choice(pick(session, options), "ru", latency_ms=900.0))
+        assert session.answer("", "ru") is None
+        assert session.timeout() is None
+        session.next_word()
+    return results
+
+
+def test_perfect_choice_round_scores_full_and_three_stars(store):
+    words = store.get_words("A1", "1")
+    session = GameSession(words, rng=random.Random(4))
+    results = play_choice_round(session, lambda s, options: s.correct_answer("ru"), random.Random(4))
+    assert results == [CORRECT] * len(words)
+    assert session.score == CORRECT_POINTS * len(words)
+    assert session.calculate_stars() == 3
+    assert session.latencies_ms == [900.0] * len(words)
+
+
+def test_wrong_choices_are_penalized(store):
+    words = store.get_words("A1", "1")
+    session = GameSession(words, shuffle=False)
+    session.score = 20
+
+    def first_wrong(s, options):
+        return next(option for option in options if option != s.correct_answer("ru"))
+
+    results = play_choice_round(session, first_wrong, random.Random(5))
+    assert results == [WRONG] * len(words)
+    assert session.score == max(0, 20 - WRONG_PENALTY * len(words))
+    assert session.correct_answers == 0
+
+
+@pytest.mark.skipif(np is None, reason="индекс строится только с numpy")
+def test_index_offers_other_words_of_the_deck(store):
+    index = DistractorIndex.build(store)
+    words = store.get_words("A1", "1")
+    translations = {ru for ru, _ in PAIRS}
+    for word in words:
+        distractors = index.distractors(word, "ru", CHOICES - 1, random.Random(1))
+        assert distractors and word["translations"]["ru"] not in distractors
+        assert set(distractors) <= translations
+        options = choice_options(word, "ru", index, rng=random.Random(2))
+        assert len(options) == len(set(options)) == CHOICES
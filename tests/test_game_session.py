@@ -0,0 +1,95 @@
+import random
+
+from game_session import (GameSession, CORRECT, CLOSE, WRONG, TIMEOUT, CORRECT_POINTS, CLOSE_POINTS,
+                          HINT_PENALTY, calculate_stars)
+
+
+def make_words(*pairs):
+    return [{"word": en, "definitions": {"ru": f"определение {ru}"}, "translations": {"ru": ru, "en": en}}
+            for ru, en in pairs]
+
+
+WORDS = make_words(("собака", "dog"), ("кошка", "cat"), ("молоко", "milk"), ("хлеб", "bread"))
+
+
+def play(session, answer_for):
+    results = []
+    while not session.is_finished:
+        results.append(session.answer(answer_for(session), "ru"))
+        session.next_word()
+    return results
+
+
+def test_perfect_round_scores_full_and_three_stars():
+    session = GameSession(WORDS, rng=random.Random(1))
+    results = play(session, lambda s: s.correct_answer("ru"))
+    assert results == [CORRECT] * len(WORDS)
+    assert session.score == CORRECT_POINTS * len(WORDS)
+    assert session.correct_answers == len(WORDS)
+    assert session.calculate_stars() == 3
+
+
+def test_close_and_wrong_answers():
+    session = GameSession(WORDS, shuffle=False)
+    assert session.answer("собaка", "ru") == CLOSE  # латинская "a" — опечатка
+    session.next_word()
+    assert session.answer("собака", "ru") == WRONG
+    assert session.score == CLOSE_POINTS - 5
+    assert session.correct_answers == 1
+
+
+def test_word_is_scored_only_once():
+    session = GameSession(WORDS, shuffle=False)
+    assert session.answer("собака", "ru") == CORRECT
+    assert session.answer("собака", "ru") is None
+    assert session.answer_choice("собака", "ru") is None
+    assert session.timeout() is None
+    assert session.score == CORRECT_POINTS
+    assert session.correct_answers == 1
+
+
+def test_timeout_blocks_later_answer():
+    session = GameSession(WORDS, shuffle=False)
+    session.answer("собака", "ru")
+    session.next_word()
+    assert session.timeout(30000.0) == TIMEOUT
+    assert session.answer("кошка", "ru") is None
+    assert session.score == CORRECT_POINTS - 5
+    assert session.latencies_ms == [30000.0]
+
+
+def test_finished_session_ignores_answers():
+    session = GameSession(WORDS[:1], shuffle=False)
+    session.answer("собака", "ru")
+    assert not session.next_word()
+    assert session.answer("собака", "ru") is None
+    assert session.timeout() is None
+
+
+def test_hint_once_per_word():
+    session = GameSession(WORDS, shuffle=False)
+    session.score = 20
+    assert session.use_hint("ru") == "с"
+    assert session.use_hint("ru") is None
+    assert session.score == 20 - HINT_PENALTY
+    session.answer("собака", "ru")
+    session.next_word()
+    assert not session.hint_used
+
+
+def test_order_sample_and_restore():
+    session = GameSession(WORDS, order=[3, 1], word_ids=["a", "b", "c", "d"])
+    assert session.total_words == 2
+    assert session.current_word_id == "d"
+    session.restore(1, 15, 1, hint_used=True, latencies_ms=[1200.0])
+    assert session.current_word_id == "b"
+    assert (session.score, session.correct_answers, session.hint_used) == (15, 1, True)
+    assert session.answer("кошка", "ru") == CORRECT
+
+
+def test_calculate_stars_thresholds():
+    assert calculate_stars(0, 0, 0) == 0
+    assert calculate_stars(10, 10, 100) == 3
+    assert calculate_stars(7, 10, 70) == 2
+    assert calculate_stars(5, 10, 50) == 1
+    assert calculate_stars(9, 10, 40) == 0
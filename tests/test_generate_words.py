@@ -0,0 +1,71 @@
+import csv
+import json
+
+import pytest
+
+import generate_words
+from generate_words import BuildError, build, read_batches
+
+HEADER = ["level", "sub_level", "theme", "word", "definition_en", "definition_ru", "definition_de",
+          "definition_fr", "translation_ru", "translation_de", "translation_fr"]
+
+
+def word_row(word, translation, definition_en=None, level="A1"):
+    definition = f"A {word}"
+    return [level, "", "Tiere", word, definition_en or definition, definition, definition, definition,
+            translation, word, word]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def test_multiline_field_stays_in_one_record(tmp_path, monkeypatch):
+    # Граница пачки на каждой записи: многострочное поле не должно разрезаться
+    monkeypatch.setattr(generate_words, "BATCH_DIVISOR", 1)
+    source = tmp_path / "words.csv"
+    write_csv(source, [word_row("Hund", "собака", "A dog.\nMan's best friend."), word_row("Katze", "кошка")])
+    batches = list(read_batches(str(source)))
+    assert [lines for _, _, _, lines in batches] == [[2], [4]]
+    assert batches[0][2][0][4] == "A dog.\nMan's best friend."
+
+    output = tmp_path / "out.json"
+    stats = build([str(source)], str(output), cache_dir=str(tmp_path / "cache"), workers=1)
+    assert stats["errors"] == [] and stats["words"] == 2
+    words = json.loads(output.read_text(encoding="utf-8"))["A1"]["1"]["words"]
+    assert words[0]["definitions"]["en"] == "A dog. Man's best friend."
+
+
+def test_errors_report_first_line_of_record(tmp_path):
+    source = tmp_path / "words.csv"
+    write_csv(source, [word_row("Hund", "собака", "A dog.\nLoyal."), word_row("Katze", "кошка", level="Z9")])
+    stats = build([str(source)], str(tmp_path / "out.json"), cache_dir=str(tmp_path / "cache"), workers=1)
+    assert [(line, message) for _, line, message in stats["errors"]] == [(4, "неизвестный уровень 'Z9'")]
+
+
+def test_unterminated_quote_reports_line(tmp_path):
+    source = tmp_path / "words.csv"
+    source.write_text(",".join(HEADER) + "\nA1,,Tiere,Hund,\"A dog\nA1,,Tiere,Katze,A cat\n", encoding="utf-8")
+    with pytest.raises(BuildError, match=":3:"):
+        list(read_batches(str(source)))
+
+
+def test_malformed_jsonl_rows_are_line_errors(tmp_path):
+    good = {"level": "A1", "word": "Hund", "theme": "Tiere",
+            "definitions": {lang: "A dog." for lang in generate_words.DEFINITION_LANGS},
+            "translations": {"ru": "собака", "de": "Hund", "fr": "chien"}}
+    rows = [json.dumps(good), '["Katze"]', json.dumps(dict(good, word="Maus", definitions="A mouse.")),
+            json.dumps(dict(good, word="Kuh", translations=["корова"])), "{\"word\": ", "",
+            json.dumps(dict(good, word="Pferd", translations={"ru": "лошадь", "de": "Pferd", "fr": "cheval"}))]
+    source = tmp_path / "words.jsonl"
+    source.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    stats = build([str(source)], str(tmp_path / "out.json"), cache_dir=str(tmp_path / "cache"), workers=1)
+    errors = [(line, message) for _, line, message in stats["errors"]]
+    assert [line for line, _ in errors] == [2, 3, 4, 5]
+    assert errors[0][1] == "запись должна быть объектом"
+    assert errors[1][1] == "поле definitions должно быть объектом"
+    assert errors[2][1] == "поле translations должно быть объектом"
+    assert stats["words"] == 2
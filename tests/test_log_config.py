@@ -0,0 +1,49 @@
+import json
+import logging
+
+import pytest
+
+from log_config import LOG_LEVEL_ENV, resolve_level
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.delenv(LOG_LEVEL_ENV, raising=False)
+
+    def write(content):
+        path = tmp_path / "settings.json"
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+        return str(path)
+    return write
+
+
+def test_env_beats_settings(settings, monkeypatch):
+    path = settings({"log_level": "WARNING"})
+    monkeypatch.setenv(LOG_LEVEL_ENV, "debug")
+    assert resolve_level(path) == logging.DEBUG
+
+
+def test_settings_beat_default(settings):
+    assert resolve_level(settings({"log_level": "error"})) == logging.ERROR
+    assert resolve_level(settings({"log_level": "NOTSET"})) == logging.NOTSET
+
+
+def test_default_without_env_and_settings(settings, tmp_path):
+    assert resolve_level() == logging.INFO
+    assert resolve_level(str(tmp_path / "missing.json")) == logging.INFO
+    assert resolve_level(settings({"timer_duration": 30})) == logging.INFO
+
+
+def test_broken_settings_fall_back_to_default(settings):
+    assert resolve_level(settings("{")) == logging.INFO
+    assert resolve_level(settings(["DEBUG"])) == logging.INFO
+
+
+def test_invalid_level_names_are_skipped(settings, monkeypatch):
+    path = settings({"log_level": "verbose"})
+    assert resolve_level(path) == logging.INFO
+    monkeypatch.setenv(LOG_LEVEL_ENV, "LOUD")
+    assert resolve_level(path) == logging.INFO
+    # Неизвестное имя в окружении не перекрывает корректное значение из settings.json
+    assert resolve_level(settings({"log_level": "WARNING"})) == logging.WARNING
+    assert resolve_level(settings({"log_level": 10})) == logging.INFO
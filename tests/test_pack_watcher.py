@@ -0,0 +1,103 @@
+import json
+import os
+
+import pack_watcher
+from distractor_index import CACHE_SUFFIX, DistractorIndex, np
+from pack_watcher import PackWatcher
+from word_store import WordStore, default_store_path
+from test_word_store import make_word, write_words
+
+
+def edit_words(path, mtime_ns, ru="пёс"):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["A1"]["1"]["words"][0]["translations"]["ru"] = ru
+    write_words(path, data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_compiles_new_version_next_to_open_store(tmp_path):
+    source_path = tmp_path / "words.json"
+    source = write_words(source_path)
+    store = WordStore.open(source)
+    store.get_words("A1", "1")
+    store.get_words("A1", "2")
+    # Как приложение: индекс вариантов строится для каждой версии хранилища
+    indexes = [DistractorIndex.load_or_build(store)]
+    reloads = []
+    watcher = PackWatcher(source, store, lambda new, changed: reloads.append((new, changed)))
+
+    edit_words(source_path, 1)
+    changed = watcher.check()
+    new, _ = reloads[0]
+    indexes.append(DistractorIndex.load_or_build(new))
+    assert changed == {("A1", "1")}
+    # Открытый файл не перезаписан, новая версия лежит отдельно
+    assert store.get_words("A1", "1")[0]["translations"]["ru"] == "собака"
+    assert new.store_path != store.store_path and os.path.exists(new.store_path)
+
+    # Подмена на UI-потоке: кэш переносится, изменённый подуровень раскодирован заново
+    new.adopt_cache(store, changed)
+    assert sorted(new.cached_keys()) == [("A1", "1"), ("A1", "2")]
+    assert new.get_words("A1", "1")[0]["translations"]["ru"] == "пёс"
+    store.close()
+    assert os.path.exists(default_store_path(source))
+
+    edit_words(source_path, 2, ru="собака")
+    watcher.check()
+    newer, _ = reloads[1]
+    indexes.append(DistractorIndex.load_or_build(newer))
+    new.close()
+    assert not os.path.exists(new.store_path)
+    newer.close()
+    # Кэш индекса вариантов один, рядом с основным хранилищем, и соответствует последней версии
+    cache = ["words" + CACHE_SUFFIX] if np is not None else []
+    assert sorted(os.listdir(tmp_path)) == sorted(["words.json", "words.store"] + cache)
+    if np is not None:
+        assert indexes[-1].source_hash == newer.header["source_hash"] != indexes[1].source_hash
+        assert DistractorIndex.load(str(tmp_path / cache[0]), newer) is not None
+
+
+def test_unchanged_content_is_not_reloaded(tmp_path):
+    source_path = tmp_path / "words.json"
+    source = write_words(source_path)
+    store = WordStore.open(source)
+    watcher = PackWatcher(source, store, lambda new, changed: None)
+    os.utime(source_path, ns=(5, 5))
+    assert watcher.check() is None
+    assert watcher.reloads == 0
+    store.close()
+
+
+def test_reload_in_memory_when_store_dir_is_read_only(tmp_path, monkeypatch):
+    source_path = tmp_path / "words.json"
+    source = write_words(source_path)
+    store = WordStore.open(source)
+    reloads = []
+    watcher = PackWatcher(source, store, lambda new, changed: reloads.append(new))
+
+    def read_only(source_path, store_path=None):
+        raise PermissionError(13, "Read-only file system", store_path)
+
+    monkeypatch.setattr(pack_watcher, "compile_store", read_only)
+    data = json.loads(source_path.read_text(encoding="utf-8"))
+    data["A2"]["1"]["words"].append(make_word("окно", "window"))
+    write_words(source_path, data)
+    assert watcher.check() == {("A2", "1")}
+    assert reloads[0].store_path is None
+    assert reloads[0].word_count("A2", "1") == 2
+    store.close()
+
+
+def test_stale_versions_are_removed_on_start(tmp_path):
+    source = write_words(tmp_path / "words.json")
+    store = WordStore.open(source)
+    leftovers = [tmp_path / "words.reload-1-3.store", tmp_path / "words.reload-1-3.distractors.npz",
+                 tmp_path / "words.reload-1-4.store.tmp"]
+    for leftover in leftovers:
+        leftover.write_bytes(b"")
+    watcher = PackWatcher(source, store, lambda new, changed: None, interval=60)
+    watcher.start()
+    watcher.stop()
+    assert not any(leftover.exists() for leftover in leftovers)
+    assert os.path.exists(store.store_path)
+    store.close()
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+import pytest
+
+import persistence
+from persistence import PersistenceService, atomic_write_json
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    # Перехват записей сервиса: (путь, данные) по порядку
+    calls = []
+    original = persistence.atomic_write_json
+
+    def recording(path, data):
+        calls.append((path, data))
+        original(path, data)
+
+    monkeypatch.setattr(persistence, "atomic_write_json", recording)
+    return calls
+
+
+def test_repeated_saves_coalesce_into_one_write(tmp_path, writes):
+    path = str(tmp_path / "progress.json")
+    service = PersistenceService(debounce=0.1, max_delay=5.0)
+    try:
+        for i in range(20):
+            service.save(path, {"n": i})
+        assert wait_for(lambda: writes)
+        time.sleep(0.2)
+        assert writes == [(path, {"n": 19})]
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"n": 19}
+    finally:
+        service.stop()
+
+
+def test_max_delay_bounds_a_steady_stream_of_changes(tmp_path, writes):
+    path = str(tmp_path / "settings.json")
+    service = PersistenceService(debounce=0.2, max_delay=0.3)
+    try:
+        started = time.monotonic()
+        i = 0
+        while not writes and time.monotonic() - started < 3.0:
+            service.save(path, {"n": i})
+            i += 1
+            time.sleep(0.02)
+        assert writes and time.monotonic() - started < 1.5
+    finally:
+        service.stop()
+
+
+def test_load_returns_pending_data(tmp_path):
+    path = str(tmp_path / "user.json")
+    atomic_write_json(path, {"name": "старое"})
+    service = PersistenceService(debounce=60.0, max_delay=60.0)
+    try:
+        assert service.load(path) == {"name": "старое"}
+        service.save(path, {"name": "новое"})
+        assert service.load(path) == {"name": "новое"}
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"name": "старое"}
+        assert service.load(str(tmp_path / "missing.json"), default={}) == {}
+    finally:
+        service.stop()
+
+
+def test_stop_flushes_pending_writes(tmp_path):
+    service = PersistenceService(debounce=60.0, max_delay=60.0)
+    paths = [str(tmp_path / "progress.json"), str(tmp_path / "settings.json")]
+    for number, path in enumerate(paths):
+        service.save(path, {"n": number})
+    service.stop()
+    for number, path in enumerate(paths):
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"n": number}
+
+
+def test_failed_write_keeps_old_file_and_no_temp(tmp_path, monkeypatch):
+    path = str(tmp_path / "progress.json")
+    atomic_write_json(path, {"n": 1})
+
+    def broken_replace(src, dst):
+        raise OSError("диск отключён")
+
+    monkeypatch.setattr(os, "replace", broken_replace)
+    with pytest.raises(OSError):
+        atomic_write_json(path, {"n": 2})
+    monkeypatch.undo()
+    assert os.listdir(tmp_path) == ["progress.json"]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"n": 1}
+
+
+def test_failed_write_is_logged_and_service_keeps_running(tmp_path, caplog):
+    service = PersistenceService(debounce=60.0, max_delay=60.0)
+    good = str(tmp_path / "good.json")
+    service.save(str(tmp_path / "missing_dir" / "bad.json"), {"n": 1})
+    service.save(good, {"n": 2})
+    service.flush()
+    service.stop()
+    assert "Ошибка сохранения" in caplog.text
+    with open(good, encoding="utf-8") as f:
+        assert json.load(f) == {"n": 2}
+    assert sorted(os.listdir(tmp_path)) == ["good.json"]
@@ -0,0 +1,49 @@
+from progress_store import ProgressStore
+
+LAYOUT = {"A1": ["1", "2"], "A2": ["1", "2"]}
+
+
+def make_store(persistence, completed=None):
+    persistence.files["progress.json"] = {"completed_sub_levels": completed or {}}
+    store = ProgressStore(persistence, "progress.json")
+    store.set_layout(LAYOUT)
+    return store
+
+
+def test_fresh_progress_opens_only_first_sub_level(persistence):
+    store = make_store(persistence)
+    assert store.is_sub_level_unlocked("A1", "1")
+    assert not store.is_sub_level_unlocked("A1", "2")
+    assert not store.is_level_unlocked("A2")
+    assert store.next_tasks(2) == [("A1", "1"), ("A1", "2")]
+
+
+def test_next_level_opens_after_whole_level(persistence):
+    store = make_store(persistence, {"A1": {"1": 3}})
+    assert store.is_sub_level_unlocked("A1", "2")
+    assert not store.is_sub_level_unlocked("A2", "1")
+    store.record_result("A1", "2", 2)
+    assert store.is_level_completed("A1")
+    assert store.is_sub_level_unlocked("A2", "1")
+    assert store.current_cefr_level == "A2"
+    assert store.level_summary("A1") == {"total": 2, "completed": 2, "stars": 5}
+    assert store.next_tasks(3) == [("A2", "1"), ("A2", "2")]
+
+
+def test_record_result_saves_and_notifies(persistence):
+    store = make_store(persistence)
+    events = []
+    store.subscribe(lambda *args: events.append(args))
+    store.record_result("A1", 1, 2)
+    store.record_result("A1", "1", 2)  # тот же результат — без уведомления
+    store.record_result("A1", "1", 3)
+    assert events == [("A1", "1", 2), ("A1", "1", 3)]
+    assert persistence.files["progress.json"]["completed_sub_levels"] == {"A1": {"1": 3}}
+    assert store.level_summary("A1")["stars"] == 3
+    assert store.level_summary("A1")["completed"] == 1
+
+
+def test_sub_level_outside_layout_uses_number_rule(persistence):
+    store = make_store(persistence, {"B1": {"1": 1}})
+    assert store.is_sub_level_unlocked("B1", "2")
+    assert not store.is_sub_level_unlocked("B1", "3")
@@ -0,0 +1,97 @@
+from review_scheduler import (ReviewScheduler, DAY, DEFAULT_EASE, MIN_EASE, QUALITY_CORRECT, QUALITY_WITH_HINT,
+                              QUALITY_WRONG)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_intervals_grow_on_correct_answers(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    intervals = [scheduler.record_answer("A1_1_собака", QUALITY_CORRECT).interval for _ in range(4)]
+    assert intervals[:2] == [1.0, 6.0]
+    assert intervals[2] > intervals[1] and intervals[3] > intervals[2]
+    card = scheduler.cards["A1_1_собака"]
+    assert card.due == clock.now + card.interval * DAY
+
+
+def test_wrong_answer_resets_card_and_lowers_ease(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    scheduler.record_answer("w", QUALITY_CORRECT)
+    card = scheduler.record_answer("w", QUALITY_WRONG)
+    assert (card.reps, card.lapses, card.interval, card.due) == (0, 1, 0.0, clock.now)
+    assert card.ease < DEFAULT_EASE
+    for _ in range(20):
+        scheduler.record_answer("w", QUALITY_WRONG)
+    assert card.ease == MIN_EASE
+
+
+def test_pick_due_returns_most_overdue_first(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    scheduler.record_answer("later", QUALITY_CORRECT)
+    scheduler.record_answer("hint", QUALITY_WITH_HINT)
+    clock.now += 10
+    scheduler.record_answer("wrong", QUALITY_WRONG)
+    clock.now -= 20
+    scheduler.record_answer("earliest", QUALITY_WRONG)
+    clock.now += 20
+    assert scheduler.pick_due(2) == ["earliest", "wrong"]
+    # Выбор не снимает карточки с очереди
+    assert scheduler.pick_due(2) == ["earliest", "wrong"]
+    # Карточки с будущим сроком не попадают в выборку
+    assert scheduler.pick_due(10) == ["earliest", "wrong"]
+
+
+def test_nothing_due_until_interval_passes(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    for i in range(15):
+        scheduler.record_answer(f"w{i}", QUALITY_CORRECT)
+    assert scheduler.pick_due(10) == []
+    clock.now += DAY
+    assert len(scheduler.pick_due(10)) == 10
+
+
+def test_pick_weak_prefers_low_ease_and_lapses(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    for word_id in ("easy", "hint", "lapsed", "shaky"):
+        scheduler.record_answer(word_id, QUALITY_CORRECT)
+    scheduler.record_answer("hint", QUALITY_WITH_HINT)
+    scheduler.record_answer("lapsed", QUALITY_WRONG)
+    scheduler.record_answer("lapsed", QUALITY_CORRECT)
+    scheduler.record_answer("shaky", QUALITY_WRONG)
+    scheduler.record_answer("shaky", QUALITY_CORRECT)
+    scheduler.record_answer("shaky", QUALITY_WRONG)
+    scheduler.record_answer("shaky", QUALITY_CORRECT)
+    assert scheduler.pick_due(10) == []
+    # Пустые места разминки заполняются самыми трудными карточками, даже если ни одна не просрочена
+    assert scheduler.pick_weak(3) == ["shaky", "lapsed", "hint"]
+    assert scheduler.pick_weak(2, exclude={"shaky"}) == ["lapsed", "hint"]
+
+
+def test_rescheduled_card_is_not_picked_twice(persistence):
+    scheduler = ReviewScheduler(persistence, "review.json", clock=FakeClock())
+    for _ in range(100):
+        scheduler.record_answer("w", QUALITY_WRONG)
+    assert scheduler.pick_due(5) == ["w"]
+
+
+def test_save_and_reload(persistence):
+    clock = FakeClock()
+    scheduler = ReviewScheduler(persistence, "review.json", clock=clock)
+    scheduler.save()
+    assert "review.json" not in persistence.files  # нечего сохранять
+    scheduler.record_answer("w", QUALITY_CORRECT)
+    scheduler.save()
+    assert not scheduler.dirty
+    restored = ReviewScheduler(persistence, "review.json", clock=clock)
+    assert "w" in restored and len(restored) == 1
+    assert restored.cards["w"].to_list() == scheduler.cards["w"].to_list()
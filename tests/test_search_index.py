@@ -0,0 +1,48 @@
+from search_index import SearchIndex, TOP_K
+
+
+def entry(key, ru, definition="", en=""):
+    return key, {"translations": {"ru": ru, "en": en or ru}, "definitions": {"ru": definition}}
+
+
+def make_index():
+    index = SearchIndex()
+    index.add_block(("A1", "1"), [
+        entry("A1_1_собака", "собака", "домашнее животное", "dog"),
+        entry("A1_1_кошка", "кошка", "животное, ловит мышей", "cat"),
+        entry("A1_1_собор", "собор", "большой храм", "cathedral"),
+    ])
+    return index
+
+
+def test_prefix_ranks_translation_above_definition():
+    index = make_index()
+    assert index.search("соб") == ["A1_1_собор", "A1_1_собака"]
+    assert index.search("животное")[:2] == ["A1_1_собака", "A1_1_кошка"]
+    assert index.search("dog", "en") == ["A1_1_собака"]
+
+
+def test_typo_and_multiword_queries():
+    index = make_index()
+    assert index.search("сабака")[0] == "A1_1_собака"
+    assert index.search("животное мышей") == ["A1_1_кошка"]
+    assert index.search("   ") == []
+
+
+def test_add_block_is_idempotent():
+    index = make_index()
+    index.add_block(("A1", "1"), [entry("A1_1_дом", "дом")])
+    assert len(index) == 3
+    assert index.has_block(("A1", "1"))
+
+
+def test_filtered_search_applies_limit_after_filter():
+    # Больше TOP_K слов с общим префиксом: нужные фильтру слова не входят в лучшие
+    index = SearchIndex()
+    words = [entry(f"A1_1_слово{i:03d}", f"слово{i:03d}") for i in range(TOP_K * 3)]
+    index.add_block(("A1", "1"), words)
+    wanted = {key for key, _ in words[-5:]}
+    assert not wanted & set(index.search("слово", limit=TOP_K))
+    found = index.search("слово", limit=3, docs=index.doc_set(wanted))
+    assert len(found) == 3 and set(found) <= wanted
+    assert set(index.search("слово", limit=50, docs=index.doc_set(wanted))) == wanted
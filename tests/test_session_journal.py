@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from session_journal import (SessionJournal, FSYNC_NEVER, block_hashes, blocks_changed, read_journal,
+                             resume_position, word_positions)
+from word_store import WordStore
+from test_word_store import make_word, write_words
+
+
+@pytest.fixture
+def store(tmp_path):
+    data = {"A1": {
+        "1": {"theme": "Животные", "words": [make_word("собака", "dog"), make_word("кошка", "cat"),
+                                             make_word("собака", "hound")]},
+        "2": {"theme": "Еда", "words": [make_word("хлеб", "bread")]},
+    }}
+    store = WordStore.open(write_words(tmp_path / "words.json", data))
+    yield store
+    store.close()
+
+
+def start_record(store, words):
+    positions = word_positions(words)
+    return {"session": "s1", "level": None, "sub_level": None, "theme": None, "seed": 1,
+            "words": positions, "blocks": block_hashes(positions, store.block_hash)}
+
+
+def test_answers_and_hint_replay_after_crash(tmp_path, store):
+    path = str(tmp_path / "journal.jsonl")
+    block = store.get_words("A1", "1")
+    journal = SessionJournal(path, fsync=FSYNC_NEVER)
+    journal.begin(start_record(store, [block[2], block[0]]))
+    journal.answer(0, "correct", 10, 1, False, 812.34)
+    journal.hint(1, 5)
+    # Сбой посреди записи: последняя строка оборвана
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t":"answer","i":1,')
+
+    state = read_journal(path)
+    assert state["start"]["words"] == [["A1", "1", 2], ["A1", "1", 0]]
+    assert (state["score"], state["correct_answers"], state["hint_used"]) == (5, 1, True)
+    assert state["latencies_ms"] == [812.3]
+    assert resume_position(state) == 1
+    journal.close()
+
+
+def test_compaction_keeps_start_and_state(tmp_path, store):
+    path = str(tmp_path / "journal.jsonl")
+    block = store.get_words("A1", "2")
+    journal = SessionJournal(path, fsync=FSYNC_NEVER, compact_every=3)
+    journal.begin(start_record(store, [block[0]] * 5))
+    for index in range(5):
+        journal.answer(index, "correct", 10 * (index + 1), index + 1, False, 100.0)
+    journal.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) <= 4
+    state = read_journal(path)
+    assert state["start"]["blocks"] == journal.state["start"]["blocks"]
+    assert (state["index"], state["score"], state["answered"]) == (4, 50, True)
+    assert resume_position(state) == 5
+
+
+def test_positions_tell_apart_repeated_translations(store):
+    block = store.get_words("A1", "1")
+    assert block.ids == ["A1_1_собака", "A1_1_кошка", "A1_1_собака#2"]
+    assert word_positions([block[2]]) == [["A1", "1", 2]]
+    assert store.get_word("A1_1_собака#2")["word"] == "hound"
+
+
+def test_changed_block_refuses_resume(tmp_path, store):
+    start = start_record(store, [store.get_words("A1", "1")[1], store.get_words("A1", "2")[0]])
+    assert [level_sub[:2] for level_sub in start["blocks"]] == [["A1", "1"], ["A1", "2"]]
+    assert not blocks_changed(start, store.block_hash)
+
+    data = json.loads((tmp_path / "words.json").read_text(encoding="utf-8"))
+    data["A1"]["1"]["words"].insert(0, make_word("конь", "horse"))
+    changed = WordStore.open(write_words(tmp_path / "words.json", data))
+    try:
+        assert blocks_changed(start, changed.block_hash)
+    finally:
+        changed.close()
+    assert blocks_changed({"words": []}, store.block_hash)
+    assert blocks_changed(dict(start, blocks=[["B2", "9", "0"]]), store.block_hash)
+
+
+def test_finish_removes_journal(tmp_path, store):
+    path = tmp_path / "journal.jsonl"
+    journal = SessionJournal(str(path), fsync=FSYNC_NEVER)
+    journal.begin(start_record(store, store.get_words("A1", "2")[:1]))
+    journal.finish()
+    assert not path.exists()
+    assert read_journal(str(path)) is None
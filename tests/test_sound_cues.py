@@ -0,0 +1,85 @@
+import os
+import wave
+
+from sound_cues import CORRECT, CUES, LEVEL_COMPLETE, TIMEOUT, WRONG, SoundCues, cue_path, generate_tones
+
+
+class StubPlayer:
+    def __init__(self, path, length=0.2):
+        self.path = path
+        self.length = length
+        self.state = "stop"
+        self.plays = 0
+        self.unloaded = False
+
+    def play(self):
+        self.state = "play"
+        self.plays += 1
+
+    def stop(self):
+        self.state = "stop"
+
+    def unload(self):
+        self.unloaded = True
+
+
+class StubLoader:
+    # Плееры по пути; failing — сигналы, чьи клипы "не загружаются"
+    def __init__(self, failing=(), raising=()):
+        self.failing = failing
+        self.raising = raising
+        self.players = []
+
+    def __call__(self, path):
+        cue = os.path.splitext(os.path.basename(path))[0]
+        if cue in self.raising:
+            raise RuntimeError("нет декодера")
+        player = StubPlayer(path, length=0 if cue in self.failing else 0.2)
+        self.players.append(player)
+        return player
+
+
+def test_generated_tones_are_valid_wav(tmp_path):
+    created = generate_tones(str(tmp_path))
+    assert sorted(created) == sorted(cue_path(str(tmp_path), cue) for cue in CUES)
+    with wave.open(cue_path(str(tmp_path), CORRECT), "rb") as f:
+        assert (f.getnchannels(), f.getsampwidth()) == (1, 2) and f.getnframes() > 0
+    assert generate_tones(str(tmp_path)) == []
+
+
+def test_play_rotates_through_pool(tmp_path):
+    loader = StubLoader()
+    sounds = SoundCues(str(tmp_path), pool_size=2, loader=loader)
+    assert not sounds.play(CORRECT)
+    sounds.preload(background=False)
+    assert sounds.is_ready
+    pool = sounds._pool[CORRECT]
+    assert len(pool) == 2
+    for _ in range(3):
+        assert sounds.play(CORRECT, input_time=0.0)
+    assert [player.plays for player in pool] == [2, 1]
+    assert len(sounds.latencies_ms) == 3
+    assert sounds.latency_summary()["count"] == 3
+    sounds.unload()
+    assert all(player.unloaded for player in loader.players)
+    assert not sounds.play(CORRECT)
+
+
+def test_failed_clips_are_skipped(tmp_path):
+    loader = StubLoader(failing=(WRONG,), raising=(TIMEOUT,))
+    sounds = SoundCues(str(tmp_path), loader=loader)
+    sounds.preload(background=False)
+    assert sorted(sounds._pool) == sorted([CORRECT, LEVEL_COMPLETE])
+    assert not sounds.play(WRONG)
+    assert not sounds.play(TIMEOUT)
+    assert sounds.play(LEVEL_COMPLETE)
+    assert sounds.latency_summary() is None
+
+
+def test_unwritable_directory_leaves_sounds_silent(tmp_path):
+    blocker = tmp_path / "sounds"
+    blocker.write_text("не каталог", encoding="utf-8")
+    sounds = SoundCues(str(blocker), loader=StubLoader())
+    sounds.preload(background=False)
+    assert not sounds.is_ready
+    assert not sounds.play(CORRECT)
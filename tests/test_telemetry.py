@@ -0,0 +1,66 @@
+import gzip
+import json
+import os
+import time
+
+from telemetry import EVENT_FIELDS, SCHEMA_VERSION, SEGMENT_SUFFIX, TelemetryRecorder, write_segment
+
+
+def read_segments(directory):
+    # -> [(заголовок, события)] по сегментам в порядке имён
+    segments = []
+    for name in sorted(os.listdir(directory)):
+        assert name.endswith(SEGMENT_SUFFIX), name
+        with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        segments.append((json.loads(lines[0]), [json.loads(line) for line in lines[1:]]))
+    return segments
+
+
+def record(recorder, number):
+    recorder.record("s1", f"A1_1_слово{number}", "ru", 1000.0 + number, "correct", False, False)
+
+
+def test_full_ring_drops_oldest_events(tmp_path):
+    directory = str(tmp_path / "telemetry")
+    recorder = TelemetryRecorder("device", directory, capacity=4, flush_interval=60.0)
+    # Пока запись занята, фоновый поток не может опустошить буфер
+    with recorder._write_lock:
+        for number in range(10):
+            record(recorder, number)
+        assert len(recorder) == 4
+        assert recorder.dropped == 6
+    recorder.stop()
+    events = [event for _, segment in read_segments(directory) for event in segment]
+    assert [event[2] for event in events] == [f"A1_1_слово{number}" for number in range(6, 10)]
+
+
+def test_half_full_buffer_rotates_into_gzip_segments(tmp_path):
+    directory = str(tmp_path / "telemetry")
+    recorder = TelemetryRecorder("device", directory, capacity=8, flush_interval=60.0)
+    for number in range(4):
+        record(recorder, number)
+    deadline = time.monotonic() + 3.0
+    while recorder.segments_written < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert recorder.segments_written == 1
+    for number in range(4, 6):
+        record(recorder, number)
+    recorder.stop()
+
+    segments = read_segments(directory)
+    assert len(segments) == 2 and recorder.dropped == 0
+    for header, _ in segments:
+        assert header == {"schema": SCHEMA_VERSION, "device": "device", "fields": list(EVENT_FIELDS)}
+    # Имена сегментов упорядочены только до секунды
+    assert sorted(len(events) for _, events in segments) == [2, 4]
+    first = next(events for _, events in segments if len(events) == 4)
+    event = dict(zip(EVENT_FIELDS, first[0]))
+    assert event["word_id"] == "A1_1_слово0" and event["latency_ms"] == 1000.0 and event["result"] == "correct"
+
+
+def test_write_segment_leaves_no_temp_files(tmp_path):
+    directory = str(tmp_path / "telemetry")
+    name = write_segment(directory, "device", [(1.0, "s", "A1_1_кот", "ru", 900.0, "wrong", True, False)])
+    assert os.listdir(directory) == [name]
+    assert name.startswith("device-") and name.endswith(SEGMENT_SUFFIX)
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from telemetry import write_segment
+from telemetry_report import (ANSWERS, TIMEOUT, WRONG, build_report, find_segments, load_summary,
+                              merge_summaries)
+
+
+def event(word_id, result, latency_ms=1000.0, hint=False):
+    return (1.0, "s1", word_id, "ru", latency_ms, result, hint, result == "timeout")
+
+
+def report_for(directory, **kwargs):
+    summaries = [load_summary(path)[:4] for path in find_segments([str(directory)])]
+    return merge_summaries(summaries), build_report(*merge_summaries(summaries), **kwargs)
+
+
+def test_segments_merge_into_word_and_sub_level_report(tmp_path):
+    write_segment(str(tmp_path), "phone", [event("A1_1_кот", "wrong"), event("A1_1_кот", "correct"),
+                                           event("A1_2_дом", "correct", 500.0)])
+    write_segment(str(tmp_path), "tablet", [event("A1_1_кот", "timeout", 30000.0), event("A1_1_пёс", "close"),
+                                            event("A1_2_дом", "correct", hint=True)])
+    (word_ids, counts, _), report = report_for(tmp_path, min_answers=1)
+
+    assert word_ids.tolist() == ["A1_1_кот", "A1_1_пёс", "A1_2_дом"]
+    assert counts[0, ANSWERS] == 3 and counts[0, WRONG] == 1 and counts[0, TIMEOUT] == 1
+    assert report["answers"] == 6 and report["words"] == 3
+    assert report["error_rate"] == round(2 / 6, 4)
+    assert report["unknown_word_answers"] == 0
+    hardest = report["hardest_words"][0]
+    assert hardest["word_id"] == "A1_1_кот" and hardest["error_rate"] == round(2 / 3, 4)
+    assert [row["sub_level"] for row in report["sub_levels"]] == ["A1_1", "A1_2"]
+    assert report["sub_levels"][0]["timeout_rate"] == 0.25
+    dom = next(word for word in report["hardest_words"] if word["word_id"] == "A1_2_дом")
+    assert dom["hint_rate"] == 0.5
+    assert 400 < report["latency_ms"]["p50"] < 1200
+
+
+def test_events_without_word_are_counted_separately(tmp_path):
+    write_segment(str(tmp_path), "phone", [event(None, "wrong"), event("None", "wrong"), event("broken", "correct"),
+                                           event("A1_1_кот", "correct")])
+    _, report = report_for(tmp_path, min_answers=1)
+    assert report["answers"] == 4
+    assert report["unknown_word_answers"] == 3
+    assert [word["word_id"] for word in report["hardest_words"]] == ["A1_1_кот"]
+    assert [row["sub_level"] for row in report["sub_levels"]] == ["A1_1"]
+
+
+def test_summary_cache_is_reused(tmp_path):
+    write_segment(str(tmp_path), "phone", [event("A1_1_кот", "correct")])
+    [path] = find_segments([str(tmp_path)])
+    assert load_summary(path)[4] is False
+    assert load_summary(path)[4] is True
@@ -0,0 +1,35 @@
+from kivy.event import EventDispatcher
+from kivy.properties import ColorProperty
+
+from theme import DEFAULT_THEME, THEMES, Theme
+
+
+class Label(EventDispatcher):
+    # Виджет с цветом, привязанным к теме, как в wordgame.kv
+    color = ColorProperty((0, 0, 0, 0))
+
+
+def test_apply_updates_bound_properties():
+    theme = Theme()
+    label = Label()
+    theme.bind(text=lambda _, value: setattr(label, "color", value))
+    changes = []
+    theme.bind(background=lambda _, value: changes.append(list(value)))
+
+    theme.apply("dark")
+    assert theme.name == "dark"
+    assert list(label.color) == list(THEMES["dark"]["text"])
+    assert changes == [list(THEMES["dark"]["background"])]
+    for key, color in THEMES["dark"].items():
+        assert list(getattr(theme, key)) == list(color)
+
+    theme.apply("light")
+    assert list(label.color) == list(THEMES["light"]["text"])
+
+
+def test_unknown_theme_falls_back_to_default():
+    theme = Theme()
+    theme.apply("dark")
+    theme.apply("neon")
+    assert theme.name == DEFAULT_THEME
+    assert list(theme.background) == list(THEMES[DEFAULT_THEME]["background"])
@@ -0,0 +1,53 @@
+import pytest
+
+from theme_index import ThemeIndex, theme_tags
+from word_store import WordStore
+from test_word_store import make_word, write_words
+
+
+@pytest.fixture
+def store(tmp_path):
+    data = {
+        "A1": {
+            "1": {"theme": "Животные", "words": [make_word(f"зверь{i}") for i in range(3)]},
+            "2": {"theme": "Еда, Дом", "words": [make_word(f"еда{i}") for i in range(2)]},
+        },
+        "A2": {
+            "1": {"theme": "животные", "words": [make_word(f"зверюга{i}") for i in range(4)]},
+            "2": {"theme": "Пустая", "words": []},
+        },
+    }
+    store = WordStore.open(write_words(tmp_path / "words.json", data))
+    yield store
+    store.close()
+
+
+def test_tags_span_levels_and_skip_empty_blocks(store):
+    index = ThemeIndex.build(store)
+    assert theme_tags(" Еда ,  Дом,") == ["еда", "дом"]
+    assert index.themes() == ["животные", "дом", "еда"]
+    assert index.word_count("животные") == 7 and index.word_count("еда") == 2
+    assert "пустая" not in index and index.word_count("пустая") == 0
+
+
+def test_locate_maps_numbers_back_to_block_words(store):
+    index = ThemeIndex.build(store)
+    keys = []
+    for number in range(index.word_count("животные")):
+        level, sub_level, position = index.locate("животные", number)
+        keys.append(store.get_words(level, sub_level).ids[position])
+    assert keys == [f"A1_1_зверь{i}" for i in range(3)] + [f"A2_1_зверюга{i}" for i in range(4)]
+    assert index.locate("дом", 1) == ("A1", "2", 1)
+
+
+def test_seeded_sample_is_repeatable_and_covers_sub_levels(store):
+    index = ThemeIndex.build(store)
+    positions, seed = index.sample("животные", 5, seed=11)
+    assert index.sample("животные", 5, seed=seed) == (positions, 11)
+    assert len(set(positions)) == 5
+    for level, sub_level, position in positions:
+        assert 0 <= position < store.word_count(level, sub_level)
+
+    everything, _ = index.sample("животные", 100, seed=3)
+    assert {(level, sub_level) for level, sub_level, _ in everything} == {("A1", "1"), ("A2", "1")}
+    assert len(everything) == 7
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def trace(monkeypatch):
+    # Включает запись интервалов на время теста, не трогая общий буфер
+    def enable(enabled):
+        monkeypatch.setattr(tracing, "ENABLED", enabled)
+        monkeypatch.setattr(tracing, "_events", [])
+        monkeypatch.setattr(tracing, "_thread_names", {})
+        return tracing._events
+    return enable
+
+
+def test_disabled_spans_are_no_ops(trace):
+    events = trace(False)
+    assert tracing.span("json.load", "io", path="x") is tracing._NULL_SPAN
+    with tracing.span("json.load"):
+        pass
+    assert tracing.begin("screen.transition") is None
+    tracing.end(None)
+
+    def work():
+        return 42
+    assert tracing.traced()(work) is work
+    assert events == []
+
+
+def test_enabled_spans_export_chrome_trace(trace, tmp_path):
+    events = trace(True)
+    with tracing.span("json.load", "io", path="words.json"):
+        pass
+    started = tracing.begin("screen.transition", "ui", screen="game")
+    tracing.end(started)
+
+    @tracing.traced(category="ui")
+    def setup_game(level):
+        return level
+    assert setup_game("A1") == "A1"
+    assert [event["name"] for event in events] == ["json.load", "screen.transition",
+                                                   "test_enabled_spans_export_chrome_trace.<locals>.setup_game"]
+
+    path = tracing.export(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as f:
+        exported = json.load(f)
+    assert exported["displayTimeUnit"] == "ms"
+    complete = [event for event in exported["traceEvents"] if event["ph"] == "X"]
+    metadata = [event for event in exported["traceEvents"] if event["ph"] == "M"]
+    assert len(complete) == 3
+    for event in complete:
+        assert isinstance(event["ts"], float) and event["ts"] >= 0
+        assert isinstance(event["dur"], float) and event["dur"] >= 0
+        assert {"name", "cat", "pid", "tid"} <= set(event)
+    assert complete[0]["cat"] == "io" and complete[0]["args"] == {"path": "words.json"}
+    assert complete[1]["args"] == {"screen": "game"} and "args" not in complete[2]
+    assert [event["name"] for event in metadata] == ["thread_name"]
+    assert metadata[0]["args"]["name"] == "MainThread"
@@ -0,0 +1,107 @@
+import json
+
+import word_store
+from word_store import WordStore, compile_store, default_store_path, word_key
+
+
+def make_word(ru, en="word"):
+    return {
+        "word": en,
+        "definitions": {"ru": f"определение {ru}", "en": f"definition {en}"},
+        "translations": {"ru": ru, "en": en},
+    }
+
+
+def write_words(path, data=None):
+    data = data or {
+        "A1": {
+            "1": {"theme": "Животные", "words": [make_word("собака", "dog"), make_word("кошка", "cat")]},
+            "2": {"theme": "Еда", "words": [make_word("хлеб", "bread")]},
+        },
+        "A2": {"1": {"theme": "Дом", "words": [make_word("дом", "house")]}},
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_compile_and_open(tmp_path):
+    source = write_words(tmp_path / "words.json")
+    store = WordStore.open(source)
+    try:
+        assert store.store_path == default_store_path(source)
+        assert store.layout() == {"A1": ["1", "2"], "A2": ["1"]}
+        words = store.get_words("A1", 1)
+        assert [word["translations"]["ru"] for word in words] == ["собака", "кошка"]
+        assert words[0]["definitions"]["en"] == "definition dog"
+        assert words.ids[1] == word_key("A1", "1", words[1])
+        assert store.get_word("A1_2_хлеб")["word"] == "bread"
+        assert store.theme("A2", "1") == "Дом"
+        assert store.load_error is None
+    finally:
+        store.close()
+
+
+def test_open_reuses_fresh_store(tmp_path):
+    source = write_words(tmp_path / "words.json")
+    WordStore.open(source).close()
+    assert not WordStore.is_stale(source, default_store_path(source))
+
+
+def test_open_falls_back_to_cache_dir(tmp_path, monkeypatch):
+    source = write_words(tmp_path / "words.json")
+    bundle_store = default_store_path(source)
+    original = word_store.compile_store
+
+    def read_only_bundle(source_path, store_path=None):
+        if store_path == bundle_store:
+            raise PermissionError(13, "Read-only file system", store_path)
+        return original(source_path, store_path)
+
+    monkeypatch.setattr(word_store, "compile_store", read_only_bundle)
+    cache_dir = tmp_path / "cache"
+    store = WordStore.open(source, cache_dir=str(cache_dir))
+    try:
+        assert store.store_path == str(cache_dir / "words.store")
+        assert store.word_count("A1", "1") == 2
+    finally:
+        store.close()
+
+
+def test_open_falls_back_to_memory(tmp_path, monkeypatch):
+    source = write_words(tmp_path / "words.json")
+
+    def no_writable_dir(source_path, store_path=None):
+        raise PermissionError(13, "Read-only file system", store_path)
+
+    monkeypatch.setattr(word_store, "compile_store", no_writable_dir)
+    store = WordStore.open(source, cache_dir=str(tmp_path / "cache"))
+    assert store.store_path is None
+    assert store.load_error is None
+    assert [word["word"] for word in store.get_words("A2", "1")] == ["house"]
+    store.close()
+
+
+def test_missing_or_broken_source_reports_error(tmp_path):
+    store = WordStore.open(str(tmp_path / "missing.json"))
+    assert store.levels() == []
+    assert store.load_error
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{", encoding="utf-8")
+    store = WordStore.open(str(broken))
+    assert store.levels() == []
+    assert store.load_error
+
+
+def test_changed_blocks(tmp_path):
+    source = write_words(tmp_path / "words.json")
+    old = WordStore(compile_store(source, str(tmp_path / "old.store")))
+    data = json.loads((tmp_path / "words.json").read_text(encoding="utf-8"))
+    data["A1"]["2"]["words"].append(make_word("сыр", "cheese"))
+    write_words(tmp_path / "words.json", data)
+    new = WordStore(compile_store(source, str(tmp_path / "new.store")))
+    try:
+        assert new.changed_blocks(old) == {("A1", "2")}
+    finally:
+        old.close()
+        new.close()
@@ -0,0 +1,47 @@
+from kivy.event import EventDispatcher
+from kivy.properties import ColorProperty, StringProperty
+
+from tracing import traced
+
+# Палитры тем. Новая тема добавляется сюда же и сразу появляется в настройках.
+THEMES = {
+    "light": {
+        "background": (1, 1, 1, 1),  # #FFFFFF
+        "text": (0, 0, 0, 1),  # #000000
+        "accent": (1, 87/255, 0, 1),  # #FF5700
+        "accent_text": (1, 1, 1, 1),  # #FFFFFF
+        "surface": (249/255, 249/255, 249/255, 1),  # #F9F9F9
+        "surface_text": (0, 0, 0, 1),  # #000000
+    },
+    "dark": {
+        "background": (0.1, 0.1, 0.1, 1),
+        "text": (1, 1, 1, 1),
+        "accent": (1, 87/255, 0, 1),
+        "accent_text": (1, 1, 1, 1),
+        "surface": (0.2, 0.2, 0.2, 1),
+        "surface_text": (1, 1, 1, 1),
+    },
+}
+DEFAULT_THEME = "light"
+
+
+class Theme(EventDispatcher):
+    # Цвета текущей темы как свойства Kivy: wordgame.kv и динамические виджеты
+    # привязаны к ним, поэтому смена темы — это одно присваивание свойств
+    name = StringProperty(DEFAULT_THEME)
+    background = ColorProperty(THEMES[DEFAULT_THEME]["background"])
+    text = ColorProperty(THEMES[DEFAULT_THEME]["text"])
+    accent = ColorProperty(THEMES[DEFAULT_THEME]["accent"])
+    accent_text = ColorProperty(THEMES[DEFAULT_THEME]["accent_text"])
+    surface = ColorProperty(THEMES[DEFAULT_THEME]["surface"])
+    surface_text = ColorProperty(THEMES[DEFAULT_THEME]["surface_text"])
+
+    @traced("Theme.apply", "ui")
+    def apply(self, name):
+        palette = THEMES.get(name, THEMES[DEFAULT_THEME])
+        for key, color in palette.items():
+            setattr(self, key, color)
+        self.name = name if name in THEMES else DEFAULT_THEME
+
+
+THEME = Theme()
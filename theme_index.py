@@ -0,0 +1,61 @@
+from bisect import bisect_right
+
+from deck_sampler import DeckSampler
+
+# Индекс тем: тег темы -> подуровни всех уровней CEFR с этой темой.
+# Строится по заголовку хранилища (тема и число слов каждого блока), слова при этом
+# не раскодируются. Слова темы нумеруются сквозным номером 0..count-1 по блокам,
+# номер переводится в (уровень, подуровень, позиция) бинарным поиском по границам блоков,
+# поэтому выборка колоды стоит O(k log b) и не зависит от размера базы.
+
+
+def theme_tags(theme):
+    # В поле theme может быть несколько тегов через запятую
+    return [tag.strip().lower() for tag in str(theme).split(",") if tag.strip()]
+
+
+class ThemeIndex:
+    def __init__(self):
+        # тег -> [(уровень, подуровень)] и сквозные границы блоков [0, n1, n1 + n2, ...]
+        self._blocks = {}
+        self._bounds = {}
+
+    @classmethod
+    def build(cls, store):
+        index = cls()
+        for block in store.header.get("blocks", []):
+            if not block.get("count"):
+                continue
+            for tag in theme_tags(block.get("theme", "")):
+                blocks = index._blocks.setdefault(tag, [])
+                bounds = index._bounds.setdefault(tag, [0])
+                blocks.append((block["level"], block["sub_level"]))
+                bounds.append(bounds[-1] + block["count"])
+        return index
+
+    def __contains__(self, tag):
+        return tag in self._blocks
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def themes(self, limit=None):
+        # Темы по убыванию числа слов
+        tags = sorted(self._blocks, key=lambda tag: (-self.word_count(tag), tag))
+        return tags if limit is None else tags[:limit]
+
+    def word_count(self, tag):
+        bounds = self._bounds.get(tag)
+        return bounds[-1] if bounds else 0
+
+    def locate(self, tag, number):
+        # Сквозной номер слова темы -> (уровень, подуровень, позиция в блоке)
+        bounds = self._bounds[tag]
+        block = bisect_right(bounds, number) - 1
+        cefr_level, sub_level = self._blocks[tag][block]
+        return cefr_level, sub_level, number - bounds[block]
+
+    def sample(self, tag, k, seed=None):
+        # k случайных слов темы без повторов; возвращает позиции и зерно выборки
+        sampler = DeckSampler(self.word_count(tag), seed=seed)
+        return [self.locate(tag, number) for number in sampler.take(k)], sampler.seed
@@ -0,0 +1,110 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Профилирование по запросу: WORDGAME_TRACE=1 (или путь к файлу) включает запись
+# интервалов, при выходе они сохраняются в формате Chrome Trace Event
+# (открывается в chrome://tracing, Perfetto или speedscope).
+#
+#   WORDGAME_TRACE=trace.json python Word_Game.py
+#
+# Без переменной декоратор traced возвращает функцию без изменений,
+# а span() — общий пустой контекст, так что накладных расходов почти нет.
+
+TRACE_ENV = "WORDGAME_TRACE"
+DEFAULT_TRACE_FILE = "wordgame_trace.json"
+
+_setting = os.environ.get(TRACE_ENV, "")
+ENABLED = _setting.lower() not in ("", "0", "false", "no")
+TRACE_FILE = DEFAULT_TRACE_FILE if _setting.lower() in ("1", "true", "yes") else _setting
+
+_NULL_SPAN = nullcontext()
+_events = []
+_thread_names = {}
+_pid = os.getpid()
+_origin_ns = time.perf_counter_ns()
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _origin_ns) / 1000.0
+
+
+class Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+        return False
+
+    def finish(self):
+        end = _now_us()
+        thread = threading.current_thread()
+        _thread_names[thread.ident] = thread.name
+        event = {"name": self.name, "cat": self.category, "ph": "X", "ts": self.start, "dur": end - self.start,
+                 "pid": _pid, "tid": thread.ident}
+        if self.args:
+            event["args"] = self.args
+        # list.append атомарен, интервалы можно писать из любого потока
+        _events.append(event)
+
+
+def span(name, category="app", **args):
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, category, args)
+
+
+def begin(name, category="app", **args):
+    # Интервал, который закрывается в другом обработчике (например, анимация перехода экрана)
+    if not ENABLED:
+        return None
+    started = Span(name, category, args)
+    started.start = _now_us()
+    return started
+
+
+def end(started):
+    if started is not None:
+        started.finish()
+
+
+def traced(name=None, category="app"):
+    def decorator(func):
+        if not ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(span_name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export(path=None):
+    path = path or TRACE_FILE
+    events = list(_events)
+    metadata = [{"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid, "args": {"name": thread_name}}
+                for tid, thread_name in list(_thread_names.items())]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return path
+
+
+if ENABLED:
+    atexit.register(export)
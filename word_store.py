@@ -0,0 +1,429 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import hashlib
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Формат скомпилированного хранилища:
+#   [magic 4 байта][длина заголовка uint32][заголовок JSON][блоки слов]
+# Заголовок содержит индекс (уровень CEFR, подуровень) -> смещение блока,
+# каждый блок — отдельный JSON-массив слов одного подуровня.
+STORE_MAGIC = b"WGS1"
+STORE_PREFIX = struct.Struct("<4sI")
+STORE_SUFFIX = ".store"
+
+# Сколько раскодированных подуровней держим в памяти одновременно
+DEFAULT_CACHE_SIZE = 16
+
+
+class WordStoreError(Exception):
+    pass
+
+
+def word_key(cefr_level, sub_level, word_data):
+    # Идентификатор слова, общий для словаря, сложных слов и повторений.
+    # Внутри подуровня перевод может повторяться, тогда WordBlock.ids добавляет
+    # к ключам второго и следующих слов номер вхождения: "A1_10_день#2"
+    return f"{cefr_level}_{sub_level}_{word_data['translations']['ru']}"
+
+
+def split_word_key(key):
+    cefr_level, sub_level, _ = key.split("_", 2)
+    return cefr_level, sub_level
+
+
+# Поля слова, которые хранит WordBlock (флаг completed из исходного формата не читается)
+WORD_FIELDS = ("word", "definitions", "translations")
+
+
+def _columns(items, field):
+    # {язык: [строка каждого слова]}; языки интернируются, пропуски — None
+    languages = {}
+    for item in items:
+        for language in item.get(field, ()):
+            languages.setdefault(language, None)
+    return {sys.intern(language): [item.get(field, {}).get(language) for item in items] for language in languages}
+
+
+class LanguageView(Mapping):
+    # Переводы или определения одного слова: словарь «язык -> строка» поверх столбцов блока
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, language):
+        value = self._columns[language][self._index]
+        if value is None:
+            raise KeyError(language)
+        return value
+
+    def __iter__(self):
+        index = self._index
+        return (language for language, column in self._columns.items() if column[index] is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class WordView(Mapping):
+    # Слово блока с прежним интерфейсом словаря: word_data["definitions"][язык]
+    __slots__ = ("block", "index")
+
+    def __init__(self, block, index):
+        self.block = block
+        self.index = index
+
+    def __getitem__(self, field):
+        if field == "word":
+            return self.block.words[self.index]
+        if field == "definitions":
+            return LanguageView(self.block.definitions, self.index)
+        if field == "translations":
+            return LanguageView(self.block.translations, self.index)
+        raise KeyError(field)
+
+    def __iter__(self):
+        return iter(WORD_FIELDS)
+
+    def __len__(self):
+        return len(WORD_FIELDS)
+
+    @property
+    def key(self):
+        return self.block.ids[self.index]
+
+    def to_dict(self):
+        return {"word": self["word"], "definitions": dict(self["definitions"]),
+                "translations": dict(self["translations"])}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class WordBlock(Sequence):
+    # Слова подуровня в столбцовом виде: по списку строк на поле и язык вместо
+    # трёх словарей на каждое слово. Элементы — лёгкие WordView, создаются при обращении.
+    __slots__ = ("level", "sub_level", "words", "definitions", "translations", "_ids", "_positions", "_display")
+
+    def __init__(self, level, sub_level, items):
+        self.level = level
+        self.sub_level = str(sub_level)
+        self.words = [item.get("word", "") for item in items]
+        self.definitions = _columns(items, "definitions")
+        self.translations = _columns(items, "translations")
+        self._ids = None
+        self._positions = None
+        self._display = {}
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [WordView(self, i) for i in range(*index.indices(len(self.words)))]
+        if index < 0:
+            index += len(self.words)
+        if not 0 <= index < len(self.words):
+            raise IndexError(index)
+        return WordView(self, index)
+
+    @property
+    def ids(self):
+        # Идентификаторы слов (word_key) считаются один раз и интернируются:
+        # словарь, повторения и телеметрия ссылаются на одни и те же строки
+        if self._ids is None:
+            prefix = f"{self.level}_{self.sub_level}_"
+            translations = self.translations.get("ru") or [None] * len(self.words)
+            ids = []
+            seen = {}
+            for translation in translations:
+                key = prefix + (translation or "")
+                count = seen[key] = seen.get(key, 0) + 1
+                # Повторный перевод в подуровне: ключ должен указывать на одно слово
+                ids.append(sys.intern(key if count == 1 else f"{key}#{count}"))
+            self._ids = ids
+        return self._ids
+
+    def position(self, key):
+        # Номер слова по его идентификатору; KeyError, если такого нет
+        if self._positions is None:
+            self._positions = {key: index for index, key in enumerate(self.ids)}
+        return self._positions[key]
+
+    def display(self, language):
+        # Строки словаря "перевод - определение": считаются при первом обращении
+        # и кэшируются по языку, повторное переключение на язык ничего не стоит
+        lines = self._display.get(language)
+        if lines is None:
+            empty = [""] * len(self.words)
+            translations = self.translations.get(language) or empty
+            definitions = self.definitions.get(language) or empty
+            lines = self._display[language] = [f"{translation or ''} - {definition or ''}"
+                                               for translation, definition in zip(translations, definitions)]
+        return lines
+
+
+def default_store_path(source_path):
+    return os.path.splitext(source_path)[0] + STORE_SUFFIX
+
+
+def build_store(source_path):
+    # Содержимое хранилища (bytes) для words.json
+    with span("json.load", "io", path=source_path):
+        with open(source_path, "rb") as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise WordStoreError(f"Ошибка в структуре {source_path}: {e}") from e
+
+    stat = os.stat(source_path)
+    blocks = []
+    body = bytearray()
+    for level, sub_levels in data.items():
+        for sub_level, sub_data in sub_levels.items():
+            words = sub_data.get("words", [])
+            payload = json.dumps(words, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            blocks.append({
+                "level": level,
+                "sub_level": str(sub_level),
+                "theme": sub_data.get("theme", ""),
+                "count": len(words),
+                "offset": len(body),
+                "length": len(payload),
+                # По хэшу блока горячая перезагрузка находит изменённые подуровни
+                "hash": hashlib.sha1(payload).hexdigest(),
+            })
+            body += payload
+
+    header = json.dumps({
+        "source_hash": hashlib.sha1(raw).hexdigest(),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "blocks": blocks,
+    }, ensure_ascii=False).encode("utf-8")
+    return STORE_PREFIX.pack(STORE_MAGIC, len(header)) + header + bytes(body)
+
+
+def compile_store(source_path, store_path=None):
+    store_path = store_path or default_store_path(source_path)
+    data = build_store(source_path)
+    # Пишем во временный файл и атомарно подменяем, чтобы не оставить битое хранилище
+    tmp_path = store_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, store_path)
+    logger.info(f"Хранилище слов скомпилировано: {store_path}")
+    return store_path
+
+
+class WordStore:
+    def __init__(self, store_path=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.store_path = store_path
+        self.cache_size = cache_size
+        self.header = {"blocks": []}
+        self._file = None
+        # mmap файла хранилища или bytes, если хранилище собрано в памяти
+        self._buffer = None
+        self._data_start = 0
+        # Причина, по которой база не загружена (для показа пользователю)
+        self.load_error = None
+        # Файл хранилища удаляется при закрытии (временные версии горячей перезагрузки)
+        self.remove_on_close = False
+        # Путь основного хранилища: рядом с ним лежат производные кэши (индекс вариантов).
+        # У версий горячей перезагрузки он свой, а кэши общие и проверяются по source_hash
+        self.base_path = store_path
+        self._index = {}
+        self._levels = OrderedDict()
+        self._cache = OrderedDict()
+        if store_path is not None:
+            self._open(store_path)
+
+    @classmethod
+    def open(cls, source_path, store_path=None, cache_size=DEFAULT_CACHE_SIZE, cache_dir=None):
+        # Хранилище компилируется рядом с words.json, а если там писать нельзя (пакет
+        # приложения только для чтения) — в cache_dir. Если не вышло и там,
+        # words.json разбирается в память без файла хранилища
+        if not os.path.exists(source_path):
+            logger.error(f"Файл {source_path} не найден. Создайте его с корректной структурой.")
+            return cls.empty(f"Файл {source_path} не найден")
+        store_path = store_path or default_store_path(source_path)
+        candidates = [store_path]
+        if cache_dir is not None:
+            candidates.append(os.path.join(cache_dir, os.path.basename(store_path)))
+        try:
+            for path in candidates:
+                try:
+                    if cls.is_stale(source_path, path):
+                        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                        compile_store(source_path, path)
+                    return cls(path, cache_size=cache_size)
+                except OSError as e:
+                    logger.warning(f"Хранилище слов недоступно по пути {path}: {e}")
+            logger.warning("База слов загружена в память без файла хранилища")
+            return cls.from_bytes(build_store(source_path), cache_size=cache_size)
+        except (WordStoreError, OSError) as e:
+            logger.error(f"Ошибка загрузки базы слов: {e}")
+            return cls.empty(str(e))
+
+    @classmethod
+    def from_bytes(cls, data, cache_size=DEFAULT_CACHE_SIZE):
+        store = cls(cache_size=cache_size)
+        store._load(data, "<память>")
+        return store
+
+    @classmethod
+    def empty(cls, error=None):
+        store = cls()
+        store.load_error = error
+        return store
+
+    @staticmethod
+    def is_stale(source_path, store_path):
+        if not os.path.exists(store_path):
+            return True
+        try:
+            header = read_header(store_path)
+        except (WordStoreError, OSError):
+            return True
+        stat = os.stat(source_path)
+        return (header.get("source_mtime_ns") != stat.st_mtime_ns
+                or header.get("source_size") != stat.st_size)
+
+    def _open(self, store_path):
+        self._file = open(store_path, "rb")
+        try:
+            self._load(mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ), store_path)
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self, buffer, name):
+        self._buffer = buffer
+        magic, header_len = STORE_PREFIX.unpack_from(buffer, 0)
+        if magic != STORE_MAGIC:
+            raise WordStoreError(f"Неизвестный формат хранилища: {name}")
+        header_start = STORE_PREFIX.size
+        self._data_start = header_start + header_len
+        self.header = json.loads(buffer[header_start:self._data_start].decode("utf-8"))
+        for block in self.header["blocks"]:
+            key = (block["level"], block["sub_level"])
+            self._index[key] = block
+            self._levels.setdefault(block["level"], []).append(block["sub_level"])
+
+    def close(self):
+        self._cache.clear()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.remove_on_close:
+            self.remove_on_close = False
+            try:
+                os.remove(self.store_path)
+            except OSError as e:
+                logger.warning(f"Хранилище {self.store_path} не удалено: {e}")
+
+    def levels(self):
+        return list(self._levels.keys())
+
+    def layout(self):
+        # {уровень: [подуровни по порядку]} — раскладка для прогресса и карты
+        return {level: list(sub_levels) for level, sub_levels in self._levels.items()}
+
+    def sub_levels(self, level):
+        return list(self._levels.get(level, []))
+
+    def has_sub_level(self, level, sub_level):
+        return (level, str(sub_level)) in self._index
+
+    def theme(self, level, sub_level):
+        return self._block(level, sub_level)["theme"]
+
+    def word_count(self, level, sub_level):
+        return self._block(level, sub_level)["count"]
+
+    def get_words(self, level, sub_level):
+        key = (level, str(sub_level))
+        words = self._cache.get(key)
+        if words is not None:
+            self._cache.move_to_end(key)
+            return words
+
+        words = self.read_block(level, sub_level)
+        self._cache[key] = words
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return words
+
+    def read_block(self, level, sub_level):
+        # Раскодирование блока в обход кэша (для построения индексов по всей базе)
+        block = self._block(level, sub_level)
+        start = self._data_start + block["offset"]
+        with span("json.load", "io", block=f"{level}/{sub_level}"):
+            return WordBlock(level, sub_level, json.loads(self._buffer[start:start + block["length"]].decode("utf-8")))
+
+    def block_hash(self, level, sub_level):
+        # Хэш содержимого подуровня: по нему журнал проверяет, что слова не менялись
+        return self._block(level, sub_level)["hash"]
+
+    def cached_keys(self):
+        return list(self._cache)
+
+    def changed_blocks(self, other):
+        # Подуровни, которые отличаются от хранилища other: изменённые, новые и удалённые
+        changed = set()
+        for key in set(self._index) | set(other._index):
+            block_hash = self._index.get(key, {}).get("hash")
+            if block_hash is None or block_hash != other._index.get(key, {}).get("hash"):
+                changed.add(key)
+        return changed
+
+    def adopt_cache(self, other, changed):
+        # Раскодированные блоки не зависят от файла, поэтому неизменённые подуровни
+        # переезжают из кэша старого хранилища без повторного разбора, а изменённые
+        # раскодируются заново сразу, в том же порядке LRU. Вызывается на UI-потоке,
+        # который владеет кэшем other
+        for key, words in list(other._cache.items()):
+            if key not in self._index or key in self._cache:
+                continue
+            self._cache[key] = self.read_block(*key) if key in changed else words
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_word(self, key):
+        cefr_level, sub_level = split_word_key(key)
+        words = self.get_words(cefr_level, sub_level)
+        return words[words.position(key)]
+
+    def _block(self, level, sub_level):
+        try:
+            return self._index[(level, str(sub_level))]
+        except KeyError:
+            raise KeyError(f"{level}/{sub_level}") from None
+
+
+def read_header(store_path):
+    with open(store_path, "rb") as f:
+        prefix = f.read(STORE_PREFIX.size)
+        if len(prefix) < STORE_PREFIX.size:
+            raise WordStoreError(f"Хранилище повреждено: {store_path}")
+        magic, header_len = STORE_PREFIX.unpack(prefix)
+        if magic != STORE_MAGIC:
+            raise WordStoreError(f"Неизвестный формат хранилища: {store_path}")
+        return json.loads(f.read(header_len).decode("utf-8"))